@@ -1,10 +1,25 @@
 """This file is used to register the models in the admin panel."""
+from decimal import Decimal
+
 from django import forms
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
-
-from accounts.models import CustomUser, UserAddress, UserPayment
+from django.db.models import DecimalField, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from accounts import bulk, export
+from accounts.models import (CustomUser, UserAddress, UserPayment,
+                             UserPaymentSummary)
+from accounts.paginators import EstimatedCountPaginator
+from accounts.search import search
+from course_management.executors import ExecutorSaturated
 
 
 class DateInput(forms.DateInput):
@@ -14,6 +29,42 @@ class DateInput(forms.DateInput):
     format = '%Y-%m-%d'
 
 
+class EstimatedCountMixin:
+    """Use estimated changelist counts when ADMIN_ESTIMATED_COUNT is set."""
+
+    @property
+    def show_full_result_count(self):
+        """Skip the unfiltered count next to filtered results.
+
+        With estimated counts enabled, counting the whole table for the
+        "(N total)" link would undo the estimate.
+
+        Returns:
+            bool: Whether the changelist shows the full result count.
+        """
+        return not getattr(settings, 'ADMIN_ESTIMATED_COUNT', False)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        """Return the changelist paginator.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The changelist queryset.
+            per_page (int): Rows per page.
+            orphans (int): Minimum number of rows on the last page.
+            allow_empty_first_page (bool): Whether page 1 may be empty.
+
+        Returns:
+            Paginator: An EstimatedCountPaginator if
+            ``ADMIN_ESTIMATED_COUNT`` is set, else the default paginator.
+        """
+        paginator = self.paginator
+        if getattr(settings, 'ADMIN_ESTIMATED_COUNT', False):
+            paginator = EstimatedCountPaginator
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+
 class UserAddressInline(admin.StackedInline):
     """Inline admin interface for user addresses."""
 
@@ -146,7 +197,7 @@ class CustomUserChangeForm(forms.ModelForm):
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(EstimatedCountMixin, BaseUserAdmin):
     """Admin interface for managing custom user model."""
 
     inlines = [UserAddressInline, UserPaymentInline]
@@ -154,12 +205,13 @@ class CustomUserAdmin(BaseUserAdmin):
     add_form = CustomUserCreationForm
 
     list_display = ('email', 'full_name', 'phone_number',
-                    'is_active', 'is_staff', 'payment_total', 'date_joined')
+                    'is_active', 'is_staff', 'payment_total',
+                    'payment_count', 'date_joined')
     list_filter = ('is_active', 'is_staff', 'preferred_language')
     search_fields = ('email', 'phone_number', 'first_name', 'last_name')
     ordering = ('-date_joined',)
     actions = ['activate_users', 'deactivate_users',
-               'make_staff', 'unmake_staff']
+               'make_staff', 'unmake_staff', 'export_csv', 'export_jsonl']
     list_per_page = 10
 
     fieldsets = (
@@ -195,18 +247,162 @@ class CustomUserAdmin(BaseUserAdmin):
         return f'{obj.first_name} {obj.last_name}'
     full_name.short_description = 'Full Name'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search users through the trigram-indexed search.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The user queryset.
+            search_term (str): The search string.
+
+        Returns:
+            tuple: The filtered queryset and False, as the search never
+            produces duplicates.
+        """
+        return search(queryset, search_term,
+                      self.get_search_fields(request), user_prefix=''), False
+
+    def get_queryset(self, request):
+        """Annotate users with their payment totals and counts.
+
+        The values come from the maintained UserPaymentSummary row (one
+        LEFT JOIN) rather than from aggregating the payment history.
+
+        Args:
+            request (HttpRequest): The request object.
+
+        Returns:
+            QuerySet: The annotated user queryset.
+        """
+        return super().get_queryset(request).annotate(
+            total_paid=Coalesce(
+                'payment_summary__total', Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=14, decimal_places=2)),
+            payments_count=Coalesce('payment_summary__count', Value(0)),
+        )
+
     def payment_total(self, obj):
-        """Calculate the total payment amount for the user.
+        """Total payment amount of the user.
 
         Args:
-            obj (CustomUser): The user object.
+            obj (CustomUser): The annotated user object.
 
         Returns:
-            float: The total payment amount.
+            str: The total payment amount.
         """
-        total = sum(payment.amount for payment in obj.payments.all())
-        return f'{total:.2f} USD'
+        return f'{obj.total_paid:.2f} USD'
     payment_total.short_description = 'Total Payment Amount'
+    payment_total.admin_order_field = 'total_paid'
+
+    def payment_count(self, obj):
+        """Number of payments of the user.
+
+        Args:
+            obj (CustomUser): The annotated user object.
+
+        Returns:
+            int: The number of payments.
+        """
+        return obj.payments_count
+    payment_count.short_description = 'Payments'
+    payment_count.admin_order_field = 'payments_count'
+
+    def get_urls(self):
+        """Add the progress page of background bulk actions.
+
+        Returns:
+            list: The admin URL patterns of the model.
+        """
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('bulk-jobs/<str:job_id>/',
+                 self.admin_site.admin_view(self.bulk_job_view),
+                 name='%s_%s_bulk_job' % info),
+        ] + super().get_urls()
+
+    def bulk_job_view(self, request, job_id):
+        """Show the progress of a bulk action running in the background.
+
+        The page reloads itself until the job ends, then redirects to the
+        changelist with a completion message.
+
+        Args:
+            request (HttpRequest): The request object.
+            job_id (str): The job id.
+
+        Raises:
+            Http404: If the job is unknown or belongs to another user.
+
+        Returns:
+            HttpResponse: The progress page or the redirect.
+        """
+        job = bulk.get_job(job_id)
+        if job is None or (job['owner_id'] != request.user.pk
+                           and not request.user.is_superuser):
+            raise Http404('Unknown bulk job.')
+        if job['status'] in ('done', 'failed'):
+            if not job['announced']:
+                job['announced'] = True
+                bulk.save_job(job)
+                if job['status'] == 'done':
+                    self.message_user(
+                        request, f'{job["description"]}: '
+                                 f'{job["done"]} users updated.')
+                else:
+                    self.message_user(
+                        request, f'{job["description"]} failed after '
+                                 f'{job["done"]} users: {job["error"]}',
+                        level=messages.ERROR)
+            return redirect('admin:%s_%s_changelist' % (
+                self.opts.app_label, self.opts.model_name))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': job['description'],
+            'job': job,
+            'percent': (job['done'] * 100 // job['total']
+                        if job['total'] else 0),
+        }
+        return TemplateResponse(
+            request, 'admin/accounts/customuser/bulk_job.html', context)
+
+    def _update_users(self, request, queryset, description, message,
+                      **fields):
+        """Bulk update users in chunks, in the background when large.
+
+        Each chunk bumps the user versions and evicts the users from the
+        JWT user cache, see accounts.bulk. A selection that fits in one
+        chunk, or any selection without a shared cache, is updated in the
+        request; larger ones run on the background worker and the admin
+        is sent to the progress page.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The selected user queryset.
+            description (str): What the action does, for the progress
+                page.
+            message (str): Completion message with a ``{count}``
+                placeholder.
+            fields: Field values to set.
+
+        Returns:
+            HttpResponse: The progress page redirect, or None when done.
+        """
+        total = queryset.count()
+        if total <= bulk.chunk_size() or not bulk.runs_in_background():
+            updated = bulk.update_users(queryset, fields)
+            self.message_user(request, message.format(count=updated))
+            return None
+        try:
+            job = bulk.start_job(
+                queryset, fields, description, request.user.pk, total)
+        except ExecutorSaturated:
+            self.message_user(
+                request, 'Too many bulk actions are running, try again '
+                         'later.', level=messages.ERROR)
+            return None
+        return redirect('admin:%s_%s_bulk_job' % (
+            self.opts.app_label, self.opts.model_name), job['id'])
 
     def deactivate_users(self, request, queryset):
         """Deactivate selected users.
@@ -214,10 +410,14 @@ class CustomUserAdmin(BaseUserAdmin):
         Args:
             request (HttpRequest): The request object.
             queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            HttpResponse: The progress page redirect, or None when done.
         """
-        updated = queryset.update(is_active=False)
-        self.message_user(
-            request, f'Selected users {updated} have been deactivated.')
+        return self._update_users(
+            request, queryset, 'Deactivating users',
+            'Selected users {count} have been deactivated.',
+            is_active=False)
     deactivate_users.short_description = 'Deactivate selected users'
 
     def activate_users(self, request, queryset):
@@ -226,10 +426,13 @@ class CustomUserAdmin(BaseUserAdmin):
         Args:
             request (HttpRequest): The request object.
             queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            HttpResponse: The progress page redirect, or None when done.
         """
-        updated = queryset.update(is_active=True)
-        self.message_user(
-            request, f'Selected users {updated} have been activated.')
+        return self._update_users(
+            request, queryset, 'Activating users',
+            'Selected users {count} have been activated.', is_active=True)
     activate_users.short_description = 'Activate selected users'
 
     def make_staff(self, request, queryset):
@@ -238,9 +441,13 @@ class CustomUserAdmin(BaseUserAdmin):
         Args:
             request (HttpRequest): The request object.
             queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            HttpResponse: The progress page redirect, or None when done.
         """
-        updated = queryset.update(is_staff=True)
-        self.message_user(request, f'Selected users {updated} are now staff.')
+        return self._update_users(
+            request, queryset, 'Making users staff',
+            'Selected users {count} are now staff.', is_staff=True)
     make_staff.short_description = 'Make selected users staff'
 
     def unmake_staff(self, request, queryset):
@@ -249,12 +456,60 @@ class CustomUserAdmin(BaseUserAdmin):
         Args:
             request (HttpRequest): The request object.
             queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            HttpResponse: The progress page redirect, or None when done.
         """
-        updated = queryset.update(is_staff=False)
-        self.message_user(
-            request, f'Selected users {updated} are no longer staff.')
+        return self._update_users(
+            request, queryset, 'Removing staff status',
+            'Selected users {count} are no longer staff.', is_staff=False)
     unmake_staff.short_description = 'Remove staff status from selected users'
 
+    @staticmethod
+    def _export(queryset, export_format):
+        """Stream the selected users with their addresses and payments.
+
+        Args:
+            queryset (QuerySet): The selected user queryset.
+            export_format (str): ``'csv'`` or ``'jsonl'``.
+
+        Returns:
+            StreamingHttpResponse: The export as a file download.
+        """
+        response = StreamingHttpResponse(
+            export.stream(queryset, export_format),
+            content_type=export.CONTENT_TYPES[export_format])
+        filename = timezone.now().strftime('users-%Y%m%d-%H%M%S')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}.{export_format}"')
+        return response
+
+    def export_csv(self, request, queryset):
+        """Export selected users with addresses and payments as CSV.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            StreamingHttpResponse: The CSV file.
+        """
+        return self._export(queryset, 'csv')
+    export_csv.short_description = 'Export selected users as CSV'
+
+    def export_jsonl(self, request, queryset):
+        """Export selected users with addresses and payments as JSON Lines.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The selected user queryset.
+
+        Returns:
+            StreamingHttpResponse: The JSON Lines file.
+        """
+        return self._export(queryset, 'jsonl')
+    export_jsonl.short_description = 'Export selected users as JSON Lines'
+
 
 @admin.register(UserAddress)
 class UserAddressAdmin(admin.ModelAdmin):
@@ -262,14 +517,59 @@ class UserAddressAdmin(admin.ModelAdmin):
 
     list_display = ('user', 'postal_code', 'country', 'city', 'street')
     list_filter = ('city', 'postal_code')
+    list_select_related = ('user',)
     search_fields = ('user__email', 'country', 'city')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search addresses through the trigram-indexed search.
+
+        Args:
+            request (HttpRequest): The request object.
+            queryset (QuerySet): The address queryset.
+            search_term (str): The search string.
+
+        Returns:
+            tuple: The filtered queryset and False, as the search never
+            produces duplicates.
+        """
+        return search(queryset, search_term, self.get_search_fields(request),
+                      user_prefix='user__'), False
+
 
 @admin.register(UserPayment)
-class UserPaymentAdmin(admin.ModelAdmin):
-    """Admin interface for managing user payments."""
+class UserPaymentAdmin(EstimatedCountMixin, admin.ModelAdmin):
+    """Admin interface for managing user payments.
+
+    The date hierarchy bounds the list by ``payment_date``, which lets a
+    partitioned payments table skip the other months.
+    """
 
     list_display = ('user', 'amount', 'payment_method', 'payment_date')
     list_filter = ('payment_method', 'payment_date')
+    list_select_related = ('user',)
+    date_hierarchy = 'payment_date'
     search_fields = ('user__email', 'payment_method')
     ordering = ('-payment_date',)
+
+
+@admin.register(UserPaymentSummary)
+class UserPaymentSummaryAdmin(admin.ModelAdmin):
+    """Read-only admin interface for the maintained payment summaries."""
+
+    list_display = ('user', 'total', 'count', 'last_payment_date')
+    list_select_related = ('user',)
+    search_fields = ('user__email',)
+    ordering = ('-total',)
+    readonly_fields = ('user', 'total', 'count', 'last_payment_date',
+                       'by_method')
+
+    def has_add_permission(self, request):
+        """Summaries are created from payments only.
+
+        Args:
+            request (HttpRequest): The request object.
+
+        Returns:
+            bool: Always False.
+        """
+        return False
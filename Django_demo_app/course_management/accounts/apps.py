@@ -6,3 +6,7 @@ class AccountsConfig(AppConfig):
     """Configuration class for the accounts Django application."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,242 @@
+"""Chunked, background bulk updates of users for the admin actions.
+
+A single ``UPDATE`` over a large selection holds its row locks until it
+commits, blocking logins and profile saves of every selected user for
+the whole run. Here the selection is walked in primary-key order and
+updated ``chunk_size`` users at a time, each chunk in its own short
+transaction that also bumps the user versions and, once committed, sends
+``accounts.signals.users_updated`` so caches of users (such as the JWT
+user cache) evict them.
+
+Selections larger than one chunk run as a job on a local bounded worker
+pool. Job progress is kept in the cache, so the admin can show a
+progress page served by any process; that needs a cache shared by all
+processes, and with a process-local backend every selection is updated
+in the request instead. The process running jobs refreshes a heartbeat
+key while it works, so a job whose process died is reported as failed
+instead of running forever.
+"""
+import logging
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from course_management.executors import BoundedExecutor, ExecutorSaturated
+
+from .models import CustomUser
+from .signals import users_updated
+
+logger = logging.getLogger(__name__)
+
+JOB_TIMEOUT = 86400
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_STALE_AFTER = 300
+
+# Identifies this process in the jobs it runs.
+WORKER_ID = uuid.uuid4().hex
+
+bulk_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'ADMIN_BULK_WORKERS', 1),
+    max_queue=getattr(settings, 'ADMIN_BULK_QUEUE', 4),
+    name='admin-bulk',
+)
+
+
+def chunk_size():
+    """Return the configured number of users updated per transaction.
+
+    Returns:
+        int: The chunk size.
+    """
+    return getattr(settings, 'ADMIN_BULK_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def stale_after():
+    """Return the seconds after which a silent job counts as dead.
+
+    Returns:
+        int: The heartbeat timeout.
+    """
+    return getattr(settings, 'ADMIN_BULK_STALE_AFTER', DEFAULT_STALE_AFTER)
+
+
+def runs_in_background():
+    """Tell whether large selections can run as background jobs.
+
+    Returns:
+        bool: True if the default cache is shared between processes.
+    """
+    return not isinstance(
+        caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def update_users(queryset, fields, size=None, progress=None):
+    """Update the selected users chunk by chunk.
+
+    Args:
+        queryset (QuerySet): The selected users.
+        fields (dict): Field values to set.
+        size (int): Users per chunk; defaults to ``chunk_size()``.
+        progress (callable): Called with the number of users updated so
+            far after every chunk.
+
+    Returns:
+        int: Number of updated users.
+    """
+    size = size or chunk_size()
+    selection = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    updated = 0
+    while True:
+        with transaction.atomic():
+            chunk = selection
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            user_ids = list(chunk[:size])
+            if not user_ids:
+                break
+            updated += CustomUser.objects.filter(pk__in=user_ids).update(
+                version=F('version') + 1, **fields)
+            transaction.on_commit(partial(
+                users_updated.send, sender=CustomUser, user_ids=user_ids))
+        last_pk = user_ids[-1]
+        if progress is not None:
+            progress(updated)
+    return updated
+
+
+def job_key(job_id):
+    """Build the cache key of a job.
+
+    Args:
+        job_id (str): The job id.
+
+    Returns:
+        str: The cache key.
+    """
+    return f'admin:bulk-job:{job_id}'
+
+
+def worker_key(worker_id):
+    """Build the cache key of a worker process heartbeat.
+
+    Args:
+        worker_id (str): The ``WORKER_ID`` of the process.
+
+    Returns:
+        str: The cache key.
+    """
+    return f'admin:bulk-worker:{worker_id}'
+
+
+def get_job(job_id):
+    """Return the state of a job.
+
+    A queued or running job whose process has not sent a heartbeat for
+    ``stale_after()`` seconds is marked as failed.
+
+    Args:
+        job_id (str): The job id.
+
+    Returns:
+        dict: The job, or None if it is unknown or expired.
+    """
+    job = cache.get(job_key(job_id))
+    if (job is not None and job['status'] in ('queued', 'running')
+            and cache.get(worker_key(job.get('worker'))) is None):
+        job['status'] = 'failed'
+        job['error'] = 'The worker process stopped.'
+        job['finished'] = timezone.now()
+        save_job(job)
+    return job
+
+
+def save_job(job):
+    """Store the state of a job.
+
+    Args:
+        job (dict): The job.
+    """
+    cache.set(job_key(job['id']), job, JOB_TIMEOUT)
+
+
+def _beat():
+    """Record that this process is still working on its jobs."""
+    cache.set(worker_key(WORKER_ID), timezone.now(), stale_after())
+
+
+def start_job(queryset, fields, description, owner_id, total):
+    """Run a bulk update of users on the background worker pool.
+
+    Args:
+        queryset (QuerySet): The selected users.
+        fields (dict): Field values to set.
+        description (str): What the job does, for the progress page.
+        owner_id (int): The admin user starting the job.
+        total (int): Number of selected users.
+
+    Raises:
+        ExecutorSaturated: If too many jobs are running or queued.
+
+    Returns:
+        dict: The queued job.
+    """
+    job = {
+        'id': uuid.uuid4().hex,
+        'description': description,
+        'owner_id': owner_id,
+        'status': 'queued',
+        'total': total,
+        'done': 0,
+        'error': None,
+        'created': timezone.now(),
+        'finished': None,
+        'announced': False,
+        'worker': WORKER_ID,
+    }
+    _beat()
+    save_job(job)
+    try:
+        bulk_executor.submit(_run_job, job, queryset, fields)
+    except ExecutorSaturated:
+        cache.delete(job_key(job['id']))
+        raise
+    return job
+
+
+def _run_job(job, queryset, fields):
+    """Run a job on a worker thread, recording its progress.
+
+    Args:
+        job (dict): The job.
+        queryset (QuerySet): The selected users.
+        fields (dict): Field values to set.
+    """
+    def progress(done):
+        job['done'] = done
+        _beat()
+        save_job(job)
+
+    close_old_connections()
+    job['status'] = 'running'
+    _beat()
+    save_job(job)
+    try:
+        job['done'] = update_users(queryset, fields, progress=progress)
+        job['status'] = 'done'
+    except Exception as exc:
+        logger.exception('Bulk job %s failed', job['id'])
+        job['status'] = 'failed'
+        job['error'] = str(exc)
+    finally:
+        job['finished'] = timezone.now()
+        _beat()
+        save_job(job)
+        close_old_connections()
@@ -0,0 +1,205 @@
+"""Streaming export of users with their addresses and payments.
+
+Users are read with ``QuerySet.iterator(chunk_size=...)`` and their
+addresses and payments are prefetched per chunk, so memory use does not
+grow with the number of users, and on PostgreSQL the rows come from a
+server-side cursor. Records are encoded one at a time by generators that
+can feed a ``StreamingHttpResponse`` or a file.
+
+CSV has one ``user`` row per user followed by one ``address`` or
+``payment`` row per related record, told apart by the ``record`` column.
+JSON Lines has one object per user with nested ``addresses`` and
+``payments`` lists.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import UserAddress, UserPayment
+
+DEFAULT_CHUNK_SIZE = 2000
+
+USER_FIELDS = (
+    'id', 'email', 'phone_number', 'first_name', 'last_name',
+    'date_of_birth', 'date_joined', 'is_active', 'is_staff',
+    'preferred_language',
+)
+ADDRESS_FIELDS = ('postal_code', 'country', 'city', 'street')
+PAYMENT_FIELDS = ('amount', 'payment_method', 'payment_date')
+
+CSV_HEADER = (
+    ('record', 'user_id')
+    + USER_FIELDS[1:]
+    + tuple(f'address_{field}' for field in ADDRESS_FIELDS)
+    + tuple(f'payment_{field}' for field in PAYMENT_FIELDS)
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def chunk_size():
+    """Return the configured number of users fetched per query.
+
+    Returns:
+        int: The chunk size.
+    """
+    return getattr(settings, 'USER_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def export_queryset(queryset):
+    """Prepare a user queryset for export.
+
+    Args:
+        queryset (QuerySet): The users to export.
+
+    Returns:
+        QuerySet: The users in primary-key order with their addresses and
+            payments prefetched.
+    """
+    return queryset.order_by('pk').only(*USER_FIELDS).prefetch_related(
+        Prefetch('addresses', UserAddress.objects.order_by('pk').only(
+            'user_id', *ADDRESS_FIELDS)),
+        Prefetch('payments', UserPayment.objects.order_by('pk').only(
+            'user_id', *PAYMENT_FIELDS)),
+    )
+
+
+def iter_users(queryset, size=None):
+    """Iterate over the users to export, chunk by chunk.
+
+    Args:
+        queryset (QuerySet): The users to export.
+        size (int): Users per chunk; defaults to ``chunk_size()``.
+
+    Yields:
+        CustomUser: The users with their addresses and payments.
+    """
+    yield from export_queryset(queryset).iterator(
+        chunk_size=size or chunk_size())
+
+
+class Echo:
+    """File-like object that returns what is written to it.
+
+    Lets ``csv.writer`` encode one row at a time for a generator.
+    """
+
+    def write(self, value):
+        """Return the written value.
+
+        Args:
+            value (str): The encoded row.
+
+        Returns:
+            str: The same value.
+        """
+        return value
+
+
+def csv_rows(user):
+    """Build the CSV rows of one user.
+
+    Args:
+        user (CustomUser): The user with prefetched related records.
+
+    Yields:
+        list: The user row, then its address and payment rows.
+    """
+    blank_user = [''] * (len(USER_FIELDS) - 1)
+    blank_address = [''] * len(ADDRESS_FIELDS)
+    blank_payment = [''] * len(PAYMENT_FIELDS)
+    yield (['user', user.pk]
+           + [getattr(user, field) for field in USER_FIELDS[1:]]
+           + blank_address + blank_payment)
+    for address in user.addresses.all():
+        yield (['address', user.pk] + blank_user
+               + [getattr(address, field) for field in ADDRESS_FIELDS]
+               + blank_payment)
+    for payment in user.payments.all():
+        yield (['payment', user.pk] + blank_user + blank_address
+               + [getattr(payment, field) for field in PAYMENT_FIELDS])
+
+
+def user_record(user):
+    """Build the JSON record of one user.
+
+    Args:
+        user (CustomUser): The user with prefetched related records.
+
+    Returns:
+        dict: The user fields with nested addresses and payments.
+    """
+    record = {field: getattr(user, field) for field in USER_FIELDS}
+    record['addresses'] = [
+        {field: getattr(address, field) for field in ADDRESS_FIELDS}
+        for address in user.addresses.all()
+    ]
+    record['payments'] = [
+        {field: getattr(payment, field) for field in PAYMENT_FIELDS}
+        for payment in user.payments.all()
+    ]
+    return record
+
+
+def stream_csv(queryset, size=None):
+    """Encode users as CSV, one line at a time.
+
+    Args:
+        queryset (QuerySet): The users to export.
+        size (int): Users per chunk; defaults to ``chunk_size()``.
+
+    Yields:
+        str: The header, then the rows of every user.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for user in iter_users(queryset, size):
+        for row in csv_rows(user):
+            yield writer.writerow(row)
+
+
+def stream_jsonl(queryset, size=None):
+    """Encode users as JSON Lines, one user at a time.
+
+    Args:
+        queryset (QuerySet): The users to export.
+        size (int): Users per chunk; defaults to ``chunk_size()``.
+
+    Yields:
+        str: One JSON object and a newline per user.
+    """
+    for user in iter_users(queryset, size):
+        yield json.dumps(user_record(user), cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
+
+
+def stream(queryset, export_format, size=None):
+    """Encode users in the given format.
+
+    Args:
+        queryset (QuerySet): The users to export.
+        export_format (str): ``'csv'`` or ``'jsonl'``.
+        size (int): Users per chunk; defaults to ``chunk_size()``.
+
+    Raises:
+        ValueError: If the format is unknown.
+
+    Returns:
+        Iterator: The encoded lines.
+    """
+    try:
+        encode = STREAMS[export_format]
+    except KeyError:
+        raise ValueError(f'Unknown export format: {export_format}') from None
+    return encode(queryset, size)
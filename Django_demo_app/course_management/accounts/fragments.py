@@ -0,0 +1,66 @@
+"""Cached fragment of the user info shown by the user templates.
+
+The user-specific part of ``accounts/user_info.html`` lives in
+``accounts/user_card.html`` and is cached per user. Keys embed the user
+id, the user version and the profile picture digest: every real save of
+a user bumps its version (see ``CustomUser.save``) and rendered
+thumbnails set the digest, so changed users simply get new keys and
+their old fragments expire. Volatile output such as the current time is
+rendered outside the fragment.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from courses_app.cache import get_or_render
+
+from .thumbnails import thumbnails
+
+DEFAULT_TIMEOUT = 3600
+
+
+def user_info_key(user):
+    """Build the cache key of a user's info fragment.
+
+    Args:
+        user (CustomUser): The user.
+
+    Returns:
+        str: The cache key.
+    """
+    return (f'accounts:user-info:{user.pk}:v{user.version}:'
+            f'{user.profile_picture_digest or "-"}')
+
+
+def render_user_info(user):
+    """Render a user's info fragment.
+
+    Args:
+        user (CustomUser): The user.
+
+    Returns:
+        str: The rendered fragment.
+    """
+    return render_to_string('accounts/user_card.html', {
+        'user': user,
+        'thumbnails': thumbnails(user),
+    })
+
+
+def get_user_info(user):
+    """Return a user's info fragment, from the cache when possible.
+
+    A ``USER_INFO_CACHE_TIMEOUT`` of 0 disables the cache.
+
+    Args:
+        user (CustomUser): The user.
+
+    Returns:
+        str: The rendered fragment.
+    """
+    timeout = getattr(settings, 'USER_INFO_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+    if not timeout:
+        return render_user_info(user)
+    return get_or_render(
+        user_info_key(user), partial(render_user_info, user), timeout)
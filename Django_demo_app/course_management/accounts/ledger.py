@@ -0,0 +1,220 @@
+"""Incremental maintenance of UserPaymentSummary rows.
+
+Each payment change adjusts its user's summary in the same transaction,
+under a row lock on the summary, so concurrent payments for one user
+serialize instead of losing updates. A payment moved to another user
+locks both summaries in user id order, so opposite moves cannot
+deadlock. Only removing a user's latest payment needs a query over their
+payments, to find the new latest date.
+
+``compute_summaries`` recomputes summaries from the payment rows for the
+``rebuild_payment_summaries`` command, and ``rebuild_summaries`` rewrites
+the summaries of users whose payments were removed in bulk.
+"""
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import Count, Max, Sum
+
+from .models import UserPayment, UserPaymentSummary
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    """Return an amount as a Decimal with two places.
+
+    Args:
+        value (Decimal | int | float | str): The amount.
+
+    Returns:
+        Decimal: The quantized amount.
+    """
+    return Decimal(str(value)).quantize(CENT)
+
+
+def payment_state(payment):
+    """Return the fields of a payment that feed its user's summary.
+
+    Args:
+        payment (UserPayment): The payment.
+
+    Returns:
+        tuple: ``(user_id, amount, payment_method, payment_date)``.
+    """
+    return (payment.user_id, _money(payment.amount),
+            payment.payment_method, payment.payment_date)
+
+
+def record_payment(payment, previous=None, using=None):
+    """Apply a saved payment to its user's summary.
+
+    Args:
+        payment (UserPayment): The saved payment.
+        previous (tuple): ``payment_state`` of the row before an update,
+            or None for a new payment.
+        using (str): The database alias.
+    """
+    using = using or router.db_for_write(UserPaymentSummary)
+    current = payment_state(payment)
+    if previous == current:
+        return
+    with transaction.atomic(using=using):
+        if previous is not None and previous[0] != current[0]:
+            _lock_summaries(sorted((previous[0], current[0])), using)
+        if previous is not None:
+            _adjust(previous, -1, using, create=True)
+        _adjust(current, 1, using, create=True)
+
+
+def remove_payment(payment, using=None):
+    """Take a deleted payment out of its user's summary.
+
+    Args:
+        payment (UserPayment): The deleted payment.
+        using (str): The database alias.
+    """
+    using = using or router.db_for_write(UserPaymentSummary)
+    with transaction.atomic(using=using):
+        _adjust(payment_state(payment), -1, using, create=False)
+
+
+def _lock_summaries(user_ids, using):
+    """Create and lock the summaries of several users in a fixed order.
+
+    Args:
+        user_ids (list): Primary keys of the users, sorted.
+        using (str): The database alias.
+    """
+    summaries = UserPaymentSummary.objects.using(using)
+    for user_id in user_ids:
+        summaries.get_or_create(user_id=user_id)
+    list(summaries.select_for_update().filter(
+        user_id__in=user_ids).order_by('user_id'))
+
+
+def _adjust(state, sign, using, create):
+    """Add or subtract one payment from a summary.
+
+    Args:
+        state (tuple): ``payment_state`` of the payment.
+        sign (int): 1 to add the payment, -1 to subtract it.
+        using (str): The database alias.
+        create (bool): Whether to create a missing summary.
+    """
+    user_id, amount, method, payment_date = state
+    summaries = UserPaymentSummary.objects.using(using)
+    if create:
+        summaries.get_or_create(user_id=user_id)
+    summary = summaries.select_for_update().filter(user_id=user_id).first()
+    if summary is None:
+        return
+
+    summary.total += sign * amount
+    summary.count = max(0, summary.count + sign)
+    entry = summary.by_method.get(method, {'total': '0', 'count': 0})
+    entry_total = Decimal(entry['total']) + sign * amount
+    entry_count = entry['count'] + sign
+    if entry_count > 0:
+        summary.by_method[method] = {
+            'total': str(entry_total), 'count': entry_count}
+    else:
+        summary.by_method.pop(method, None)
+
+    last = summary.last_payment_date
+    if sign > 0:
+        if last is None or payment_date > last:
+            summary.last_payment_date = payment_date
+    elif last is not None and payment_date >= last:
+        summary.last_payment_date = (
+            UserPayment.objects.using(using)
+            .filter(user_id=user_id)
+            .aggregate(last=Max('payment_date'))['last'])
+    summary.save(using=using)
+
+
+def compute_summaries(user_ids, using=None):
+    """Compute summaries of users from their payment rows.
+
+    Args:
+        user_ids (iterable): Primary keys of the users.
+        using (str): The database alias to read from.
+
+    Returns:
+        dict: Unsaved UserPaymentSummary instances by user id, for the
+        users that have payments.
+    """
+    rows = (
+        UserPayment.objects.using(using)
+        .filter(user_id__in=list(user_ids))
+        .values('user_id', 'payment_method')
+        .annotate(total=Sum('amount'), count=Count('id'),
+                  last=Max('payment_date'))
+        .order_by()
+    )
+    summaries = {}
+    for row in rows:
+        summary = summaries.get(row['user_id'])
+        if summary is None:
+            summary = summaries[row['user_id']] = UserPaymentSummary(
+                user_id=row['user_id'], total=Decimal('0'), count=0,
+                by_method={})
+        summary.total += _money(row['total'])
+        summary.count += row['count']
+        if (summary.last_payment_date is None
+                or row['last'] > summary.last_payment_date):
+            summary.last_payment_date = row['last']
+        summary.by_method[row['payment_method']] = {
+            'total': str(_money(row['total'])), 'count': row['count']}
+    return summaries
+
+
+def rebuild_summaries(user_ids, using=None):
+    """Rewrite the stored summaries of users from their payment rows.
+
+    The stored summaries are locked first, so payments saved meanwhile
+    wait and then apply to the rewritten totals. Must run in a
+    transaction.
+
+    Args:
+        user_ids (iterable): Primary keys of the users.
+        using (str): The database alias.
+
+    Returns:
+        int: The number of summaries rewritten.
+    """
+    using = using or router.db_for_write(UserPaymentSummary)
+    user_ids = list(user_ids)
+    stored = list(
+        UserPaymentSummary.objects.using(using)
+        .select_for_update()
+        .filter(user_id__in=user_ids)
+        .order_by('user_id')
+    )
+    actual = compute_summaries(user_ids, using=using)
+    rebuilt = [
+        actual.get(summary.user_id) or UserPaymentSummary(
+            user_id=summary.user_id, total=Decimal('0'), count=0,
+            last_payment_date=None, by_method={})
+        for summary in stored
+    ]
+    UserPaymentSummary.objects.using(using).bulk_update(
+        rebuilt, ['total', 'count', 'last_payment_date', 'by_method'])
+    return len(rebuilt)
+
+
+def summary_fields(summary):
+    """Return the comparable values of a summary.
+
+    Args:
+        summary (UserPaymentSummary): The summary.
+
+    Returns:
+        tuple: Total, count, last payment date and method breakdown.
+    """
+    by_method = {
+        method: (Decimal(entry['total']), entry['count'])
+        for method, entry in summary.by_method.items()
+    }
+    return (Decimal(summary.total), summary.count,
+            summary.last_payment_date, by_method)
@@ -0,0 +1,156 @@
+"""Export old monthly payment partitions to files and drop them."""
+import gzip
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from accounts.ledger import rebuild_summaries
+from accounts.models import UserPayment
+from accounts.partitioning import (add_months, is_partitioned, month_start,
+                                   monthly_partitions)
+from accounts.reporting import bump_report_version
+
+SUMMARY_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Archive the monthly partitions older than a cutoff month.
+
+    Each partition is exported with ``COPY`` to a gzipped CSV file, then
+    detached from the payments table and dropped, in one transaction that
+    holds a share lock on the partition, so no row changes between the
+    export and the drop. The same transaction rebuilds the payment
+    summaries of the users with payments in the partition, and the cached
+    revenue reports are dropped once it commits, so summaries and reports
+    only count the payments that are still stored: archived payments no
+    longer add to a user's lifetime total. Keeping them would make the
+    summaries disagree with the payment rows, which
+    ``rebuild_payment_summaries`` would then "repair".
+    """
+
+    help = ('Export the monthly partitions of the payments table older '
+            'than --before (or --keep-months) to gzipped CSV files in '
+            '--output-dir, then detach and drop them. Payment summaries '
+            'and revenue reports stop counting the archived payments.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--output-dir', required=True,
+            help='Directory the archive files are written to.')
+        parser.add_argument(
+            '--before',
+            help='Archive months before this one (YYYY-MM).')
+        parser.add_argument(
+            '--keep-months', type=int, default=24,
+            help='Months to keep, counting the current one, when --before '
+                 'is not given.')
+        parser.add_argument(
+            '--keep-table', action='store_true',
+            help='Detach the partitions but keep them as tables.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='List the partitions that would be archived.')
+
+    def handle(self, *args, **options):
+        """Archive every partition before the cutoff.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+
+        Raises:
+            CommandError: If the database is not PostgreSQL, the table is
+                not partitioned or the cutoff is not in the past.
+        """
+        using = router.db_for_write(UserPayment)
+        connection = connections[using]
+        table = UserPayment._meta.db_table
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL.')
+        if not is_partitioned(connection, table):
+            raise CommandError(f'{table} is not partitioned.')
+
+        current = month_start(timezone.localdate())
+        if options['before']:
+            try:
+                cutoff = datetime.strptime(
+                    options['before'], '%Y-%m').date()
+            except ValueError as exc:
+                raise CommandError('--before must be YYYY-MM.') from exc
+        else:
+            cutoff = add_months(current, 1 - options['keep_months'])
+        if cutoff > current:
+            raise CommandError('Only past months can be archived.')
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        archived = 0
+        for month, name in monthly_partitions(connection, table):
+            if month >= cutoff:
+                break
+            path = output_dir / f'{name}.csv.gz'
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {name} to {path}.')
+                continue
+            if path.exists():
+                raise CommandError(f'{path} already exists.')
+            with transaction.atomic(using=using):
+                users = self._archive(connection, table, name, path,
+                                      options['keep_table'])
+                transaction.on_commit(bump_report_version, using=using)
+            self.stdout.write(
+                f'Archived {name} to {path} '
+                f'({path.stat().st_size} bytes), {users} payment summaries '
+                f'rebuilt.')
+            archived += 1
+        self.stdout.write(f'{archived} partitions archived.')
+
+    @staticmethod
+    def _archive(connection, table, name, path, keep_table):
+        """Export one partition, detach and drop it, and rebuild summaries.
+
+        Args:
+            connection (DatabaseWrapper): The database connection.
+            table (str): The partitioned table.
+            name (str): The partition to archive.
+            path (Path): The archive file.
+            keep_table (bool): Keep the detached partition as a table.
+
+        Returns:
+            int: The number of payment summaries rebuilt.
+        """
+        quote = connection.ops.quote_name
+        partial = path.with_name(path.name + '.part')
+        user_column = UserPayment._meta.get_field('user').column
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {quote(name)} IN SHARE MODE')
+            with gzip.open(partial, 'wb') as archive:
+                cursor.copy_expert(
+                    f'COPY {quote(name)} TO STDOUT '
+                    f'WITH (FORMAT csv, HEADER)', archive)
+            with open(partial, 'rb') as archive:
+                os.fsync(archive.fileno())
+            partial.rename(path)
+            cursor.execute(
+                f'SELECT DISTINCT {quote(user_column)} FROM {quote(name)} '
+                f'ORDER BY 1')
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                f'ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}')
+            if not keep_table:
+                cursor.execute(f'DROP TABLE {quote(name)}')
+        rebuilt = 0
+        for start in range(0, len(user_ids), SUMMARY_BATCH_SIZE):
+            rebuilt += rebuild_summaries(
+                user_ids[start:start + SUMMARY_BATCH_SIZE],
+                using=connection.alias)
+        return rebuilt
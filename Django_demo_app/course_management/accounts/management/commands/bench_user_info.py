@@ -0,0 +1,90 @@
+"""Benchmark rendering the user info templates."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from accounts.fragments import user_info_key
+from course_management.benchmarking import format_summary, summarize, timed
+
+User = get_user_model()
+
+TEMPLATES = {
+    'user_info': 'accounts/user_info.html',
+    'tags': 'accounts/tags.html',
+}
+
+
+class Command(BaseCommand):
+    """Compare the user info templates with and without fragment caching."""
+
+    help = ('Benchmark rendering accounts/user_info.html and '
+            'accounts/tags.html with the user info fragment cache disabled, '
+            'missing and hit. The benchmark user is rolled back.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--renders', type=int, default=2000,
+            help='Renders per case.')
+
+    def handle(self, *args, **options):
+        """Run every case against a temporary user.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='bench-user-info@example.com',
+                phone_number='+000000001',
+                username='bench-user-info',
+                first_name='Bench', last_name='User',
+                profile_picture='profile_pictures/bench-user-info.png',
+                profile_picture_digest='0' * 64,
+            )
+            request = RequestFactory().get('/accounts/user-info/')
+            request.user = user
+            context = {'user': user, 'request': request}
+            try:
+                for label, template in TEMPLATES.items():
+                    self._run(f'{label} / no cache', template, context,
+                              options['renders'], disabled=True)
+                    self._run(f'{label} / miss', template, context,
+                              options['renders'], evict=user)
+                    self._run(f'{label} / hit', template, context,
+                              options['renders'])
+            finally:
+                cache.delete(user_info_key(user))
+                transaction.set_rollback(True)
+
+    def _run(self, label, template, context, renders, disabled=False,
+             evict=None):
+        """Render a template repeatedly and print the results.
+
+        Args:
+            label (str): Name of the case.
+            template (str): The template to render.
+            context (dict): The template context.
+            renders (int): Number of renders.
+            disabled (bool): Disable the fragment cache.
+            evict (CustomUser): Evict this user's fragment before every
+                render.
+        """
+        samples = []
+        timeout = 0 if disabled else 3600
+        with override_settings(USER_INFO_CACHE_TIMEOUT=timeout):
+            render_to_string(template, context)
+            for _ in range(renders):
+                if evict is not None:
+                    cache.delete(user_info_key(evict))
+                with timed(samples):
+                    render_to_string(template, context)
+        self.stdout.write(format_summary(label, summarize(samples)))
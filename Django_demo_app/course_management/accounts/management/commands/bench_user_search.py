@@ -0,0 +1,176 @@
+"""Benchmark the admin user and address search."""
+import random
+import time
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from accounts.models import UserAddress
+from course_management.benchmarking import format_summary, summarize, timed
+
+User = get_user_model()
+
+FIRST_NAMES = (
+    'olena andrii maria taras iryna dmytro oksana serhii natalia ivan '
+    'kateryna mykola yulia oleh sofia bohdan anna pavlo daria yurii'
+).split()
+LAST_NAMES = (
+    'shevchenko kovalenko bondarenko tkachenko kravchenko oliinyk '
+    'shevchuk polishchuk lysenko marchenko rudenko savchenko moroz '
+    'melnyk boiko koval petrenko hrytsenko pavlenko levchenko'
+).split()
+CITIES = (
+    'Kyiv Lviv Odesa Kharkiv Dnipro Zaporizhzhia Vinnytsia Poltava '
+    'Chernihiv Uzhhorod Ternopil Rivne Lutsk Sumy Zhytomyr Kherson'
+).split()
+COUNTRIES = ('Ukraine', 'Poland', 'Germany', 'Canada', 'Portugal')
+DOMAIN = 'bench-user-search.invalid'
+
+
+class Command(BaseCommand):
+    """Compare the admin's default icontains search with accounts.search."""
+
+    help = ('Benchmark CustomUserAdmin and UserAddressAdmin search on '
+            'synthetic users: the default ModelAdmin search against the '
+            'trigram search with exact-match short-circuits. All '
+            'generated rows are rolled back.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help='Numbers of users to benchmark with.')
+        parser.add_argument(
+            '--queries', type=int, default=20,
+            help='Queries per case.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk_create batch when seeding.')
+        parser.add_argument(
+            '--seed', type=int, default=42, help='Random seed.')
+
+    def handle(self, *args, **options):
+        """Run the benchmark for every requested size.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        rng = random.Random(options['seed'])
+        self.request = RequestFactory().get('/admin/')
+        self.stdout.write(f'Backend: {connection.vendor}')
+        for size in sorted(options['sizes']):
+            with transaction.atomic():
+                self._seed(size, options['batch_size'], rng)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+                self._run(size, self._queries(size, options['queries'], rng))
+                transaction.set_rollback(True)
+
+    def _seed(self, size, batch_size, rng):
+        """Insert synthetic users with one address each.
+
+        Args:
+            size (int): Number of users.
+            batch_size (int): Rows per INSERT batch.
+            rng (Random): Random generator.
+        """
+        started = time.perf_counter()
+        for offset in range(0, size, batch_size):
+            users = User.objects.bulk_create([
+                self._user(offset + i, rng)
+                for i in range(min(batch_size, size - offset))
+            ])
+            UserAddress.objects.bulk_create([
+                UserAddress(
+                    user=user, postal_code=f'{rng.randint(0, 99999):05d}',
+                    country=rng.choice(COUNTRIES), city=rng.choice(CITIES),
+                    street=f'{rng.choice(LAST_NAMES).title()} St, '
+                           f'{rng.randint(1, 200)}')
+                for user in users
+            ])
+        self.stdout.write(
+            f'\n{size} users seeded in '
+            f'{time.perf_counter() - started:.1f}s')
+
+    @staticmethod
+    def _user(index, rng):
+        """Build one unsaved synthetic user.
+
+        Args:
+            index (int): Sequence number, keeps unique fields unique.
+            rng (Random): Random generator.
+
+        Returns:
+            User: The user.
+        """
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return User(
+            email=f'{first}.{last}.{index}@{DOMAIN}',
+            phone_number=f'+1{index:010d}',
+            username=f'bench-user-search-{index}',
+            first_name=first.title(), last_name=last.title(),
+            password='!',
+        )
+
+    @staticmethod
+    def _queries(size, count, rng):
+        """Draw the queries of every case.
+
+        Args:
+            size (int): Number of seeded users.
+            count (int): Queries per case.
+            rng (Random): Random generator.
+
+        Returns:
+            dict: Query strings by case name.
+        """
+        indexes = [rng.randrange(size) for _ in range(count)]
+        user = User.objects.filter(
+            email__endswith=f'@{DOMAIN}').order_by('pk')
+        emails = [user[index].email for index in indexes[:5]]
+        return {
+            'exact email': [emails[i % len(emails)] for i in range(count)],
+            'exact phone': [f'+1{index:010d}' for index in indexes],
+            'email fragment': [f'.{index}@' for index in indexes],
+            'last name': [rng.choice(LAST_NAMES)[:6] for _ in indexes],
+            'city': [rng.choice(CITIES)[:4] for _ in indexes],
+        }
+
+    def _run(self, size, queries):
+        """Time both searches the way a changelist uses them.
+
+        The changelist counts the matches and fetches the first page.
+
+        Args:
+            size (int): Number of seeded users, for the report.
+            queries (dict): Query strings by case name.
+        """
+        user_admin = admin.site._registry[User]
+        address_admin = admin.site._registry[UserAddress]
+        for case, terms in queries.items():
+            model_admin = address_admin if case == 'city' else user_admin
+            queryset = model_admin.model._default_manager.order_by('-pk')
+            searches = {
+                'default': admin.ModelAdmin.get_search_results,
+                'trigram': type(model_admin).get_search_results,
+            }
+            for label, get_search_results in searches.items():
+                samples = []
+                for term in terms:
+                    with timed(samples):
+                        results, _ = get_search_results(
+                            model_admin, self.request, queryset, term)
+                        results.count()
+                        list(results[:model_admin.list_per_page])
+                self.stdout.write(format_summary(
+                    f'{case} / {label} @ {size}', summarize(samples)))
@@ -0,0 +1,55 @@
+"""Create the monthly partitions of the payments table ahead of time."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from accounts.models import UserPayment
+from accounts.partitioning import (add_months, ensure_partitions,
+                                   is_partitioned, month_start)
+
+
+class Command(BaseCommand):
+    """Add missing monthly partitions up to a number of months ahead.
+
+    Meant to run regularly (e.g. daily from cron), so new payments never
+    land in the default partition.
+    """
+
+    help = ('Create the monthly partitions of the payments table from the '
+            'current month to --months-ahead months from now.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Future months to create partitions for.')
+
+    def handle(self, *args, **options):
+        """Create the missing partitions.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+
+        Raises:
+            CommandError: If the payments table is not partitioned.
+        """
+        using = router.db_for_write(UserPayment)
+        connection = connections[using]
+        table = UserPayment._meta.db_table
+        if not is_partitioned(connection, table):
+            raise CommandError(
+                f'{table} is not partitioned; run partition_payments '
+                f'first.')
+        current = month_start(timezone.localdate())
+        with transaction.atomic(using=using):
+            created = ensure_partitions(
+                connection, table, current,
+                add_months(current, options['months_ahead']))
+        for month in created:
+            self.stdout.write(f'Created partition for {month:%Y-%m}.')
+        self.stdout.write(f'{len(created)} partitions created.')
@@ -0,0 +1,81 @@
+"""Render the thumbnails of existing profile pictures."""
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from accounts import thumbnails
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    """Render missing profile picture thumbnails on the worker pool.
+
+    New uploads get their thumbnails automatically; this fills them in
+    for pictures uploaded before, or after THUMBNAIL_WIDTHS changed.
+    """
+
+    help = ('Render the thumbnails of profile pictures that have none, or '
+            'of every picture with --all.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Also check users whose thumbnails were rendered; only '
+                 'missing variants are written.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Pictures submitted to the pool at a time.')
+
+    def handle(self, *args, **options):
+        """Render the thumbnails batch by batch.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        users = CustomUser.objects.exclude(profile_picture='').exclude(
+            profile_picture__isnull=True).only(
+            'pk', 'profile_picture', 'profile_picture_digest').order_by('pk')
+        if not options['all']:
+            users = users.filter(profile_picture_digest='')
+        rendered = failed = 0
+        batch = {}
+        for user in users.iterator(chunk_size=options['batch_size']):
+            future = thumbnails.submit(user)
+            if future is not None:
+                batch[future] = user
+            if len(batch) >= options['batch_size']:
+                done, failures = self._wait(batch)
+                rendered, failed = rendered + done, failed + failures
+                batch = {}
+        done, failures = self._wait(batch)
+        rendered, failed = rendered + done, failed + failures
+        self.stdout.write(
+            f'{rendered} pictures rendered, {failed} failed.')
+
+    def _wait(self, batch):
+        """Wait for a batch of renders and store their digests.
+
+        Args:
+            batch (dict): The users by pending render.
+
+        Returns:
+            tuple: Numbers of succeeded and failed renders.
+        """
+        wait(batch)
+        failed = 0
+        for future, user in batch.items():
+            if future.exception() is not None:
+                self.stderr.write(
+                    f'{user.profile_picture.name}: {future.exception()}')
+                failed += 1
+                continue
+            thumbnails.store_digest(
+                CustomUser, user.pk, user.profile_picture.name,
+                future.result())
+        return len(batch) - failed, failed
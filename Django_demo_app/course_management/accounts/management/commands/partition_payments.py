@@ -0,0 +1,64 @@
+"""Convert the payments table to or from monthly partitions."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from accounts.models import UserPayment
+from accounts.partitioning import (is_partitioned, partition_payments,
+                                   unpartition_payments)
+
+
+class Command(BaseCommand):
+    """Partition the payments table by month, or undo it with --revert.
+
+    The table is rewritten in one transaction that locks it, so run the
+    command in a maintenance window. It can run at any time after
+    migrating; afterwards, run create_payment_partitions regularly.
+    """
+
+    help = ('Convert the payments table into monthly partitions on '
+            'PostgreSQL, or back into a plain table with --revert.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Future months to create partitions for.')
+        parser.add_argument(
+            '--revert', action='store_true',
+            help='Convert the partitioned table back into a plain table; '
+                 'rows of detached partitions are not restored.')
+
+    def handle(self, *args, **options):
+        """Convert the table.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+
+        Raises:
+            CommandError: If the database is not PostgreSQL.
+        """
+        using = router.db_for_write(UserPayment)
+        connection = connections[using]
+        table = UserPayment._meta.db_table
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL.')
+        if options['revert']:
+            if not is_partitioned(connection, table):
+                self.stdout.write(f'{table} is not partitioned.')
+                return
+            with connection.schema_editor(atomic=True) as editor:
+                unpartition_payments(editor, UserPayment)
+            self.stdout.write(f'{table} is a plain table again.')
+            return
+        if is_partitioned(connection, table):
+            self.stdout.write(f'{table} is already partitioned.')
+            return
+        with connection.schema_editor(atomic=True) as editor:
+            partition_payments(
+                editor, UserPayment, months_ahead=options['months_ahead'])
+        self.stdout.write(f'{table} is partitioned by month.')
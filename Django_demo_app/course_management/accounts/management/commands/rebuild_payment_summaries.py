@@ -0,0 +1,90 @@
+"""Rebuild or reconcile the UserPaymentSummary rows."""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.ledger import compute_summaries, summary_fields
+from accounts.models import UserPaymentSummary
+
+User = get_user_model()
+
+SUMMARY_FIELDS = ['total', 'count', 'last_payment_date', 'by_method']
+
+
+class Command(BaseCommand):
+    """Recompute payment summaries and fix the ones that drifted."""
+
+    help = ('Compare UserPaymentSummary rows with the UserPayment rows and '
+            'create or repair summaries, walking users in primary-key '
+            'batches.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Users checked per batch and per transaction.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report mismatches without fixing them.')
+
+    def handle(self, *args, **options):
+        """Walk all users in batches and repair their summaries.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = created = repaired = 0
+        while True:
+            with transaction.atomic():
+                user_ids = list(
+                    User.objects
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if not user_ids:
+                    break
+                last_pk = user_ids[-1]
+                # Lock the stored summaries first, so payments saved
+                # meanwhile wait instead of being overwritten.
+                stored = {
+                    summary.user_id: summary
+                    for summary in UserPaymentSummary.objects
+                    .select_for_update()
+                    .filter(user_id__in=user_ids)
+                }
+                actual = compute_summaries(user_ids)
+                missing, drifted = [], []
+                for user_id in user_ids:
+                    expected = actual.get(user_id) or UserPaymentSummary(
+                        user_id=user_id, total=0, count=0, by_method={})
+                    summary = stored.get(user_id)
+                    if summary is None:
+                        if expected.count:
+                            missing.append(expected)
+                    elif summary_fields(summary) != summary_fields(expected):
+                        self.stdout.write(
+                            f'User {user_id}: {summary.total} '
+                            f'({summary.count}) -> {expected.total} '
+                            f'({expected.count})')
+                        drifted.append(expected)
+                if not options['dry_run']:
+                    UserPaymentSummary.objects.bulk_create(
+                        missing, ignore_conflicts=True)
+                    UserPaymentSummary.objects.bulk_update(
+                        drifted, SUMMARY_FIELDS)
+                checked += len(user_ids)
+                created += len(missing)
+                repaired += len(drifted)
+
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(
+            f'{checked} users checked, {created} summaries missing, '
+            f'{repaired} summaries {action}.')
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_useraddress_userpayment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Version'),
+        ),
+    ]
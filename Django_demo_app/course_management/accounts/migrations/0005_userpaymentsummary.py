@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:08
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def create_summaries(apps, schema_editor):
+    """Build the summaries of users who already have payments."""
+    UserPayment = apps.get_model('accounts', 'UserPayment')
+    UserPaymentSummary = apps.get_model('accounts', 'UserPaymentSummary')
+    using = schema_editor.connection.alias
+    rows = (
+        UserPayment.objects.using(using)
+        .values('user_id', 'payment_method')
+        .annotate(total=Sum('amount'), count=Count('id'),
+                  last=Max('payment_date'))
+        .order_by()
+    )
+    summaries = {}
+    for row in rows.iterator():
+        summary = summaries.setdefault(row['user_id'], UserPaymentSummary(
+            user_id=row['user_id'], total=0, count=0, by_method={}))
+        summary.total += row['total']
+        summary.count += row['count']
+        if (summary.last_payment_date is None
+                or row['last'] > summary.last_payment_date):
+            summary.last_payment_date = row['last']
+        summary.by_method[row['payment_method']] = {
+            'total': str(row['total'].quantize(Decimal('0.01'))),
+            'count': row['count'],
+        }
+    UserPaymentSummary.objects.using(using).bulk_create(
+        summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_customuser_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPaymentSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payment_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('last_payment_date', models.DateTimeField(blank=True, null=True, verbose_name='Last payment date')),
+                ('by_method', models.JSONField(blank=True, default=dict, verbose_name='Totals by method')),
+            ],
+            options={
+                'verbose_name': 'User Payment Summary',
+                'verbose_name_plural': 'User Payment Summaries',
+            },
+        ),
+        migrations.RunPython(create_summaries, migrations.RunPython.noop),
+    ]
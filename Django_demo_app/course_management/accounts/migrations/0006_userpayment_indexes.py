@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userpaymentsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpayment',
+            index=models.Index(fields=['payment_date', 'payment_method'], name='payment_date_method_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpayment',
+            index=models.Index(fields=['user', 'payment_date'], name='payment_user_date_idx'),
+        ),
+    ]
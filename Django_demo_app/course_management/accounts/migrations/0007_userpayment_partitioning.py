@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:20
+
+from django.db import migrations
+
+from accounts.partitioning import unpartition_payments
+
+
+def unpartition(apps, schema_editor):
+    # The table is partitioned by the partition_payments command, not by
+    # this migration; migrating back past it restores the plain table.
+    unpartition_payments(
+        schema_editor, apps.get_model('accounts', 'UserPayment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_userpayment_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, unpartition),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:30
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from accounts.search import install_trigram_indexes, uninstall_trigram_indexes
+
+
+def create_trigram_indexes(apps, schema_editor):
+    install_trigram_indexes(schema_editor)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    uninstall_trigram_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_userpayment_partitioning'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_digest',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Profile picture digest'),
+        ),
+    ]
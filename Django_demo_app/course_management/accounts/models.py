@@ -1,7 +1,7 @@
 """This file is used to create custom user model."""
 from django.contrib.auth.models import (AbstractUser, BaseUserManager,
                                         PermissionsMixin)
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 
 
@@ -87,6 +87,9 @@ class CustomUser(AbstractUser, PermissionsMixin):
     profile_picture = models.ImageField(
         upload_to='profile_pictures/', null=True, blank=True,
         verbose_name='Profile picture')
+    profile_picture_digest = models.CharField(
+        max_length=64, blank=True, default='', editable=False,
+        verbose_name='Profile picture digest')
     date_joined = models.DateTimeField(
         default=timezone.now, verbose_name='Date joined')
     is_active = models.BooleanField(default=True, verbose_name='Active')
@@ -96,6 +99,8 @@ class CustomUser(AbstractUser, PermissionsMixin):
             ('en', 'English'),
             ('uk', 'Ukrainian'),
         ], default='en', verbose_name='Preferred language')
+    version = models.PositiveIntegerField(
+        default=1, editable=False, verbose_name='Version')
 
     objects = CustomUserManager()
 
@@ -120,6 +125,36 @@ class CustomUser(AbstractUser, PermissionsMixin):
         """
         return self.email
 
+    def save(self, *args, **kwargs):
+        """Save the user, bumping its version on every real change.
+
+        Tokens in claims mode carry the version, so bumping it invalidates
+        them. Saves that only touch ``last_login`` (made on every login)
+        keep the version. The bump is done by the database, so concurrent
+        saves never reuse a version, and read back afterwards.
+
+        Args:
+            args: Positional arguments for Model.save.
+            kwargs: Keyword arguments for Model.save.
+        """
+        update_fields = kwargs.get('update_fields')
+        bump = not self._state.adding and not (
+            update_fields is not None
+            and set(update_fields) <= {'last_login'})
+        if not bump:
+            super().save(*args, **kwargs)
+            return
+        previous = self.version
+        self.version = models.F('version') + 1
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = previous
+            raise
+        self.refresh_from_db(fields=['version'])
+
     @property
     def full_name(self):
         """Return the full name of the user.
@@ -155,8 +190,45 @@ class UserAddress(models.Model):
         return f'{self.country}, {self.city}, {self.street}'
 
 
+class UserPaymentQuerySet(models.QuerySet):
+    """Payments that keep their users' summaries in step when deleted."""
+
+    def delete(self):
+        """Delete the payments and rebuild their users' summaries.
+
+        Deleting a backdated payment also invalidates the cached revenue
+        report periods once committed.
+
+        Returns:
+            tuple: The number of deleted objects and the count per model.
+        """
+        from .ledger import rebuild_summaries
+        from .reporting import bump_report_version, is_closed
+
+        using = self._db or router.db_for_write(self.model)
+        payments = self.using(using).order_by()
+        with transaction.atomic(using=using):
+            user_ids = sorted(
+                payments.values_list('user_id', flat=True).distinct())
+            oldest = payments.aggregate(
+                oldest=models.Min('payment_date'))['oldest']
+            result = super().delete()
+            rebuild_summaries(user_ids, using=using)
+            if oldest is not None and is_closed(oldest):
+                transaction.on_commit(bump_report_version, using=using)
+        return result
+
+
 class UserPayment(models.Model):
-    """Model to store user payment information."""
+    """Model to store user payment information.
+
+    Deletes update the payment summaries in ``delete`` methods rather than
+    in a ``post_delete`` receiver, which would stop Django from deleting
+    a user's payments in one query; the summary of a deleted user goes
+    with it anyway.
+    """
+
+    objects = UserPaymentQuerySet.as_manager()
 
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name='payments')
@@ -176,6 +248,14 @@ class UserPayment(models.Model):
 
         verbose_name = 'User Payment'
         verbose_name_plural = 'User Payments'
+        indexes = [
+            # Revenue reports and the admin date/method filters.
+            models.Index(fields=['payment_date', 'payment_method'],
+                         name='payment_date_method_idx'),
+            # A user's payments in date order.
+            models.Index(fields=['user', 'payment_date'],
+                         name='payment_user_date_idx'),
+        ]
 
     def __str__(self):
         """Return the string representation of the payment.
@@ -184,3 +264,77 @@ class UserPayment(models.Model):
             str: The string representation of the payment.
         """
         return f'{self.user} - {self.amount} ({self.payment_date})'
+
+    def save(self, *args, **kwargs):
+        """Save the payment and update the user's summary atomically.
+
+        The summary is updated by signal handlers in accounts.signals;
+        the transaction makes the payment and its summary commit together.
+
+        Args:
+            args: Positional arguments for Model.save.
+            kwargs: Keyword arguments for Model.save.
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self))
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        """Delete the payment and take it out of its user's summary.
+
+        Deleting a backdated payment also invalidates the cached revenue
+        report periods once committed.
+
+        Args:
+            using (str): The database alias.
+            keep_parents (bool): Keep the parent model data.
+
+        Returns:
+            tuple: The number of deleted objects and the count per model.
+        """
+        from .ledger import remove_payment
+        from .reporting import bump_report_version, is_closed
+
+        using = using or router.db_for_write(type(self))
+        with transaction.atomic(using=using):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            remove_payment(self, using=using)
+            if is_closed(self.payment_date):
+                transaction.on_commit(bump_report_version, using=using)
+        return result
+
+
+class UserPaymentSummary(models.Model):
+    """Running totals of a user's payments.
+
+    Maintained by accounts.ledger on every payment save and delete,
+    including ``QuerySet.delete``; ``bulk_create`` and ``QuerySet.update``
+    on payments bypass it, and the ``rebuild_payment_summaries`` command
+    repairs the drift.
+    """
+
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True,
+        related_name='payment_summary')
+    total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name='Total')
+    count = models.PositiveIntegerField(default=0, verbose_name='Count')
+    last_payment_date = models.DateTimeField(
+        null=True, blank=True, verbose_name='Last payment date')
+    # {method: {'total': '12.50', 'count': 2}} for methods with payments.
+    by_method = models.JSONField(
+        default=dict, blank=True, verbose_name='Totals by method')
+
+    class Meta:
+        """Meta options for the UserPaymentSummary model."""
+
+        verbose_name = 'User Payment Summary'
+        verbose_name_plural = 'User Payment Summaries'
+
+    def __str__(self):
+        """Return the string representation of the summary.
+
+        Returns:
+            str: The string representation of the summary.
+        """
+        return f'{self.user_id}: {self.total} ({self.count} payments)'
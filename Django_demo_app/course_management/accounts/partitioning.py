@@ -0,0 +1,332 @@
+"""Monthly range partitioning of the payments table on PostgreSQL.
+
+Payments are append-only and mostly read by date, so the table can be
+split into one partition per calendar month of ``payment_date``.
+PostgreSQL then skips the partitions outside the dates a query is
+bounded by, and old months can be detached and archived as whole tables
+instead of being deleted row by row.
+
+The layout is optional: the ``partition_payments`` command converts the
+table on PostgreSQL at any time after migrating, and converts it back
+with ``--revert``, as does migrating ``accounts`` back past 0007. Only
+rows in attached partitions survive the way back. A partitioned
+table needs the partition key in its primary key, so the key becomes
+``(id, payment_date)``, and ids come from a plain sequence because
+identity columns are not supported on partitioned tables before
+PostgreSQL 17. Rows outside every monthly partition land in a default
+partition; the ``create_payment_partitions`` command adds the coming
+months ahead of time, and ``archive_payment_partitions`` exports and
+drops old ones and takes their payments out of the summaries and
+revenue reports.
+"""
+import re
+from datetime import date, datetime
+
+from django.utils import timezone
+
+PARTITION_SUFFIX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def month_start(day):
+    """Return the first day of the month containing a date.
+
+    Args:
+        day (date): The date.
+
+    Returns:
+        date: The first day of its month.
+    """
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    """Shift the first day of a month by a number of months.
+
+    Args:
+        month (date): The first day of a month.
+        count (int): Months to add, may be negative.
+
+    Returns:
+        date: The first day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    """Return the name of a monthly partition.
+
+    Args:
+        table (str): The partitioned table.
+        month (date): The first day of the month.
+
+    Returns:
+        str: E.g. ``accounts_userpayment_p2025_03``.
+    """
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    """Return the name of the default partition.
+
+    Args:
+        table (str): The partitioned table.
+
+    Returns:
+        str: The default partition name.
+    """
+    return f'{table}_default'
+
+
+def month_bound(month):
+    """Return the aware datetime at which a month starts.
+
+    Args:
+        month (date): The first day of the month.
+
+    Returns:
+        datetime: Midnight of that day in the default time zone.
+    """
+    return timezone.make_aware(
+        datetime(month.year, month.month, 1),
+        timezone.get_default_timezone())
+
+
+def is_partitioned(connection, table):
+    """Tell whether a table is partitioned.
+
+    Args:
+        connection (DatabaseWrapper): The database connection.
+        table (str): The table name.
+
+    Returns:
+        bool: True for a partitioned PostgreSQL table.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = to_regclass(%s))', [table])
+        return cursor.fetchone()[0]
+
+
+def monthly_partitions(connection, table):
+    """List the monthly partitions attached to a table.
+
+    Args:
+        connection (DatabaseWrapper): The database connection.
+        table (str): The partitioned table.
+
+    Returns:
+        list: ``(month, partition name)`` pairs, oldest first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [table])
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match and name == partition_name(
+                table, date(int(match[1]), int(match[2]), 1)):
+            partitions.append(
+                (date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(connection, table, month, column='payment_date'):
+    """Create the partition of one month, if it does not exist.
+
+    Rows of that month already stored in the default partition are moved
+    into the new partition, which PostgreSQL requires before attaching.
+
+    Args:
+        connection (DatabaseWrapper): The database connection.
+        table (str): The partitioned table.
+        month (date): The first day of the month.
+        column (str): The partition key column.
+
+    Returns:
+        bool: True if the partition was created.
+    """
+    name = partition_name(table, month)
+    if name in {existing for _, existing in
+                monthly_partitions(connection, table)}:
+        return False
+    quote = connection.ops.quote_name
+    bounds = [month_bound(month), month_bound(add_months(month, 1))]
+    default = default_partition_name(table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} '
+            f'(LIKE {quote(table)} INCLUDING DEFAULTS)')
+        cursor.execute(
+            'SELECT to_regclass(%s) IS NOT NULL', [default])
+        if cursor.fetchone()[0]:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {quote(default)} '
+                f'WHERE {quote(column)} >= %s AND {quote(column)} < %s '
+                f'RETURNING *) '
+                f'INSERT INTO {quote(name)} SELECT * FROM moved', bounds)
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} '
+            f'FOR VALUES FROM (%s) TO (%s)', bounds)
+    return True
+
+
+def ensure_partitions(connection, table, first, last):
+    """Create the monthly partitions of a range of months.
+
+    Args:
+        connection (DatabaseWrapper): The database connection.
+        table (str): The partitioned table.
+        first (date): The first day of the first month.
+        last (date): The first day of the last month.
+
+    Returns:
+        list: The months whose partitions were created.
+    """
+    created = []
+    month = first
+    while month <= last:
+        if create_partition(connection, table, month):
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def partition_payments(schema_editor, model, months_ahead=3):
+    """Convert the payments table into a partitioned table.
+
+    The rows are copied into a new table partitioned by month of
+    ``payment_date``, with one partition per month from the oldest
+    payment to ``months_ahead`` months from now plus a default partition.
+    Does nothing on other backends or if the table is already
+    partitioned.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+        model (type): The (historical) UserPayment model.
+        months_ahead (int): Future months to create partitions for.
+    """
+    connection = schema_editor.connection
+    table = model._meta.db_table
+    if connection.vendor != 'postgresql' or is_partitioned(
+            connection, table):
+        return
+    quote = schema_editor.quote_name
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+    pk_column = model._meta.pk.column
+    key_column = model._meta.get_field('payment_date').column
+    fields = model._meta.local_concrete_fields
+    columns = ', '.join(quote(field.column) for field in fields)
+
+    schema_editor.execute(
+        f'ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}')
+    # Index names are global, so the old primary key index must make way.
+    schema_editor.execute(
+        f'ALTER TABLE {quote(legacy)} RENAME CONSTRAINT '
+        f'{quote(table + "_pkey")} TO {quote(legacy + "_pkey")}')
+
+    definitions = [
+        f'{quote(field.column)} {field.db_type(connection)} '
+        f'{"NULL" if field.null else "NOT NULL"}'
+        for field in fields
+    ]
+    schema_editor.execute(
+        f'CREATE TABLE {quote(table)} ({", ".join(definitions)}, '
+        f'CONSTRAINT {quote(table + "_pkey")} '
+        f'PRIMARY KEY ({quote(pk_column)}, {quote(key_column)})) '
+        f'PARTITION BY RANGE ({quote(key_column)})')
+    for field in fields:
+        if field.remote_field is not None:
+            target = field.target_field
+            schema_editor.execute(
+                f'ALTER TABLE {quote(table)} ADD CONSTRAINT '
+                f'{quote(f"{table}_{field.column}_fk")} '
+                f'FOREIGN KEY ({quote(field.column)}) REFERENCES '
+                f'{quote(target.model._meta.db_table)} '
+                f'({quote(target.column)}) DEFERRABLE INITIALLY DEFERRED')
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT MIN({quote(key_column)}) FROM {quote(legacy)}')
+        oldest = cursor.fetchone()[0]
+    current = month_start(timezone.localdate())
+    first = month_start(timezone.localdate(oldest)) if oldest else current
+    ensure_partitions(
+        connection, table, min(first, current),
+        add_months(current, months_ahead))
+    default = default_partition_name(table)
+    schema_editor.execute(
+        f'CREATE TABLE {quote(default)} PARTITION OF {quote(table)} DEFAULT')
+
+    schema_editor.execute(
+        f'INSERT INTO {quote(table)} ({columns}) '
+        f'SELECT {columns} FROM {quote(legacy)}')
+    schema_editor.execute(f'DROP TABLE {quote(legacy)}')
+
+    schema_editor.execute(
+        f'CREATE SEQUENCE {quote(sequence)} '
+        f'OWNED BY {quote(table)}.{quote(pk_column)}')
+    schema_editor.execute(
+        f'SELECT setval(%s, COALESCE(MAX({quote(pk_column)}), 0) + 1, '
+        f'false) FROM {quote(table)}', [sequence])
+    schema_editor.execute(
+        f'ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk_column)} '
+        f'SET DEFAULT nextval(%s::regclass)', [sequence])
+    # Indexes on a partitioned table cascade to all its partitions. The
+    # plain foreign key index on the user is not recreated, as the
+    # ``(user, payment_date)`` index leads with it.
+    for index in model._meta.indexes:
+        schema_editor.execute(index.create_sql(model, schema_editor))
+
+
+def unpartition_payments(schema_editor, model):
+    """Convert the partitioned payments table back into a plain table.
+
+    Only rows in attached partitions are kept; detached partitions stay
+    as standalone tables.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+        model (type): The (historical) UserPayment model.
+    """
+    connection = schema_editor.connection
+    table = model._meta.db_table
+    if not is_partitioned(connection, table):
+        return
+    quote = schema_editor.quote_name
+    legacy = f'{table}_legacy'
+    pk_column = model._meta.pk.column
+    columns = ', '.join(
+        quote(field.column) for field in model._meta.local_concrete_fields)
+
+    schema_editor.execute(
+        f'ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}')
+    schema_editor.execute(
+        f'ALTER TABLE {quote(legacy)} RENAME CONSTRAINT '
+        f'{quote(table + "_pkey")} TO {quote(legacy + "_pkey")}')
+    schema_editor.execute(
+        f'ALTER SEQUENCE {quote(table + "_id_seq")} '
+        f'RENAME TO {quote(legacy + "_id_seq")}')
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, legacy)
+    for name, info in constraints.items():
+        if info['index'] and not info['primary_key']:
+            schema_editor.execute(f'DROP INDEX {quote(name)}')
+
+    schema_editor.create_model(model)
+    schema_editor.execute(
+        f'INSERT INTO {quote(table)} ({columns}) '
+        f'SELECT {columns} FROM {quote(legacy)}')
+    schema_editor.execute(f'DROP TABLE {quote(legacy)}')
+    schema_editor.execute(
+        f'SELECT setval(pg_get_serial_sequence(%s, %s), '
+        f'COALESCE(MAX({quote(pk_column)}), 0) + 1, false) '
+        f'FROM {quote(table)}', [table, pk_column])
@@ -0,0 +1,225 @@
+"""Revenue reports over time buckets of the payment history.
+
+Payments are summed per period (day, ISO week or month, in the current
+time zone) and per payment method in the database. The rows of closed
+periods, those that ended before today, do not change any more, so each
+is cached on its own and later reports only query the periods they miss.
+Backdated payment changes bump a version embedded in the cache keys,
+which drops every cached period at once.
+"""
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import UserPayment
+
+REPORT_VERSION_KEY = 'payments:report:version'
+REPORT_TIMEOUT = getattr(settings, 'REVENUE_REPORT_CACHE_TIMEOUT', 604800)
+
+BUCKETS = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def period_start(day, bucket):
+    """Return the first day of the period containing a date.
+
+    Args:
+        day (date): The date.
+        bucket (str): 'day', 'week' or 'month'.
+
+    Returns:
+        date: The start of the period.
+    """
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, bucket):
+    """Return the start of the period after the given one.
+
+    Args:
+        start (date): The start of a period.
+        bucket (str): 'day', 'week' or 'month'.
+
+    Returns:
+        date: The start of the next period.
+    """
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        if start.month == 12:
+            return date(start.year + 1, 1, 1)
+        return date(start.year, start.month + 1, 1)
+    return start + timedelta(days=1)
+
+
+def periods(start, end, bucket):
+    """List the periods covering a date range.
+
+    Args:
+        start (date): First day of the range.
+        end (date): Day after the range.
+        bucket (str): 'day', 'week' or 'month'.
+
+    Returns:
+        list: Start dates of the periods, the first one containing
+        ``start`` and the last one containing the day before ``end``.
+    """
+    result = []
+    current = period_start(start, bucket)
+    while current < end:
+        result.append(current)
+        current = next_period(current, bucket)
+    return result
+
+
+def get_report_version():
+    """Return the version embedded in report cache keys.
+
+    Returns:
+        int: The current version.
+    """
+    version = cache.get(REPORT_VERSION_KEY)
+    if version is None:
+        cache.add(REPORT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(REPORT_VERSION_KEY)
+    return version
+
+
+def bump_report_version():
+    """Invalidate every cached report period.
+
+    Returns:
+        int: The new version.
+    """
+    try:
+        return cache.incr(REPORT_VERSION_KEY)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(REPORT_VERSION_KEY, version, None)
+        return version
+
+
+def is_closed(payment_date):
+    """Tell whether a payment falls in a day that has already ended.
+
+    Args:
+        payment_date (datetime): The payment date.
+
+    Returns:
+        bool: True if the payment is dated before today.
+    """
+    return timezone.localdate(payment_date) < timezone.localdate()
+
+
+def revenue_report(start, end, bucket='day', payment_method=None):
+    """Sum payments per period and payment method.
+
+    Args:
+        start (date): First day of the report.
+        end (date): Day after the report.
+        bucket (str): 'day', 'week' or 'month'.
+        payment_method (str): Only report this method, if given.
+
+    Raises:
+        ValueError: If the bucket is unknown.
+
+    Returns:
+        list: One dict per period with its ``period`` start date, the
+        ``total`` and ``count`` of payments and their ``by_method``
+        breakdown, oldest period first. Periods are whole, so the first
+        and last may extend beyond the range.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f'Unknown bucket {bucket!r}.')
+    starts = periods(start, end, bucket)
+    current = period_start(timezone.localdate(), bucket)
+    version = get_report_version()
+    keys = {
+        period: f'payments:report:v{version}:{bucket}:{period.isoformat()}'
+        for period in starts if period < current
+    }
+    rows = {}
+    cached = cache.get_many(keys.values())
+    for period, key in keys.items():
+        if key in cached:
+            rows[period] = cached[key]
+    missing = [period for period in starts if period not in rows]
+    if missing:
+        fetched = _aggregate(
+            missing[0], next_period(missing[-1], bucket), bucket)
+        for period in missing:
+            rows[period] = fetched.get(period, {})
+        cache.set_many(
+            {keys[period]: rows[period]
+             for period in missing if period in keys},
+            REPORT_TIMEOUT)
+
+    report = []
+    for period in starts:
+        by_method = {
+            method: entry for method, entry in rows[period].items()
+            if payment_method is None or method == payment_method
+        }
+        report.append({
+            'period': period,
+            'total': sum(
+                (entry['total'] for entry in by_method.values()),
+                Decimal('0.00')),
+            'count': sum(entry['count'] for entry in by_method.values()),
+            'by_method': by_method,
+        })
+    return report
+
+
+def _aggregate(start, end, bucket):
+    """Sum the payments of a range per period and method in the database.
+
+    Args:
+        start (date): First day of the range.
+        end (date): Day after the range.
+        bucket (str): 'day', 'week' or 'month'.
+
+    Returns:
+        dict: ``{period: {method: {'total': Decimal, 'count': int}}}``
+        for the periods with payments.
+    """
+    rows = (
+        UserPayment.objects
+        .filter(payment_date__gte=_start_of(start),
+                payment_date__lt=_start_of(end))
+        .annotate(period=BUCKETS[bucket](
+            'payment_date', output_field=DateField()))
+        .values('period', 'payment_method')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    result = {}
+    for row in rows:
+        result.setdefault(row['period'], {})[row['payment_method']] = {
+            'total': row['total'], 'count': row['count']}
+    return result
+
+
+def _start_of(day):
+    """Return the aware datetime at which a day starts.
+
+    Args:
+        day (date): The day.
+
+    Returns:
+        datetime: Midnight of the day in the current time zone.
+    """
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
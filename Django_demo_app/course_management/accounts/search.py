@@ -0,0 +1,173 @@
+"""Admin search over users and their addresses.
+
+Django compiles ``icontains`` to ``UPPER(col::text) LIKE UPPER('%term%')``
+on PostgreSQL. The ``pg_trgm`` GIN indexes created here are built on
+exactly those expressions, so the admin's substring searches become
+bitmap index scans instead of full table scans. Other backends keep
+scanning.
+
+Queries that look like a complete email address or phone number are
+tried as exact matches first, and only fall back to substring search if
+nothing matches. Search fields on related models are matched through a
+subquery of the related table, which its own indexes can serve, rather
+than by joining every row.
+"""
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
+
+TRIGRAM_INDEXES = {
+    'accounts_customuser': (
+        'email', 'phone_number', 'first_name', 'last_name'),
+    'accounts_useraddress': ('country', 'city'),
+}
+
+EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+PHONE_RE = re.compile(r'\+?\d{6,15}')
+PHONE_SEPARATORS_RE = re.compile(r'[\s().-]')
+
+
+def trigram_index_name(table, column):
+    """Return the name of a trigram index.
+
+    Args:
+        table (str): The indexed table.
+        column (str): The indexed column.
+
+    Returns:
+        str: The index name.
+    """
+    return f'{table}_{column}_trgm'
+
+
+def install_trigram_indexes(schema_editor):
+    """Create the trigram indexes of the admin search fields.
+
+    Only PostgreSQL is indexed, and the ``pg_trgm`` extension must exist.
+    Safe to run repeatedly; used by migrations.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, columns in TRIGRAM_INDEXES.items():
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS '
+                f'{quote(trigram_index_name(table, column))} '
+                f'ON {quote(table)} '
+                f'USING GIN ((UPPER({quote(column)}::text)) gin_trgm_ops)')
+
+
+def uninstall_trigram_indexes(schema_editor):
+    """Drop the trigram indexes.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, columns in TRIGRAM_INDEXES.items():
+        for column in columns:
+            schema_editor.execute(
+                f'DROP INDEX IF EXISTS '
+                f'{quote(trigram_index_name(table, column))}')
+
+
+def search_terms(query):
+    """Split a search string into terms the way the admin does.
+
+    Args:
+        query (str): The search string.
+
+    Returns:
+        list: The terms; quoted phrases are kept together.
+    """
+    terms = []
+    for bit in smart_split(query):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            terms.append(bit)
+    return terms
+
+
+def exact_user_filter(query, prefix=''):
+    """Build an exact lookup for a query that is an email or phone number.
+
+    Args:
+        query (str): The search string.
+        prefix (str): Path from the searched model to the user, e.g.
+            ``'user__'``.
+
+    Returns:
+        Q: The exact lookup, or None if the query is neither.
+    """
+    query = query.strip()
+    if EMAIL_RE.fullmatch(query):
+        return Q(**{f'{prefix}email__iexact': query})
+    phone = PHONE_SEPARATORS_RE.sub('', query)
+    if PHONE_RE.fullmatch(phone):
+        return Q(**{f'{prefix}phone_number': phone})
+    return None
+
+
+def term_filter(model, term, fields):
+    """Match one term as a substring of any of the fields.
+
+    Args:
+        model (type): The searched model.
+        term (str): The search term.
+        fields (tuple): Field names, or ``relation__field`` paths one
+            level deep.
+
+    Returns:
+        Q: The OR of the field matches.
+    """
+    conditions = []
+    for field in fields:
+        relation, _, column = field.partition('__')
+        if not column:
+            conditions.append(Q(**{f'{field}__icontains': term}))
+            continue
+        related = model._meta.get_field(relation).related_model
+        matches = related._default_manager.filter(
+            **{f'{column}__icontains': term}).values('pk')
+        conditions.append(Q(**{f'{relation}__in': matches}))
+    return reduce(or_, conditions)
+
+
+def search(queryset, query, fields, user_prefix=None):
+    """Search a queryset like the admin, with indexed and exact paths.
+
+    Every term must match one of the fields. If ``user_prefix`` is given
+    and the query is an email or phone number, exact matches of the user
+    are returned when there are any.
+
+    Args:
+        queryset (QuerySet): The queryset to search.
+        query (str): The search string.
+        fields (tuple): Field names to search, see ``term_filter``.
+        user_prefix (str): Path to the user for exact matches, '' for the
+            user model itself; None disables exact matching.
+
+    Returns:
+        QuerySet: The matching rows, without duplicates.
+    """
+    terms = search_terms(query)
+    if not terms or not fields:
+        return queryset
+    if user_prefix is not None:
+        exact = exact_user_filter(query, user_prefix)
+        if exact is not None:
+            matches = queryset.filter(exact)
+            if matches.exists():
+                return matches
+    return queryset.filter(reduce(and_, (
+        term_filter(queryset.model, term, fields) for term in terms)))
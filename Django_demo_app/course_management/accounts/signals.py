@@ -0,0 +1,123 @@
+"""Signals and signal handlers for the accounts app."""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import ledger, thumbnails
+from .models import CustomUser, UserPayment
+from .reporting import bump_report_version, is_closed
+
+# Sent with the ``user_ids`` of users changed by ``QuerySet.update``, which
+# sends no post_save, once the change is committed. Caches of users
+# listen to it.
+users_updated = Signal()
+
+
+@receiver(pre_save, sender=UserPayment)
+def remember_previous_payment(sender, instance, raw=False, using=None,
+                              **kwargs):
+    """Read the stored state of a payment that is about to be updated.
+
+    The in-memory instance may be stale, so the row is read (and locked)
+    inside the save's transaction.
+
+    Args:
+        sender (type): The UserPayment model.
+        instance (UserPayment): The payment being saved.
+        raw (bool): Whether the payment is loaded from a fixture.
+        using (str): The database alias.
+        kwargs: Signal arguments.
+    """
+    instance._previous_state = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    previous = (
+        UserPayment.objects.using(using)
+        .select_for_update()
+        .filter(pk=instance.pk)
+        .first()
+    )
+    if previous is not None:
+        instance._previous_state = ledger.payment_state(previous)
+
+
+@receiver(post_save, sender=UserPayment)
+def record_saved_payment(sender, instance, raw=False, using=None, **kwargs):
+    """Apply a created or changed payment to its user's summary.
+
+    Backdated changes also invalidate the cached revenue report periods
+    once committed.
+
+    Args:
+        sender (type): The UserPayment model.
+        instance (UserPayment): The saved payment.
+        raw (bool): Whether the payment is loaded from a fixture.
+        using (str): The database alias.
+        kwargs: Signal arguments.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    ledger.record_payment(instance, previous, using=using)
+    if is_closed(instance.payment_date) or (
+            previous is not None and is_closed(previous[3])):
+        transaction.on_commit(bump_report_version, using=using)
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_picture(sender, instance, raw=False, using=None,
+                              update_fields=None, **kwargs):
+    """Note whether a saved user gets a different profile picture.
+
+    Args:
+        sender (type): The CustomUser model.
+        instance (CustomUser): The user being saved.
+        raw (bool): Whether the user is loaded from a fixture.
+        using (str): The database alias.
+        update_fields (frozenset): The fields being saved, if limited.
+        kwargs: Signal arguments.
+    """
+    instance._picture_changed = False
+    if raw or (update_fields is not None
+               and 'profile_picture' not in update_fields):
+        return
+    name = instance.profile_picture.name or ''
+    if instance._state.adding or instance.pk is None:
+        instance._picture_changed = bool(name)
+        return
+    previous = (
+        CustomUser.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list('profile_picture', flat=True)
+        .first()
+    )
+    instance._picture_changed = (previous or '') != name
+
+
+@receiver(post_save, sender=CustomUser)
+def render_picture_thumbnails(sender, instance, raw=False, using=None,
+                              **kwargs):
+    """Render the thumbnails of a new profile picture once committed.
+
+    The digest of the previous picture is cleared right away, so its
+    thumbnails are no longer shown.
+
+    Args:
+        sender (type): The CustomUser model.
+        instance (CustomUser): The saved user.
+        raw (bool): Whether the user is loaded from a fixture.
+        using (str): The database alias.
+        kwargs: Signal arguments.
+    """
+    if raw or not getattr(instance, '_picture_changed', False):
+        return
+    instance._picture_changed = False
+    if instance.profile_picture_digest:
+        instance.profile_picture_digest = ''
+        CustomUser.objects.using(using).filter(pk=instance.pk).update(
+            profile_picture_digest='')
+    if instance.profile_picture:
+        transaction.on_commit(
+            partial(thumbnails.schedule, instance), using=using)
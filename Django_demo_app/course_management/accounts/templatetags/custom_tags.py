@@ -2,6 +2,9 @@
 from datetime import datetime
 
 from django import template
+from django.utils.safestring import mark_safe
+
+from accounts.fragments import get_user_info
 
 register = template.Library()
 
@@ -41,3 +44,16 @@ def show_user_info(user):
         dict: The user info to display in the template.
     """
     return {'user': user}
+
+
+@register.simple_tag
+def cached_user_info(user):
+    """Render the info of an authenticated user, cached per user version.
+
+    Args:
+        user (User): The user to display info for.
+
+    Returns:
+        str: The rendered ``accounts/user_card.html`` fragment.
+    """
+    return mark_safe(get_user_info(user))
@@ -1,3 +1,864 @@
-from django.test import TestCase
+"""Tests for the accounts app."""
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import bulk, export, fragments, thumbnails
+from .ledger import compute_summaries, summary_fields
+from .models import (CustomUser, UserAddress, UserPayment,
+                     UserPaymentSummary)
+from .paginators import EstimatedCountPaginator
+from .partitioning import is_partitioned, month_start
+from .reporting import next_period, period_start, periods, revenue_report
+from .signals import users_updated
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Account pages stay within their declared query budgets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user shown on the pages."""
+        cls.user = CustomUser.objects.create_user(
+            email='user@example.com', phone_number='+380000000002',
+            username='user', password='password',
+            first_name='Test', last_name='User')
+
+    def setUp(self):
+        """Start from an empty cache and log the user in."""
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_user_info_page(self):
+        """The user info page renders within budget, cold and cached."""
+        for _ in range(2):
+            response = self.client.get(reverse('user_info_page'))
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'user@example.com')
+
+    def test_user_info_page_async(self):
+        """The async user info page renders within budget."""
+        response = self.client.get(reverse('async_user_info_page'))
+        self.assertEqual(response.status_code, 200)
+
+
+class LedgerTests(TestCase):
+    """Payment summaries follow every payment change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create two users to pay and move payments between."""
+        cls.alice, cls.bob = (
+            CustomUser.objects.create_user(
+                email=f'{name}@example.com',
+                phone_number=f'+38000000002{index}',
+                username=name, password='password')
+            for index, name in enumerate(('alice', 'bob')))
+        cls.now = timezone.now()
+
+    def pay(self, user, amount, method='card', days_ago=0):
+        """Record a payment.
+
+        Args:
+            user (CustomUser): The paying user.
+            amount (str): The amount.
+            method (str): The payment method.
+            days_ago (int): How long ago the payment was made.
+
+        Returns:
+            UserPayment: The saved payment.
+        """
+        return UserPayment.objects.create(
+            user=user, amount=Decimal(amount), payment_method=method,
+            payment_date=self.now - timedelta(days=days_ago))
+
+    def assertSummary(self, user, total, count, last=None):
+        """Check a stored summary against the totals and the payment rows.
+
+        Args:
+            user (CustomUser): The user.
+            total (str): The expected total.
+            count (int): The expected number of payments.
+            last (UserPayment): The expected latest payment.
+        """
+        summary = UserPaymentSummary.objects.get(user=user)
+        self.assertEqual(summary.total, Decimal(total))
+        self.assertEqual(summary.count, count)
+        self.assertEqual(summary.last_payment_date,
+                         last.payment_date if last else None)
+        actual = compute_summaries([user.pk]).get(user.pk)
+        if actual is not None:
+            self.assertEqual(summary_fields(summary), summary_fields(actual))
+        else:
+            self.assertEqual(summary.by_method, {})
+
+    def test_create_and_update(self):
+        """New and edited payments adjust totals and method breakdowns."""
+        latest = self.pay(self.alice, '10.00')
+        payment = self.pay(self.alice, '5.50', 'cash', days_ago=3)
+        self.assertSummary(self.alice, '15.50', 2, latest)
+        payment.amount = Decimal('7.25')
+        payment.payment_method = 'iban'
+        payment.save()
+        self.assertSummary(self.alice, '17.25', 2, latest)
+
+    def test_move(self):
+        """A payment moved to another user leaves one summary for the other."""
+        kept = self.pay(self.alice, '1.00', days_ago=2)
+        moved = self.pay(self.alice, '4.00')
+        moved.user = self.bob
+        moved.save()
+        self.assertSummary(self.alice, '1.00', 1, kept)
+        self.assertSummary(self.bob, '4.00', 1, moved)
+
+    def test_delete_latest(self):
+        """Deleting the latest payment moves the last payment date back."""
+        older = self.pay(self.alice, '3.00', days_ago=5)
+        self.pay(self.alice, '2.00').delete()
+        self.assertSummary(self.alice, '3.00', 1, older)
+        older.delete()
+        self.assertSummary(self.alice, '0.00', 0)
+
+    def test_queryset_delete(self):
+        """Bulk deletes rebuild the summaries of the affected users."""
+        kept = self.pay(self.alice, '8.00', days_ago=1)
+        self.pay(self.alice, '2.00', 'cash')
+        self.pay(self.bob, '6.00')
+        UserPayment.objects.filter(
+            payment_date__gte=self.now - timedelta(hours=1)).delete()
+        self.assertSummary(self.alice, '8.00', 1, kept)
+        self.assertSummary(self.bob, '0.00', 0)
+
+    def test_user_delete(self):
+        """Deleting a user removes their payments and summary."""
+        self.pay(self.bob, '6.00')
+        self.bob.delete()
+        self.assertFalse(UserPayment.objects.exists())
+        self.assertFalse(UserPaymentSummary.objects.exists())
+
+
+class RevenueReportTests(TestCase):
+    """Revenue is summed per period and method, closed periods cached."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Record payments in January and February 2025."""
+        cls.user = CustomUser.objects.create_user(
+            email='payer@example.com', phone_number='+380000000030',
+            username='payer', password='password')
+        for day, amount, method in (
+                (date(2025, 1, 5), '10.00', 'card'),
+                (date(2025, 1, 6), '20.00', 'card'),
+                (date(2025, 1, 6), '5.00', 'cash'),
+                (date(2025, 2, 1), '7.00', 'online')):
+            UserPayment.objects.create(
+                user=cls.user, amount=Decimal(amount), payment_method=method,
+                payment_date=timezone.make_aware(
+                    datetime.combine(day, datetime.min.time())
+                    + timedelta(hours=12)))
+
+    def setUp(self):
+        """Start without cached report periods."""
+        cache.clear()
+
+    def totals(self, report):
+        """Reduce a report to its periods, totals and counts.
+
+        Args:
+            report (list): The revenue report.
+
+        Returns:
+            list: ``(period, total, count)`` tuples.
+        """
+        return [(row['period'], row['total'], row['count'])
+                for row in report]
+
+    def test_periods(self):
+        """Periods start on the day, the ISO week or the month."""
+        day = date(2025, 1, 8)
+        self.assertEqual(period_start(day, 'week'), date(2025, 1, 6))
+        self.assertEqual(period_start(day, 'month'), date(2025, 1, 1))
+        self.assertEqual(next_period(date(2024, 12, 1), 'month'),
+                         date(2025, 1, 1))
+        self.assertEqual(
+            periods(date(2025, 1, 15), date(2025, 3, 1), 'month'),
+            [date(2025, 1, 1), date(2025, 2, 1)])
+        self.assertEqual(
+            periods(date(2025, 1, 1), date(2025, 1, 1), 'day'), [])
+
+    def test_buckets(self):
+        """Payments land in the day, week and month containing them."""
+        self.assertEqual(
+            self.totals(revenue_report(
+                date(2025, 1, 5), date(2025, 1, 8), 'day')),
+            [(date(2025, 1, 5), Decimal('10.00'), 1),
+             (date(2025, 1, 6), Decimal('25.00'), 2),
+             (date(2025, 1, 7), Decimal('0.00'), 0)])
+        self.assertEqual(
+            self.totals(revenue_report(
+                date(2025, 1, 1), date(2025, 1, 13), 'week')),
+            [(date(2024, 12, 30), Decimal('10.00'), 1),
+             (date(2025, 1, 6), Decimal('25.00'), 2)])
+        self.assertEqual(
+            self.totals(revenue_report(
+                date(2025, 1, 1), date(2025, 3, 1), 'month')),
+            [(date(2025, 1, 1), Decimal('35.00'), 3),
+             (date(2025, 2, 1), Decimal('7.00'), 1)])
+
+    def test_payment_method(self):
+        """A method filter keeps only that method's totals."""
+        report = revenue_report(
+            date(2025, 1, 1), date(2025, 2, 1), 'month', 'cash')
+        self.assertEqual(self.totals(report),
+                         [(date(2025, 1, 1), Decimal('5.00'), 1)])
+        self.assertEqual(list(report[0]['by_method']), ['cash'])
+
+    def test_unknown_bucket(self):
+        """Unknown buckets are rejected."""
+        with self.assertRaises(ValueError):
+            revenue_report(date(2025, 1, 1), date(2025, 2, 1), 'year')
+
+    def test_closed_periods_cached(self):
+        """Closed periods stay cached until a backdated payment."""
+        start, end = date(2025, 1, 1), date(2025, 3, 1)
+        revenue_report(start, end, 'month')
+        with self.assertNumQueries(0):
+            revenue_report(start, end, 'month')
+        with self.captureOnCommitCallbacks(execute=True):
+            UserPayment.objects.create(
+                user=self.user, amount=Decimal('1.00'),
+                payment_date=timezone.make_aware(datetime(2025, 2, 2, 12)))
+        self.assertEqual(
+            self.totals(revenue_report(start, end, 'month'))[1],
+            (date(2025, 2, 1), Decimal('8.00'), 2))
+
+
+class BulkUpdateTests(TestCase):
+    """Admin bulk updates run in chunks and track their jobs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create five users to update."""
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'bulk{index}@example.com',
+                phone_number=f'+38000000004{index}',
+                username=f'bulk{index}', password='password')
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        """Start without stored jobs."""
+        cache.clear()
+
+    def test_chunks(self):
+        """Users are updated in chunks, each announced once committed."""
+        announced, progress = [], []
+
+        def receiver(sender, user_ids, **kwargs):
+            announced.append(user_ids)
+
+        users_updated.connect(receiver)
+        self.addCleanup(users_updated.disconnect, receiver)
+        selected = CustomUser.objects.exclude(pk=self.users[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = bulk.update_users(
+                selected, {'is_active': False}, size=3,
+                progress=progress.append)
+        self.assertEqual(updated, 4)
+        self.assertEqual(progress, [3, 4])
+        self.assertEqual(
+            announced, [[user.pk for user in self.users[1:4]],
+                        [self.users[4].pk]])
+        for user in self.users:
+            previous = user.version
+            user.refresh_from_db()
+            changed = user != self.users[0]
+            self.assertEqual(user.is_active, not changed)
+            self.assertEqual(user.version, previous + changed)
+
+    def test_stale_job_fails(self):
+        """A job whose worker stopped sending heartbeats is failed."""
+        bulk.save_job({'id': 'lost', 'status': 'running',
+                       'worker': 'stopped', 'error': None})
+        job = bulk.get_job('lost')
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(bulk.get_job('lost')['status'], 'failed')
+
+    def test_live_job(self):
+        """A job of a process sending heartbeats keeps its status."""
+        bulk._beat()
+        bulk.save_job({'id': 'live', 'status': 'running',
+                       'worker': bulk.WORKER_ID, 'error': None})
+        self.assertEqual(bulk.get_job('live')['status'], 'running')
+        self.assertIsNone(bulk.get_job('missing'))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache(self):
+        """Jobs need a shared cache; with locmem updates run inline."""
+        self.assertFalse(bulk.runs_in_background())
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/course-management-tests'}})
+    def test_shared_cache(self):
+        """Large selections run as jobs with a shared cache."""
+        self.assertTrue(bulk.runs_in_background())
+
+
+class ExportTests(TestCase):
+    """Users are exported with their addresses and payments."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a user with an address and a payment, and one without."""
+        cls.buyer, cls.visitor = (
+            CustomUser.objects.create_user(
+                email=f'{name}@example.com',
+                phone_number=f'+38000000005{index}',
+                username=name, password='password', first_name=name)
+            for index, name in enumerate(('buyer', 'visitor')))
+        UserAddress.objects.create(
+            user=cls.buyer, postal_code='01001', country='Ukraine',
+            city='Kyiv', street='Khreshchatyk')
+        UserPayment.objects.create(
+            user=cls.buyer, amount=Decimal('12.50'), payment_method='cash',
+            payment_date=timezone.make_aware(datetime(2025, 1, 5, 12)))
+
+    def export(self, export_format, size=None):
+        """Export every user.
+
+        Args:
+            export_format (str): ``'csv'`` or ``'jsonl'``.
+            size (int): Users per chunk.
+
+        Returns:
+            str: The encoded export.
+        """
+        return ''.join(export.stream(
+            CustomUser.objects.all(), export_format, size))
+
+    def test_csv(self):
+        """Each user row is followed by its address and payment rows."""
+        rows = list(csv.DictReader(StringIO(self.export('csv'))))
+        self.assertEqual(list(rows[0]), list(export.CSV_HEADER))
+        self.assertEqual(
+            [(row['record'], int(row['user_id'])) for row in rows],
+            [('user', self.buyer.pk), ('address', self.buyer.pk),
+             ('payment', self.buyer.pk), ('user', self.visitor.pk)])
+        user, address, payment = rows[:3]
+        self.assertEqual(user['email'], 'buyer@example.com')
+        self.assertEqual(user['address_city'], '')
+        self.assertEqual(address['address_city'], 'Kyiv')
+        self.assertEqual(address['email'], '')
+        self.assertEqual(payment['payment_amount'], '12.50')
+        self.assertEqual(payment['phone_number'], '')
+        self.assertEqual(payment['payment_payment_method'], 'cash')
+
+    def test_jsonl(self):
+        """Each line is one user with nested addresses and payments."""
+        records = [json.loads(line)
+                   for line in self.export('jsonl').splitlines()]
+        self.assertEqual([record['id'] for record in records],
+                         [self.buyer.pk, self.visitor.pk])
+        buyer, visitor = records
+        self.assertEqual(
+            set(buyer), set(export.USER_FIELDS) | {'addresses', 'payments'})
+        self.assertEqual(buyer['addresses'], [{
+            'postal_code': '01001', 'country': 'Ukraine', 'city': 'Kyiv',
+            'street': 'Khreshchatyk'}])
+        self.assertEqual(buyer['payments'], [{
+            'amount': '12.50', 'payment_method': 'cash',
+            'payment_date': '2025-01-05T12:00:00Z'}])
+        self.assertEqual((visitor['addresses'], visitor['payments']),
+                         ([], []))
+
+    def test_queries_per_chunk(self):
+        """Users are read once, relations once per chunk."""
+        with self.assertNumQueries(3):
+            self.export('jsonl', size=10)
+        with self.assertNumQueries(5):
+            self.export('jsonl', size=1)
+
+    def test_unknown_format(self):
+        """Unknown formats are rejected."""
+        with self.assertRaises(ValueError):
+            export.stream(CustomUser.objects.all(), 'xml')
+
+    def test_command(self):
+        """The command writes the same export to standard output."""
+        output = StringIO()
+        call_command('export_users', '--format', 'jsonl', stdout=output)
+        self.assertEqual(output.getvalue(), self.export('jsonl'))
+
+
+class ThumbnailTests(TestCase):
+    """Profile pictures get WebP and JPEG variants at each width."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user owning the pictures."""
+        cls.user = CustomUser.objects.create_user(
+            email='pictured@example.com', phone_number='+380000000060',
+            username='pictured', password='password')
+
+    def setUp(self):
+        """Store media in a temporary directory with a 400x200 image."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        settings = self.settings(MEDIA_ROOT=self.media_root,
+                                 THUMBNAIL_WIDTHS=(300, 150, 450))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.source = os.path.join(self.media_root, 'original.png')
+        Image.new('RGB', (400, 200), 'red').save(self.source)
+
+    def render(self):
+        """Render the variants of the test image in this process.
+
+        Returns:
+            str: The digest of the image.
+        """
+        return thumbnails.render_thumbnails(
+            self.source, self.media_root, thumbnails.widths(), 80)
+
+    def variant_path(self, digest, width, extension):
+        """Return the path of a rendered variant.
+
+        Args:
+            digest (str): The digest of the original.
+            width (int): The variant width.
+            extension (str): ``'webp'`` or ``'jpeg'``.
+
+        Returns:
+            str: The variant's file path.
+        """
+        return os.path.join(
+            self.media_root,
+            thumbnails.variant_name(digest, width, extension))
+
+    def test_render(self):
+        """Every width and format is written, never wider than the source."""
+        digest = self.render()
+        self.assertEqual(digest, thumbnails.file_digest(self.source))
+        for width, expected in ((150, (150, 75)), (300, (300, 150)),
+                                (450, (400, 200))):
+            for extension, image_format in thumbnails.FORMATS.items():
+                with Image.open(
+                        self.variant_path(digest, width, extension)) as image:
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.size, expected)
+
+    def test_existing_variants_skipped(self):
+        """Variants that exist are not decoded or written again."""
+        digest = self.render()
+        path = self.variant_path(digest, 150, 'webp')
+        modified = os.stat(path).st_mtime_ns
+        with mock.patch('PIL.Image.open') as image_open:
+            self.assertEqual(self.render(), digest)
+        image_open.assert_not_called()
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+        os.remove(path)
+        self.render()
+        self.assertTrue(os.path.exists(path))
+
+    def test_new_picture_scheduled(self):
+        """A new picture clears the old digest and is rendered on commit."""
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            profile_picture='profile_pictures/old.png',
+            profile_picture_digest='old')
+        self.user.refresh_from_db()
+        with open(self.source, 'rb') as source:
+            self.user.profile_picture = SimpleUploadedFile(
+                'new.png', source.read(), content_type='image/png')
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.save()
+                schedule.assert_not_called()
+        schedule.assert_called_once_with(self.user)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_digest, '')
+
+    def test_other_changes_not_scheduled(self):
+        """Saves that keep the picture render nothing."""
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            profile_picture='profile_pictures/kept.png',
+            profile_picture_digest='kept')
+        self.user.refresh_from_db()
+        self.user.first_name = 'Renamed'
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.save()
+        schedule.assert_not_called()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_digest, 'kept')
+
+    def test_store_digest(self):
+        """The digest is kept only if the picture did not change since."""
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            profile_picture='profile_pictures/newer.png')
+        version = self.user.version
+        thumbnails.store_digest(
+            CustomUser, self.user.pk, 'profile_pictures/older.png', 'stale')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_digest, '')
+        thumbnails.store_digest(
+            CustomUser, self.user.pk, 'profile_pictures/newer.png', 'fresh')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_digest, 'fresh')
+        self.assertEqual(self.user.version, version)
+
+    def test_thumbnails(self):
+        """Templates get no thumbnails until the digest is stored."""
+        self.user.profile_picture = 'profile_pictures/picture.png'
+        self.assertIsNone(thumbnails.thumbnails(self.user))
+        digest = 'ab' * 32
+        self.user.profile_picture_digest = digest
+        described = thumbnails.thumbnails(self.user)
+        prefix = f'/media/thumbnails/ab/{digest}'
+        self.assertEqual(described['src'], f'{prefix}-150.jpeg')
+        self.assertEqual(
+            described['srcset'],
+            f'{prefix}-150.jpeg 1x, {prefix}-300.jpeg 2x, '
+            f'{prefix}-450.jpeg 3x')
+        self.assertEqual(described['sources'], [{
+            'type': 'image/webp',
+            'srcset': f'{prefix}-150.webp 1x, {prefix}-300.webp 2x, '
+                      f'{prefix}-450.webp 3x',
+        }])
+        self.user.profile_picture = None
+        self.assertIsNone(thumbnails.thumbnails(self.user))
+
+
+class UserInfoFragmentTests(TestCase):
+    """The user info fragment is cached per user version and picture."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user whose info is shown."""
+        cls.user = CustomUser.objects.create_user(
+            email='shown@example.com', phone_number='+380000000070',
+            username='shown', password='password',
+            first_name='Shown', last_name='User')
+
+    def setUp(self):
+        """Start from an empty cache."""
+        cache.clear()
+
+    def render(self, user):
+        """Render the info of a user through the template tag.
+
+        Args:
+            user (CustomUser): The user.
+
+        Returns:
+            str: The rendered fragment.
+        """
+        return Template('{% load custom_tags %}{% cached_user_info user %}'
+                        ).render(Context({'user': user}))
+
+    def test_cached(self):
+        """The second render reads the fragment without queries."""
+        user = CustomUser.objects.get(pk=self.user.pk)
+        first = self.render(user)
+        self.assertIn('Shown User', first)
+        self.assertIn('shown@example.com', first)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(user), first)
+
+    @override_settings(USER_INFO_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """A timeout of 0 renders the fragment every time."""
+        self.render(self.user)
+        self.assertIsNone(cache.get(fragments.user_info_key(self.user)))
+
+    def test_user_saved(self):
+        """Saving the user bumps its version and renders a new fragment."""
+        user = CustomUser.objects.get(pk=self.user.pk)
+        key = fragments.user_info_key(user)
+        self.render(user)
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertNotEqual(fragments.user_info_key(user), key)
+        self.assertIn('Renamed User', self.render(user))
+
+    def test_thumbnails_stored(self):
+        """A stored picture digest renders a fragment with the variants."""
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            profile_picture='profile_pictures/picture.png')
+        user = CustomUser.objects.get(pk=self.user.pk)
+        first = self.render(user)
+        self.assertIn('/media/profile_pictures/picture.png', first)
+        self.assertNotIn('<picture>', first)
+        thumbnails.store_digest(
+            CustomUser, user.pk, 'profile_pictures/picture.png', 'cd' * 32)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertEqual(user.version, self.user.version)
+        second = self.render(user)
+        self.assertIn('<picture>', second)
+        self.assertIn(f'/media/thumbnails/cd/{"cd" * 32}-150.webp', second)
+
+    def test_current_time_not_cached(self):
+        """The current time is rendered outside the cached fragment."""
+        context = {'user': self.user}
+        now = datetime(2025, 3, 1, 9, 30)
+        with mock.patch('accounts.templatetags.custom_tags.datetime') as clock:
+            clock.now.return_value = now
+            first = render_to_string('accounts/user_info.html', context)
+            clock.now.return_value = now + timedelta(minutes=1)
+            second = render_to_string('accounts/user_info.html', context)
+        self.assertIn('01-03-2025 09:30:00', first)
+        self.assertIn('01-03-2025 09:31:00', second)
+        fragment = cache.get(fragments.user_info_key(self.user))
+        self.assertIn('shown@example.com', fragment)
+        self.assertNotIn('Today', fragment)
+
+
+class AdminSearchTests(TestCase):
+    """Admin changelists search users and addresses without duplicates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create an admin and two users, one with two addresses."""
+        cls.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com', phone_number='+380000000080',
+            password='password', username='admin')
+        cls.anna = CustomUser.objects.create_user(
+            email='anna@example.com', phone_number='+380000000081',
+            username='anna', password='password',
+            first_name='Anna', last_name='Annenko')
+        cls.annabel = CustomUser.objects.create_user(
+            email='annabel@example.org', phone_number='+380000000082',
+            username='annabel', password='password', first_name='Annabel')
+        for city in ('Lviv', 'Lvivska Oblast'):
+            UserAddress.objects.create(
+                user=cls.anna, postal_code='79000', country='Ukraine',
+                city=city, street='Rynok')
+        UserAddress.objects.create(
+            user=cls.annabel, postal_code='01001', country='Ukraine',
+            city='Kyiv', street='Khreshchatyk')
+
+    def setUp(self):
+        """Log the admin in."""
+        self.client.force_login(self.admin)
+
+    def search(self, model, query):
+        """Search an admin changelist.
+
+        Args:
+            model (str): The model name in the admin URL.
+            query (str): The search string.
+
+        Returns:
+            list: The primary keys of the listed rows.
+        """
+        response = self.client.get(
+            reverse(f'admin:accounts_{model}_changelist'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row.pk for row in response.context['cl'].result_list]
+
+    def test_exact_email(self):
+        """A full email lists only that user, ignoring case."""
+        self.assertEqual(self.search('customuser', 'ANNA@example.com'),
+                         [self.anna.pk])
+
+    def test_phone(self):
+        """A phone number matches with or without separators."""
+        self.assertEqual(self.search('customuser', '+380 00 000 00 82'),
+                         [self.annabel.pk])
+        self.assertEqual(self.search('customuser', '000000081'),
+                         [self.anna.pk])
+
+    def test_substring(self):
+        """Every term must match one of the fields, once per user."""
+        self.assertEqual(
+            sorted(self.search('customuser', 'anna')),
+            sorted([self.anna.pk, self.annabel.pk]))
+        self.assertEqual(self.search('customuser', 'anna annenko'),
+                         [self.anna.pk])
+        self.assertEqual(self.search('customuser', 'nobody'), [])
+
+    def test_address_city(self):
+        """Addresses match by city and by their user's email."""
+        lviv = list(UserAddress.objects.filter(
+            user=self.anna).values_list('pk', flat=True))
+        self.assertEqual(sorted(self.search('useraddress', 'lviv')),
+                         sorted(lviv))
+        self.assertEqual(sorted(self.search('useraddress', 'anna@exa')),
+                         sorted(lviv))
+
+    def test_address_exact_email(self):
+        """A full email lists each address of that user once."""
+        pks = self.search('useraddress', 'anna@example.com')
+        self.assertEqual(len(pks), 2)
+        self.assertEqual(len(set(pks)), 2)
+        self.assertEqual(
+            set(UserAddress.objects.filter(pk__in=pks).values_list(
+                'user', flat=True)), {self.anna.pk})
+
+
+class UserChangelistTests(TestCase):
+    """The user changelist shows payment summaries at a fixed query cost."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create an admin and three paying users."""
+        cls.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com', phone_number='+380000000090',
+            password='password', username='admin')
+        cls.add_payers(range(3))
+
+    @classmethod
+    def add_payers(cls, indexes):
+        """Create users with two payments each.
+
+        Args:
+            indexes (range): Numbers making the users unique.
+        """
+        for index in indexes:
+            user = CustomUser.objects.create_user(
+                email=f'payer{index}@example.com',
+                phone_number=f'+3800000091{index:02}',
+                username=f'payer{index}', password='password')
+            for amount in ('1.50', '2.00'):
+                UserPayment.objects.create(user=user, amount=Decimal(amount))
+
+    def setUp(self):
+        """Log the admin in."""
+        self.client.force_login(self.admin)
+
+    def changelist(self):
+        """Render the user changelist.
+
+        Returns:
+            HttpResponse: The changelist response.
+        """
+        return self.client.get(reverse('admin:accounts_customuser_changelist'))
+
+    def test_summary_columns(self):
+        """Totals come from the summaries, never from the payment rows."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist()
+        self.assertContains(response, '3.50 USD', count=3)
+        self.assertContains(response, '0.00 USD', count=1)
+        self.assertFalse([query for query in queries.captured_queries
+                          if '"accounts_userpayment"' in query['sql']])
+        self.add_payers(range(3, 9))
+        with self.assertNumQueries(len(queries)):
+            response = self.changelist()
+        self.assertContains(response, '3.50 USD', count=9)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT=True)
+    def test_estimated_count_fallback(self):
+        """Without PostgreSQL the estimated paginator counts exactly."""
+        response = self.changelist()
+        paginator = response.context['cl'].paginator
+        self.assertIsInstance(paginator, EstimatedCountPaginator)
+        self.assertIsNone(paginator.estimate())
+        self.assertEqual(paginator.count, CustomUser.objects.count())
+        self.assertFalse(response.context['cl'].show_full_result_count)
+
+    def test_filtered_count(self):
+        """Filtered querysets are never estimated."""
+        paginator = EstimatedCountPaginator(
+            CustomUser.objects.filter(is_staff=False).order_by('pk'), 10)
+        self.assertIsNone(paginator.estimate())
+        self.assertEqual(paginator.count, 3)
+
+
+@unittest.skipIf(connection.vendor == 'postgresql',
+                 'Partitioning runs on PostgreSQL.')
+class PartitioningUnsupportedTests(TestCase):
+    """The partitioning commands refuse other database backends."""
+
+    def test_partition(self):
+        """Partitioning and reverting both fail."""
+        for args in ((), ('--revert',)):
+            with self.assertRaisesMessage(
+                    CommandError, 'Partitioning needs PostgreSQL.'):
+                call_command('partition_payments', *args, stdout=StringIO())
+
+    def test_archive(self):
+        """Archiving fails before writing any file."""
+        with tempfile.TemporaryDirectory() as directory:
+            output_dir = os.path.join(directory, 'archive')
+            with self.assertRaisesMessage(
+                    CommandError, 'Partitioning needs PostgreSQL.'):
+                call_command('archive_payment_partitions',
+                             '--output-dir', output_dir, stdout=StringIO())
+            self.assertFalse(os.path.exists(output_dir))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql',
+                     'Partitioning needs PostgreSQL.')
+class PartitionArchiveTests(TransactionTestCase):
+    """Archived partitions leave the table, the summaries and reports."""
+
+    def setUp(self):
+        """Record an old and a recent payment and partition the table."""
+        self.user = CustomUser.objects.create_user(
+            email='archived@example.com', phone_number='+380000000100',
+            username='archived', password='password')
+        self.current = month_start(timezone.localdate())
+        self.old = UserPayment.objects.create(
+            user=self.user, amount=Decimal('40.00'),
+            payment_date=timezone.now() - timedelta(days=120))
+        self.recent = UserPayment.objects.create(
+            user=self.user, amount=Decimal('2.50'))
+        call_command('partition_payments', stdout=StringIO())
+        self.addCleanup(call_command, 'partition_payments', '--revert',
+                        stdout=StringIO())
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def test_partitioned(self):
+        """The table is partitioned and keeps its indexes."""
+        table = UserPayment._meta.db_table
+        self.assertTrue(is_partitioned(connection, table))
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table)
+        for index in UserPayment._meta.indexes:
+            self.assertIn(index.name, constraints)
+
+    def test_archive(self):
+        """Archived payments are exported and leave the summaries."""
+        call_command('archive_payment_partitions',
+                     '--output-dir', self.output_dir,
+                     '--before', f'{self.current:%Y-%m}', stdout=StringIO())
+        self.assertEqual(list(UserPayment.objects.all()), [self.recent])
+        summary = UserPaymentSummary.objects.get(user=self.user)
+        self.assertEqual((summary.total, summary.count),
+                         (Decimal('2.50'), 1))
+        month = month_start(timezone.localdate(self.old.payment_date))
+        path = os.path.join(
+            self.output_dir,
+            f'{UserPayment._meta.db_table}_p{month:%Y_%m}.csv.gz')
+        with gzip.open(path, 'rt') as archive:
+            rows = list(csv.DictReader(archive))
+        self.assertEqual([(int(row['id']), row['amount']) for row in rows],
+                         [(self.old.pk, '40.00')])
+        self.assertLess(month, self.current)
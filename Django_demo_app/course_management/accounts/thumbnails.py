@@ -0,0 +1,268 @@
+"""Thumbnails of user profile pictures.
+
+After a profile picture is saved, WebP and JPEG variants are rendered at
+the widths of ``THUMBNAIL_WIDTHS`` on a pool of worker processes, so
+decoding and resampling large uploads neither blocks the request thread
+nor holds the GIL of the web process. Variants are written under
+``MEDIA_ROOT/thumbnails/`` with names built from the SHA-256 digest of
+the original, so identical uploads share files and a variant that exists
+is never rendered again. The digest is stored on the user once every
+variant is written; until then templates fall back to the original.
+
+This module runs in the worker processes too and must not import models
+at module level: the pool starts its workers with ``spawn``, where Django
+apps are not loaded.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (150, 300, 450)
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+CONTENT_TYPES = {
+    'webp': 'image/webp',
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def widths():
+    """Return the configured thumbnail widths, smallest first.
+
+    The smallest width is the displayed one; larger widths serve screens
+    of higher pixel density.
+
+    Returns:
+        tuple: The widths in pixels.
+    """
+    return tuple(sorted(
+        getattr(settings, 'THUMBNAIL_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def variant_name(digest, width, extension):
+    """Return the storage name of a variant.
+
+    Args:
+        digest (str): SHA-256 hex digest of the original image.
+        width (int): The variant width.
+        extension (str): ``'webp'`` or ``'jpeg'``.
+
+    Returns:
+        str: The name relative to ``MEDIA_ROOT``.
+    """
+    return f'thumbnails/{digest[:2]}/{digest}-{width}.{extension}'
+
+
+def file_digest(path):
+    """Hash a file.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        str: The SHA-256 hex digest of the file.
+    """
+    with open(path, 'rb') as source:
+        return hashlib.file_digest(source, 'sha256').hexdigest()
+
+
+def render_thumbnails(source_path, media_root, sizes, quality):
+    """Render the missing variants of an image.
+
+    Runs in a worker process.
+
+    Args:
+        source_path (str): Path of the original image.
+        media_root (str): Directory the variants are stored under.
+        sizes (tuple): Widths to render.
+        quality (int): WebP and JPEG quality.
+
+    Returns:
+        str: The digest of the original image.
+    """
+    from PIL import Image, ImageOps
+
+    digest = file_digest(source_path)
+    missing = [
+        (width, extension)
+        for width in sizes for extension in FORMATS
+        if not os.path.exists(os.path.join(
+            media_root, variant_name(digest, width, extension)))
+    ]
+    if not missing:
+        return digest
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert(
+            'RGBA' if 'A' in image.getbands() else 'RGB')
+        for width, extension in missing:
+            variant = image
+            if image.width > width:
+                variant = image.resize(
+                    (width, max(1, round(image.height * width / image.width))),
+                    Image.Resampling.LANCZOS)
+            if extension == 'jpeg' and variant.mode != 'RGB':
+                variant = variant.convert('RGB')
+            path = os.path.join(
+                media_root, variant_name(digest, width, extension))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name, so a variant that exists is
+            # always complete.
+            temporary = f'{path}.{os.getpid()}.part'
+            variant.save(temporary, FORMATS[extension], quality=quality)
+            os.replace(temporary, path)
+    return digest
+
+
+def get_pool():
+    """Return the worker process pool, starting it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def submit(user):
+    """Render the thumbnails of a user's profile picture on the pool.
+
+    Pictures in storages without local paths are skipped.
+
+    Args:
+        user (CustomUser): The user with a saved profile picture.
+
+    Returns:
+        Future: The pending digest, or None if nothing was submitted.
+    """
+    picture = user.profile_picture
+    if not picture:
+        return None
+    try:
+        source_path = picture.path
+        media_root = default_storage.path('')
+    except NotImplementedError:
+        logger.warning('Thumbnails need a storage with local paths.')
+        return None
+    return get_pool().submit(
+        render_thumbnails, source_path, media_root, widths(),
+        getattr(settings, 'THUMBNAIL_QUALITY', 80))
+
+
+def schedule(user):
+    """Render the thumbnails of a user's picture and store their digest.
+
+    Args:
+        user (CustomUser): The user with a saved profile picture.
+
+    Returns:
+        Future: The pending digest, or None if nothing was scheduled.
+    """
+    future = submit(user)
+    if future is not None:
+        name = user.profile_picture.name
+        future.add_done_callback(
+            partial(_store_result, type(user), user.pk, name))
+    return future
+
+
+def store_digest(model, user_id, name, digest):
+    """Record the digest of rendered thumbnails on the user.
+
+    The row is updated directly, without bumping the user version that
+    signs its tokens, and only if the picture has not changed since.
+
+    Args:
+        model (type): The user model.
+        user_id (int): The user id.
+        name (str): The picture the thumbnails were rendered from.
+        digest (str): The digest of the picture.
+    """
+    model._default_manager.filter(
+        pk=user_id, profile_picture=name,
+    ).update(profile_picture_digest=digest)
+
+
+def _store_result(model, user_id, name, future):
+    """Record the digest of a finished render.
+
+    Runs on the pool's management thread.
+
+    Args:
+        model (type): The user model.
+        user_id (int): The user id.
+        name (str): The picture the thumbnails were rendered from.
+        future (Future): The finished render.
+    """
+    try:
+        digest = future.result()
+    except Exception:
+        logger.exception('Rendering the thumbnails of %s failed', name)
+        return
+    close_old_connections()
+    try:
+        store_digest(model, user_id, name, digest)
+    finally:
+        close_old_connections()
+
+
+def srcset(digest, extension):
+    """Build the ``srcset`` of the variants in one format.
+
+    Args:
+        digest (str): SHA-256 hex digest of the original image.
+        extension (str): ``'webp'`` or ``'jpeg'``.
+
+    Returns:
+        str: Variant URLs with pixel density descriptors.
+    """
+    sizes = widths()
+    return ', '.join(
+        f'{default_storage.url(variant_name(digest, width, extension))} '
+        f'{width / sizes[0]:g}x'
+        for width in sizes
+    )
+
+
+def thumbnails(user):
+    """Describe the thumbnails of a user for templates.
+
+    Args:
+        user (CustomUser): The user.
+
+    Returns:
+        dict: ``src`` and ``srcset`` of the JPEG variants and ``sources``
+            with the ``type`` and ``srcset`` of the WebP variants, or None
+            if the thumbnails are not rendered yet.
+    """
+    digest = user.profile_picture_digest
+    if not user.profile_picture or not digest:
+        return None
+    return {
+        'src': default_storage.url(
+            variant_name(digest, widths()[0], 'jpeg')),
+        'srcset': srcset(digest, 'jpeg'),
+        'sources': [
+            {'type': CONTENT_TYPES['webp'], 'srcset': srcset(digest, 'webp')},
+        ],
+    }
@@ -6,4 +6,6 @@ from accounts import views
 urlpatterns = [
     path('tags/', views.tags_page, name='tags_page'),
     path('user_info/', views.user_info_page, name='user_info_page'),
+    path('async/user_info/', views.user_info_page_async,
+         name='async_user_info_page'),
 ]
@@ -1,6 +1,8 @@
 """Views for the accounts app."""
 from django.shortcuts import render
 
+from course_management.instrumentation import query_budget
+
 
 def tags_page(request):
     """Render the tags page.
@@ -14,6 +16,7 @@ def tags_page(request):
     return render(request, 'accounts/tags.html')
 
 
+@query_budget(2)
 def user_info_page(request):
     """Render the user info page.
 
@@ -24,3 +27,21 @@ def user_info_page(request):
         HttpResponse: The response object
     """
     return render(request, 'accounts/user_info.html')
+
+
+@query_budget(2)
+async def user_info_page_async(request):
+    """Render the user info page without blocking the event loop.
+
+    The user is loaded with ``request.auser()`` and passed explicitly, so
+    the template never falls back to the lazy, synchronous
+    ``request.user``.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        HttpResponse: The response object
+    """
+    return render(request, 'accounts/user_info.html',
+                  {'user': await request.auser()})
@@ -0,0 +1,78 @@
+"""Small helpers shared by the benchmark management commands."""
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def percentile(samples, fraction):
+    """Return the given percentile of the samples.
+
+    Args:
+        samples (list): Measured values.
+        fraction (float): Percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The interpolated percentile, or 0.0 for no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = position - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+def summarize(samples):
+    """Summarize latency samples given in seconds.
+
+    Args:
+        samples (list): Measured durations in seconds.
+
+    Returns:
+        dict: Count, mean and p50/p95/p99 in milliseconds.
+    """
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+    }
+
+
+def format_summary(label, summary):
+    """Format a summary produced by :func:`summarize` as one line.
+
+    Args:
+        label (str): Name of the measured case.
+        summary (dict): The summary to format.
+
+    Returns:
+        str: Human readable line.
+    """
+    return (
+        f'{label:<32} n={summary["count"]:<6} '
+        f'mean={summary["mean_ms"]:8.3f}ms '
+        f'p50={summary["p50_ms"]:8.3f}ms '
+        f'p95={summary["p95_ms"]:8.3f}ms '
+        f'p99={summary["p99_ms"]:8.3f}ms'
+    )
+
+
+@contextmanager
+def timed(samples):
+    """Append the duration of the block, in seconds, to samples.
+
+    Args:
+        samples (list): List collecting the measurements.
+
+    Yields:
+        None: Control to the measured block.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
@@ -0,0 +1,130 @@
+"""Thread pool with a bounded queue for work off the request thread.
+
+``BoundedExecutor`` runs tasks on a few dedicated threads and admits
+only a fixed number of waiting tasks; past that, ``submit`` fails
+immediately so the caller can refuse the work instead of piling it up.
+Tasks run with the context of the submitting thread and drop stale
+database connections when they finish.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor has no free worker or queue slot."""
+
+
+class BoundedExecutor:
+    """Thread pool with a hard limit on queued tasks and usage metrics."""
+
+    def __init__(self, max_workers, max_queue, name='executor'):
+        """Create the executor; threads start on first use.
+
+        Args:
+            max_workers (int): Threads running tasks.
+            max_queue (int): Tasks allowed to wait for a free thread.
+            name (str): Prefix of the thread names.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._counters = {
+            'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+            'running': 0,
+        }
+        self._busy_time = 0.0
+        self._wait_time = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule a call, or fail fast if the executor is full.
+
+        Args:
+            fn (callable): The function to run.
+            args: Positional arguments for ``fn``.
+            kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            Future: The pending result.
+
+        Raises:
+            ExecutorSaturated: If all workers and queue slots are taken.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise ExecutorSaturated(
+                f'{self.max_workers} workers and {self.max_queue} queue '
+                f'slots in use.')
+        self._count('submitted')
+        # Run in a copy of the caller's context, so per-request state such
+        # as the query instrumentation follows the task.
+        context = contextvars.copy_context()
+        return self._pool.submit(
+            context.run, self._run, time.perf_counter(), fn, args, kwargs)
+
+    def metrics(self):
+        """Return counters and timings of the executor.
+
+        Returns:
+            dict: Task counters, current ``running`` and ``queued`` tasks,
+            limits and mean wait/run times in milliseconds.
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+            busy, wait = self._busy_time, self._wait_time
+        finished = metrics['completed'] + metrics['failed']
+        metrics.update({
+            'queued': max(0, metrics['submitted'] - finished
+                          - metrics['running']),
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'mean_run_ms': busy / finished * 1000 if finished else 0.0,
+            'mean_wait_ms': wait / finished * 1000 if finished else 0.0,
+        })
+        return metrics
+
+    def _run(self, submitted_at, fn, args, kwargs):
+        """Run a task on a worker thread and record its timings.
+
+        Args:
+            submitted_at (float): perf_counter value at submission.
+            fn (callable): The function to run.
+            args (tuple): Positional arguments for ``fn``.
+            kwargs (dict): Keyword arguments for ``fn``.
+
+        Returns:
+            object: Whatever ``fn`` returns.
+        """
+        started = time.perf_counter()
+        self._count('running')
+        outcome = 'failed'
+        try:
+            result = fn(*args, **kwargs)
+            outcome = 'completed'
+            return result
+        finally:
+            # Worker threads outlive requests; drop their connections the
+            # way the request cycle would.
+            close_old_connections()
+            finished = time.perf_counter()
+            with self._lock:
+                self._counters['running'] -= 1
+                self._counters[outcome] += 1
+                self._wait_time += started - submitted_at
+                self._busy_time += finished - started
+            self._slots.release()
+
+    def _count(self, counter):
+        """Increment a counter.
+
+        Args:
+            counter (str): The counter name.
+        """
+        with self._lock:
+            self._counters[counter] += 1
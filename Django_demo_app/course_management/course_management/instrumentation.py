@@ -0,0 +1,333 @@
+"""Per-request timing, query counting and query budgets.
+
+``InstrumentationMiddleware`` measures the wall time of every request
+together with the number of database queries it ran and the time spent
+in them, and logs one line per request through a ``QueueHandler`` so the
+request thread never blocks on the log stream. The line is logged at
+DEBUG, or at WARNING when the request took ``SLOW_REQUEST_THRESHOLD``
+seconds or more or its view exceeded the query budget.
+
+Queries are counted by an execute wrapper (see
+``connection.execute_wrapper``) installed on every connection. The
+wrapper reports to the stats of the current request, found through a
+context variable, so queries that async views run in
+``sync_to_async`` threads are attributed to the right request too.
+Transaction control statements (``BEGIN``, savepoints, ...) add to the
+database time but are not counted: SQLite runs them through the cursor
+while other backends do not, and the test runner wraps every test in
+savepoints, so counting them would make budgets depend on both.
+
+Views declare how many queries they may run with a ``query_budget``
+attribute, or the :func:`query_budget` decorator for function views.
+Exceeding the budget logs the request as a warning; with
+``QUERY_BUDGET_STRICT = True`` (meant for test runs) it also raises
+:class:`QueryBudgetExceeded`, so an N+1 regression fails the test that
+requests the view.
+"""
+import atexit
+import logging
+import queue
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar('request_query_stats', default=None)
+
+DEFAULT_SLOW_REQUEST_THRESHOLD = 1.0
+
+TRANSACTION_STATEMENTS = (
+    'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view runs more queries than allowed."""
+
+
+class QueryStats:
+    """Number of queries run and time spent in the database.
+
+    Stats opened while others are active (e.g. a request measured inside
+    a benchmark) also report every query to their parent.
+    """
+
+    def __init__(self, parent=None):
+        """Start with no queries recorded.
+
+        Args:
+            parent (QueryStats): Enclosing stats to report to as well.
+        """
+        self.queries = 0
+        self.db_time = 0.0
+        self.parent = parent
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute a query and record it; usable as an execute wrapper.
+
+        Args:
+            execute (callable): The next wrapper or the real execute.
+            sql (str): The SQL statement.
+            params (list): The statement parameters.
+            many (bool): Whether this is an executemany call.
+            context (dict): The connection and cursor.
+
+        Returns:
+            object: Whatever ``execute`` returns.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            counted = not sql.lstrip().upper().startswith(
+                TRANSACTION_STATEMENTS)
+            stats = self
+            while stats is not None:
+                stats.queries += counted
+                stats.db_time += elapsed
+                stats = stats.parent
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper reporting to the stats of the current request.
+
+    Args:
+        execute (callable): The next wrapper or the real execute.
+        sql (str): The SQL statement.
+        params (list): The statement parameters.
+        many (bool): Whether this is an executemany call.
+        context (dict): The connection and cursor.
+
+    Returns:
+        object: Whatever ``execute`` returns.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Add :func:`record_query` to a connection's execute wrappers.
+
+    Args:
+        connection (BaseDatabaseWrapper): The connection to instrument.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    """Instrument every new database connection.
+
+    Args:
+        sender (type): The database wrapper class.
+        connection (BaseDatabaseWrapper): The new connection.
+        kwargs: Additional keyword arguments.
+    """
+    install_query_recorder(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+def query_budget(limit):
+    """Declare the query budget of a function-based view.
+
+    Args:
+        limit (int): Maximum number of queries per request.
+
+    Returns:
+        callable: Decorator setting ``query_budget`` on the view.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget(request):
+    """Look up the query budget of the view that served a request.
+
+    Args:
+        request (HttpRequest): The served request.
+
+    Returns:
+        int: The budget, or None if the view declares none.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', match.func)
+    return getattr(view, 'query_budget', None)
+
+
+@contextmanager
+def track_queries():
+    """Count the queries run in the block, including async threads.
+
+    Yields:
+        QueryStats: The stats collected for the block.
+    """
+    stats = QueryStats(_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        for connection in connections.all():
+            install_query_recorder(connection)
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block runs more than ``limit`` database queries.
+
+    Meant for tests of services and views called directly; requests made
+    through the test client are checked by the middleware in strict mode.
+
+    Args:
+        limit (int): Maximum number of queries.
+
+    Yields:
+        QueryStats: The stats collected for the block.
+
+    Raises:
+        QueryBudgetExceeded: If the block exceeded the limit.
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > limit:
+        raise QueryBudgetExceeded(
+            f'{stats.queries} queries run, the budget is {limit}.')
+
+
+class InstrumentationMiddleware:
+    """Log wall time, query count and DB time of every request.
+
+    Only slow and over-budget requests are logged above DEBUG.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Store the next handler and adapt to its sync or async mode.
+
+        Args:
+            get_response (callable): The next middleware or the view.
+        """
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Measure the request.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        if self.async_mode:
+            return self.__acall(request)
+        for connection in connections.all():
+            install_query_recorder(connection)
+        stats = QueryStats(_current_stats.get())
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.report(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall(self, request):
+        """Measure the request without blocking the event loop.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        stats = QueryStats(_current_stats.get())
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.report(request, response, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def report(request, response, stats, elapsed):
+        """Log the measurements and enforce the view's query budget.
+
+        Requests that are slow or over budget are logged at WARNING, with
+        the reason appended; others at DEBUG.
+
+        Args:
+            request (HttpRequest): The served request.
+            response (HttpResponse): The response.
+            stats (QueryStats): Queries recorded for the request.
+            elapsed (float): Wall time in seconds.
+
+        Raises:
+            QueryBudgetExceeded: In strict mode, if the view exceeded its
+                query budget.
+        """
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '-'
+        budget = get_query_budget(request)
+        over_budget = budget is not None and stats.queries > budget
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD',
+                            DEFAULT_SLOW_REQUEST_THRESHOLD)
+        slow = threshold is not None and elapsed >= threshold
+        message = '%s %s view=%s status=%s wall=%.1fms queries=%d db=%.1fms'
+        args = [request.method, request.path, view_name,
+                response.status_code, elapsed * 1000, stats.queries,
+                stats.db_time * 1000]
+        if slow:
+            message += ' slow'
+        if over_budget:
+            message += ' over-budget=%d'
+            args.append(budget)
+        logger.log(logging.WARNING if slow or over_budget else logging.DEBUG,
+                   message, *args)
+        if over_budget and getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(
+                f'{view_name} ran {stats.queries} queries, '
+                f'its budget is {budget}.')
+
+
+def queue_handler(stream=None):
+    """Build a QueueHandler drained by a listener thread.
+
+    Used as a ``()`` factory in ``LOGGING``. Records are formatted by the
+    returned handler, so its ``formatter`` applies; the listener only
+    writes the finished lines to ``stream``. The listener is stopped,
+    flushing the queue, at interpreter exit.
+
+    Args:
+        stream (file): Where the listener writes; ``sys.stderr`` if None.
+
+    Returns:
+        QueueHandler: The handler to attach to loggers.
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler(stream))
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(log_queue)
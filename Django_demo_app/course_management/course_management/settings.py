@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'course_management.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,6 +97,65 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory is per process; point this at a shared backend (e.g. Redis
+# or Memcached) in production so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course-management',
+    }
+}
+
+COURSE_LIST_CACHE_TIMEOUT = 3600
+# Cached user info fragments, in seconds; 0 disables the cache.
+USER_INFO_CACHE_TIMEOUT = 3600
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+# Records go through a queue to a listener thread, so request threads
+# never block on the log stream.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'course_management.instrumentation.queue_handler',
+            'formatter': 'default',
+        },
+    },
+    'loggers': {
+        'course_management': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'courses_app': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Raise instead of logging a warning when a view exceeds its declared
+# query budget. Enable in test settings to catch N+1 regressions.
+QUERY_BUDGET_STRICT = False
+
+# Requests taking this many seconds or more are logged as warnings; other
+# requests are logged at DEBUG. None logs none of them as slow.
+SLOW_REQUEST_THRESHOLD = 1.0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -155,7 +215,69 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Reverse proxies in front of the app whose X-Forwarded-For entries
+    # are trusted for client IPs (login throttling); 0 uses REMOTE_ADDR.
+    'NUM_PROXIES': 0,
 }
 
 JWT_SECRET_KEY = SECRET_KEY
 JWT_ACCESS_TOKEN_LIFETIME = 300
+# 'id' tokens carry only the user id. 'claims' tokens also sign email,
+# username, is_staff, is_active and the user version, so read-only
+# endpoints can authorize requests without loading the user.
+JWT_TOKEN_MODE = 'id'
+# Verified access token payloads kept per process until the token expires.
+JWT_TOKEN_CACHE_SIZE = 4096
+
+# Users behind JWT requests are cached in a per-process LRU and in the
+# shared cache. The local TTL bounds how long other processes may keep
+# serving a user after it was changed or deactivated.
+JWT_USER_CACHE_SIZE = 1024
+JWT_USER_CACHE_LOCAL_TIMEOUT = 5
+JWT_USER_CACHE_TIMEOUT = 300
+
+# Where spent and revoked refresh token ids are kept. The cache store is
+# shared by all workers when CACHES points at a shared backend;
+# courses_restfull.revocation.LocalRevocationStore is process-local.
+JWT_REVOCATION_STORE = 'courses_restfull.revocation.CacheRevocationStore'
+
+# Password checks for API logins run on a dedicated pool of
+# LOGIN_HASH_WORKERS threads with at most LOGIN_HASH_QUEUE waiting; more
+# concurrent logins get 503. Attempts are throttled with token buckets of
+# (capacity, refill period in seconds) per IP and per account.
+LOGIN_HASH_WORKERS = 2
+LOGIN_HASH_QUEUE = 8
+LOGIN_HASH_TIMEOUT = 5
+LOGIN_THROTTLE_RATES = {
+    'ip': (20, 60),
+    'account': (5, 60),
+}
+
+# Let the users admin changelist use PostgreSQL's row estimate instead of
+# COUNT(*) for unfiltered tables of at least this many rows.
+ADMIN_ESTIMATED_COUNT = False
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Cached rows of closed revenue report periods, in seconds.
+REVENUE_REPORT_CACHE_TIMEOUT = 604800
+
+# Bulk user admin actions update this many users per transaction; larger
+# selections run on a pool of ADMIN_BULK_WORKERS background threads that
+# accepts at most ADMIN_BULK_QUEUE waiting jobs. Background jobs need a
+# shared CACHES backend (not locmem) and count as failed when their
+# process sends no heartbeat for ADMIN_BULK_STALE_AFTER seconds.
+ADMIN_BULK_CHUNK_SIZE = 1000
+ADMIN_BULK_WORKERS = 1
+ADMIN_BULK_QUEUE = 4
+ADMIN_BULK_STALE_AFTER = 300
+
+# Users fetched per query, with their addresses and payments, by the
+# streaming user export (admin actions and export_users).
+USER_EXPORT_CHUNK_SIZE = 2000
+
+# Profile picture thumbnails (see accounts.thumbnails): rendered widths in
+# pixels, the smallest being the displayed one, worker processes and
+# WebP/JPEG quality.
+THUMBNAIL_WIDTHS = (150, 300, 450)
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUALITY = 80
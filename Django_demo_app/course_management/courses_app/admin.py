@@ -8,7 +8,9 @@ from .models import Course
 class CourseAdmin(admin.ModelAdmin):
     """Admin interface for Course model."""
 
-    list_display = ('title', 'created_at', 'updated_at', 'created_by')
+    list_display = ('title', 'created_at', 'updated_at', 'created_by',
+                    'enrollment_count')
+    list_select_related = ('created_by',)
     search_fields = ('title', 'description')
     list_filter = ('created_at',)
 
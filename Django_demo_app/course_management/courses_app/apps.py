@@ -7,3 +7,7 @@ class CoursesAppConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses_app'
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
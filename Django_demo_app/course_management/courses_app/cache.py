@@ -0,0 +1,253 @@
+"""Versioned fragment cache for the rendered course list.
+
+Every cache key embeds the current course list version. Saving or
+deleting a course bumps the version, which orphans all old fragments at
+once; they simply expire. Misses go through a single-flight lock kept in
+the cache itself, so with a shared backend only one worker re-renders a
+fragment while the others wait for its result.
+
+Every version bump also records when the catalog changed, which serves
+as the ``Last-Modified`` date of the course list.
+"""
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+COURSE_LIST_VERSION_KEY = 'courses:list:version'
+ENROLLMENT_VERSION_KEY = 'courses:enrollments:version'
+CATALOG_CHANGED_KEY = 'courses:catalog:changed'
+FRAGMENT_TIMEOUT = getattr(settings, 'COURSE_LIST_CACHE_TIMEOUT', 3600)
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def touch_catalog():
+    """Record that the catalog changed now."""
+    cache.set(CATALOG_CHANGED_KEY, timezone.now(), None)
+
+
+def get_catalog_changed():
+    """Return when the catalog last changed.
+
+    A missing (evicted) value is replaced with the current time, which
+    can only make clients fetch pages that did not change.
+
+    Returns:
+        datetime: The last change time.
+    """
+    changed = cache.get(CATALOG_CHANGED_KEY)
+    if changed is None:
+        cache.add(CATALOG_CHANGED_KEY, timezone.now(), None)
+        changed = cache.get(CATALOG_CHANGED_KEY)
+    return changed
+
+
+async def aget_catalog_changed():
+    """Async variant of get_catalog_changed.
+
+    Returns:
+        datetime: The last change time.
+    """
+    changed = await cache.aget(CATALOG_CHANGED_KEY)
+    if changed is None:
+        await cache.aadd(CATALOG_CHANGED_KEY, timezone.now(), None)
+        changed = await cache.aget(CATALOG_CHANGED_KEY)
+    return changed
+
+
+def get_course_list_version():
+    """Return the current course list version.
+
+    Returns:
+        int: The version embedded in course list cache keys.
+    """
+    version = cache.get(COURSE_LIST_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses a version
+        # whose fragments are still cached.
+        cache.add(COURSE_LIST_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(COURSE_LIST_VERSION_KEY)
+    return version
+
+
+async def aget_course_list_version():
+    """Async variant of get_course_list_version.
+
+    Returns:
+        int: The version embedded in course list cache keys.
+    """
+    version = await cache.aget(COURSE_LIST_VERSION_KEY)
+    if version is None:
+        await cache.aadd(COURSE_LIST_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(COURSE_LIST_VERSION_KEY)
+    return version
+
+
+def bump_course_list_version():
+    """Invalidate every cached course list fragment.
+
+    Returns:
+        int: The new version.
+    """
+    touch_catalog()
+    try:
+        return cache.incr(COURSE_LIST_VERSION_KEY)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(COURSE_LIST_VERSION_KEY, version, None)
+        return version
+
+
+def get_enrollment_version():
+    """Return the current enrollment version.
+
+    Enrollments do not bump the course list version: cached fragments
+    show the counters read live (see
+    ``courses_app.enrollment.fill_enrollment_counts``), and validators of
+    the catalog embed this version instead.
+
+    Returns:
+        int: The version of the enrollment counters.
+    """
+    version = cache.get(ENROLLMENT_VERSION_KEY)
+    if version is None:
+        cache.add(ENROLLMENT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(ENROLLMENT_VERSION_KEY)
+    return version
+
+
+async def aget_enrollment_version():
+    """Async variant of get_enrollment_version.
+
+    Returns:
+        int: The version of the enrollment counters.
+    """
+    version = await cache.aget(ENROLLMENT_VERSION_KEY)
+    if version is None:
+        await cache.aadd(ENROLLMENT_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(ENROLLMENT_VERSION_KEY)
+    return version
+
+
+def bump_enrollment_version():
+    """Record that enrollment counters changed.
+
+    Returns:
+        int: The new version.
+    """
+    touch_catalog()
+    try:
+        return cache.incr(ENROLLMENT_VERSION_KEY)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(ENROLLMENT_VERSION_KEY, version, None)
+        return version
+
+
+def course_list_key(variant=''):
+    """Build the cache key of a course list fragment.
+
+    Args:
+        variant (str): What distinguishes this fragment, e.g. the
+            validated search and page parameters of the request.
+
+    Returns:
+        str: The versioned cache key.
+    """
+    digest = hashlib.md5(
+        variant.encode(), usedforsecurity=False).hexdigest()
+    return f'courses:list:v{get_course_list_version()}:{digest}'
+
+
+async def acourse_list_key(variant=''):
+    """Async variant of course_list_key.
+
+    Args:
+        variant (str): What distinguishes this fragment.
+
+    Returns:
+        str: The versioned cache key.
+    """
+    digest = hashlib.md5(
+        variant.encode(), usedforsecurity=False).hexdigest()
+    return f'courses:list:v{await aget_course_list_version()}:{digest}'
+
+
+def get_or_render(key, render, timeout=FRAGMENT_TIMEOUT):
+    """Return a cached fragment, rendering it at most once per miss.
+
+    Args:
+        key (str): The cache key.
+        render (callable): Produces the fragment on a miss.
+        timeout (int): Cache timeout in seconds.
+
+    Returns:
+        str: The cached or freshly rendered fragment.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = render()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    # The owner failed or is too slow: render without waiting any longer.
+    value = render()
+    cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_render(key, render, timeout=FRAGMENT_TIMEOUT):
+    """Async variant of get_or_render; ``render`` is a coroutine function.
+
+    Args:
+        key (str): The cache key.
+        render (callable): Coroutine function producing the fragment.
+        timeout (int): Cache timeout in seconds.
+
+    Returns:
+        str: The cached or freshly rendered fragment.
+    """
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = await render()
+            await cache.aset(key, value, timeout)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await cache.aget(key)
+        if value is not None:
+            return value
+        if await cache.aget(lock_key) is None:
+            break
+    value = await render()
+    await cache.aset(key, value, timeout)
+    return value
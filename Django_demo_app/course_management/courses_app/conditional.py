@@ -0,0 +1,116 @@
+"""HTTP validators (ETag / Last-Modified) for course pages and APIs."""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .cache import (aget_catalog_changed, aget_course_list_version,
+                    aget_enrollment_version, get_catalog_changed,
+                    get_course_list_version, get_enrollment_version)
+from .models import Course
+
+CATALOG_AGGREGATES = {
+    'count': Count('id'),
+    'max_id': Max('id'),
+}
+
+
+def last_modified(changed):
+    """Return a change time that is safe to send as Last-Modified.
+
+    HTTP dates have a resolution of one second, so a change made later
+    within the current second would carry the same date as a response
+    sent now. Such recent times are withheld; the ETag still applies.
+
+    Args:
+        changed (datetime): When the catalog last changed, or None.
+
+    Returns:
+        datetime: The change time, or None if it is in the current
+        second.
+    """
+    if changed is None or changed >= timezone.now().replace(microsecond=0):
+        return None
+    return changed
+
+
+def catalog_state():
+    """Summarize the course catalog with one aggregate query.
+
+    The result is cached under the current course list version, so it is
+    recomputed only after a course changes. Enrollments change only the
+    ``enrollments`` version, which is read from the cache. The change
+    time is the last catalog change recorded by the cache versions;
+    unlike the newest ``updated_at`` it also moves when a course is
+    deleted.
+
+    Returns:
+        dict: ``count``, ``max_id``, the ``enrollments`` version, the
+        ``changed`` time and the ``last_modified`` date of the catalog.
+    """
+    key = f'courses:state:v{get_course_list_version()}'
+    state = cache.get(key)
+    if state is None:
+        state = Course.objects.aggregate(**CATALOG_AGGREGATES)
+        cache.set(key, state, None)
+    changed = get_catalog_changed()
+    return {**state, 'enrollments': get_enrollment_version(),
+            'changed': changed, 'last_modified': last_modified(changed)}
+
+
+async def acatalog_state():
+    """Async variant of catalog_state.
+
+    Returns:
+        dict: ``count``, ``max_id``, the ``enrollments`` version, the
+        ``changed`` time and the ``last_modified`` date of the catalog.
+    """
+    key = f'courses:state:v{await aget_course_list_version()}'
+    state = await cache.aget(key)
+    if state is None:
+        state = await Course.objects.aaggregate(**CATALOG_AGGREGATES)
+        await cache.aset(key, state, None)
+    changed = await aget_catalog_changed()
+    return {**state, 'enrollments': await aget_enrollment_version(),
+            'changed': changed, 'last_modified': last_modified(changed)}
+
+
+def catalog_etag(state, variant=''):
+    """Build an ETag for a view of the catalog.
+
+    Args:
+        state (dict): The result of :func:`catalog_state`.
+        variant (str): What else the response depends on, e.g. the query
+            string.
+
+    Returns:
+        str: The unquoted ETag value.
+    """
+    changed = state['changed']
+    raw = ':'.join((
+        str(state['count']),
+        str(state['max_id']),
+        str(state['enrollments']),
+        changed.isoformat() if changed else '',
+        variant,
+    ))
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def course_etag(course, variant=''):
+    """Build an ETag for a single course.
+
+    The enrollment counter is part of the representation; it is included
+    explicitly so the ETag changes even if only the counter is written.
+
+    Args:
+        course (Course): The course the response shows.
+        variant (str): What else the response depends on.
+
+    Returns:
+        str: The unquoted ETag value.
+    """
+    raw = (f'{course.pk}:{course.updated_at.isoformat()}:'
+           f'{course.enrollment_count}:{variant}')
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
@@ -0,0 +1,258 @@
+"""Enrollment service for the courses app.
+
+Single enrollments are one ``INSERT ... ON CONFLICT DO NOTHING`` round
+trip, so concurrent requests for the same user and course never race the
+``unique_together`` constraint. Bulk enrollments go through batched
+``bulk_create(ignore_conflicts=True)``.
+
+Every path keeps ``Course.enrollment_count`` in step in the same
+transaction. ``Course.updated_at`` is left alone, as it records edits
+of the course itself; the course ETag includes the counter instead.
+Single enrollments adjust it with ``F()``; bulk paths cannot
+tell how many rows were skipped as duplicates, so they recount the
+affected courses. Drift from other paths (e.g. cascading user deletes)
+is repaired by the ``reconcile_enrollment_counts`` command.
+
+Enrollments do not invalidate the cached course list fragments. The
+fragments mark every counter with ``data-enrollments``, and
+:func:`fill_enrollment_counts` replaces the marked values with the live
+counters of the page's courses, read with one primary-key query.
+"""
+import re
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .cache import bump_enrollment_version
+from .models import Course, Enrollment
+
+DEFAULT_BATCH_SIZE = 1000
+ENROLLMENT_COUNT_RE = re.compile(r'(data-enrollments="(\d+)">)\d*(<)')
+
+
+def enroll(user, course):
+    """Enroll a user in a course unless already enrolled.
+
+    Args:
+        user (User): The user to enroll.
+        course (Course): The course to enroll in.
+
+    Returns:
+        bool: True if a new enrollment row was inserted.
+    """
+    using = router.db_for_write(Enrollment)
+    with transaction.atomic(using=using):
+        created = _insert_enrollment(user, course, using)
+        if created:
+            Course.objects.using(using).filter(pk=course.pk).update(
+                enrollment_count=F('enrollment_count') + 1)
+            transaction.on_commit(bump_enrollment_version, using=using)
+    return created
+
+
+def unenroll(user, course):
+    """Remove a user's enrollment in a course, if any.
+
+    Args:
+        user (User): The enrolled user.
+        course (Course): The course to leave.
+
+    Returns:
+        bool: True if an enrollment row was deleted.
+    """
+    using = router.db_for_write(Enrollment)
+    with transaction.atomic(using=using):
+        deleted, _ = Enrollment.objects.using(using).filter(
+            user=user, course=course).delete()
+        if deleted:
+            Course.objects.using(using).filter(
+                pk=course.pk, enrollment_count__gt=0,
+            ).update(enrollment_count=F('enrollment_count') - 1)
+            transaction.on_commit(bump_enrollment_version, using=using)
+    return bool(deleted)
+
+
+def _insert_enrollment(user, course, using):
+    """Insert one enrollment row unless it already exists.
+
+    Args:
+        user (User): The user to enroll.
+        course (Course): The course to enroll in.
+        using (str): The database alias.
+
+    Returns:
+        bool: True if a row was inserted.
+    """
+    connection = connections[using]
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        _, created = Enrollment.objects.using(using).get_or_create(
+            user=user, course=course)
+        return created
+
+    opts = Enrollment._meta
+    quote = connection.ops.quote_name
+    user_col, course_col, enrolled_col = (
+        quote(opts.get_field(name).column)
+        for name in ('user', 'course', 'enrolled_at'))
+    enrolled_at = opts.get_field('enrolled_at').get_db_prep_value(
+        timezone.now(), connection)
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} '
+        f'({user_col}, {course_col}, {enrolled_col}) VALUES (%s, %s, %s) '
+        f'ON CONFLICT ({user_col}, {course_col}) DO NOTHING'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, course.pk, enrolled_at])
+        return cursor.rowcount == 1
+
+
+def enroll_users(course, users, batch_size=DEFAULT_BATCH_SIZE):
+    """Enroll many users in one course, skipping existing enrollments.
+
+    Args:
+        course (Course | int): The course or its primary key.
+        users (iterable): Users or user primary keys.
+        batch_size (int): Rows per INSERT statement.
+
+    Returns:
+        int: Number of enrollment rows submitted.
+    """
+    course_id = getattr(course, 'pk', course)
+    rows = (
+        Enrollment(user_id=getattr(user, 'pk', user), course_id=course_id)
+        for user in users
+    )
+    return _bulk_insert(rows, batch_size)
+
+
+def enroll_in_courses(user, courses, batch_size=DEFAULT_BATCH_SIZE):
+    """Enroll one user in many courses, skipping existing enrollments.
+
+    Args:
+        user (User | int): The user or its primary key.
+        courses (iterable): Courses or course primary keys.
+        batch_size (int): Rows per INSERT statement.
+
+    Returns:
+        int: Number of enrollment rows submitted.
+    """
+    user_id = getattr(user, 'pk', user)
+    rows = (
+        Enrollment(user_id=user_id, course_id=getattr(course, 'pk', course))
+        for course in courses
+    )
+    return _bulk_insert(rows, batch_size)
+
+
+def recount_enrollments(course_ids):
+    """Set the enrollment counters of courses from the actual rows.
+
+    Only courses whose counter changes are written.
+
+    Args:
+        course_ids (iterable): Primary keys of the courses to recount.
+
+    Returns:
+        int: Number of courses updated.
+    """
+    counts = (
+        Enrollment.objects
+        .filter(course=OuterRef('pk'))
+        .values('course')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    actual = Coalesce(Subquery(counts), 0)
+    return (
+        Course.objects
+        .filter(pk__in=list(course_ids))
+        .exclude(enrollment_count=actual)
+        .update(enrollment_count=actual)
+    )
+
+
+def _bulk_insert(rows, batch_size):
+    """Insert enrollment rows in batches, ignoring duplicates.
+
+    Each batch is one transaction that also recounts the courses it
+    touched.
+
+    Args:
+        rows (iterator): Unsaved Enrollment instances.
+        batch_size (int): Rows per INSERT statement.
+
+    Returns:
+        int: Number of rows submitted.
+    """
+    submitted = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            Enrollment.objects.bulk_create(batch, ignore_conflicts=True)
+            recount_enrollments({row.course_id for row in batch})
+        submitted += len(batch)
+    if submitted:
+        bump_enrollment_version()
+    return submitted
+
+
+def fill_enrollment_counts(fragment):
+    """Put the live enrollment counters into a rendered course list.
+
+    Args:
+        fragment (str): A course list rendered by
+            ``courses_app/course_list.html``, possibly from the cache.
+
+    Returns:
+        str: The fragment with current counters.
+    """
+    course_ids = {int(pk) for _, pk, _ in ENROLLMENT_COUNT_RE.findall(
+        fragment)}
+    if not course_ids:
+        return fragment
+    counts = dict(Course.objects.filter(pk__in=course_ids).values_list(
+        'pk', 'enrollment_count'))
+    return _replace_counts(fragment, counts)
+
+
+async def afill_enrollment_counts(fragment):
+    """Async variant of fill_enrollment_counts.
+
+    Args:
+        fragment (str): A rendered course list.
+
+    Returns:
+        str: The fragment with current counters.
+    """
+    course_ids = {int(pk) for _, pk, _ in ENROLLMENT_COUNT_RE.findall(
+        fragment)}
+    if not course_ids:
+        return fragment
+    counts = {
+        pk: count async for pk, count in Course.objects.filter(
+            pk__in=course_ids).values_list('pk', 'enrollment_count')
+    }
+    return _replace_counts(fragment, counts)
+
+
+def _replace_counts(fragment, counts):
+    """Replace the marked counters of a fragment.
+
+    Args:
+        fragment (str): A rendered course list.
+        counts (dict): Enrollment counters by course id; courses deleted
+            since the fragment was rendered show 0.
+
+    Returns:
+        str: The fragment with the given counters.
+    """
+    return mark_safe(ENROLLMENT_COUNT_RE.sub(
+        lambda match: (f'{match[1]}{counts.get(int(match[2]), 0)}'
+                       f'{match[3]}'),
+        fragment))
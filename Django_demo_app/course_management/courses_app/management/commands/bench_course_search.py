@@ -0,0 +1,158 @@
+"""Benchmark full-text course search against the old icontains filters."""
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from course_management.benchmarking import format_summary, summarize, timed
+from courses_app.models import Course
+from courses_app.search import filter_icontains, search_courses
+
+User = get_user_model()
+
+VOCABULARY = (
+    'python django database index query cache async search course lesson '
+    'student teacher backend frontend design pattern algorithm network '
+    'security testing deployment docker postgres sqlite linux cloud data '
+    'science machine learning statistics analytics web api rest graphql '
+    'performance profiling memory thread process queue stream batch'
+).split()
+SYLLABLES = 'ba ko ri mu te sa no vi le da pu ge zo fa ni'.split()
+
+
+def build_vocabulary(rng, size=20_000):
+    """Build a vocabulary of common topic words plus rare synthetic words.
+
+    Args:
+        rng (Random): Random generator.
+        size (int): Number of synthetic words.
+
+    Returns:
+        list: Words ordered from most to least frequent.
+    """
+    rare = {''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            for _ in range(size)}
+    return VOCABULARY + sorted(rare - set(VOCABULARY))
+
+
+class Command(BaseCommand):
+    """Compare indexed full-text search with icontains at several sizes."""
+
+    help = ('Benchmark course search (full-text vs icontains) on '
+            'synthetic catalogs. All generated rows are rolled back.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help='Catalog sizes to benchmark.')
+        parser.add_argument(
+            '--queries', type=int, default=50,
+            help='Number of random queries per size.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk_create batch when seeding.')
+        parser.add_argument(
+            '--seed', type=int, default=42, help='Random seed.')
+
+    def handle(self, *args, **options):
+        """Run the benchmark for every requested size.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        rng = random.Random(options['seed'])
+        vocabulary = build_vocabulary(rng)
+        # Zipf-like frequencies: a few common words, a long tail of rare ones.
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, len(vocabulary) + 1)))
+        self.vocabulary = vocabulary
+        self.stdout.write(f'Backend: {connection.vendor}')
+        for size in sorted(options['sizes']):
+            with transaction.atomic():
+                self._seed(size, options['batch_size'], rng)
+                queries = [self._random_query(rng)
+                           for _ in range(options['queries'])]
+                self._run(size, queries)
+                transaction.set_rollback(True)
+
+    def _seed(self, size, batch_size, rng):
+        """Insert a synthetic catalog of the given size.
+
+        Args:
+            size (int): Number of courses.
+            batch_size (int): Rows per INSERT batch.
+            rng (Random): Random generator.
+        """
+        owner = User.objects.create_user(
+            email='bench-search@example.com', phone_number='000000000',
+            username='bench-search')
+        started = time.perf_counter()
+        for offset in range(0, size, batch_size):
+            Course.objects.bulk_create([
+                Course(
+                    title=self._words(rng, 4),
+                    description=self._words(rng, 60),
+                    created_by=owner,
+                )
+                for _ in range(min(batch_size, size - offset))
+            ])
+        self.stdout.write(
+            f'\n{size} courses seeded in '
+            f'{time.perf_counter() - started:.1f}s')
+
+    def _words(self, rng, count):
+        """Draw words from the Zipf-weighted vocabulary.
+
+        Args:
+            rng (Random): Random generator.
+            count (int): Number of words.
+
+        Returns:
+            str: The words joined by spaces.
+        """
+        return ' '.join(rng.choices(
+            self.vocabulary, cum_weights=self.cum_weights, k=count))
+
+    def _random_query(self, rng):
+        """Build a query of one or two words, the last one a prefix.
+
+        Args:
+            rng (Random): Random generator.
+
+        Returns:
+            str: The query string.
+        """
+        words = rng.sample(self.vocabulary, rng.choice([1, 2]))
+        words[-1] = words[-1][:max(3, len(words[-1]) - 2)]
+        return ' '.join(words)
+
+    def _run(self, size, queries):
+        """Time both search paths fetching the first page of results.
+
+        Args:
+            size (int): Catalog size, for the report.
+            queries (list): Query strings to run.
+        """
+        base = Course.objects.only('id', 'title')
+        cases = {
+            'icontains': lambda query: filter_icontains(
+                base, query, ['title', 'description']).order_by('-id'),
+            'full-text': lambda query: search_courses(base, query),
+        }
+        for label, build in cases.items():
+            samples = []
+            for query in queries:
+                with timed(samples):
+                    list(build(query)[:20])
+            self.stdout.write(
+                format_summary(f'{label} @ {size}', summarize(samples)))
@@ -0,0 +1,141 @@
+"""Compare WSGI and ASGI throughput of the read-only course pages."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+from course_management.benchmarking import format_summary, summarize
+
+# Pairs of (synchronous view, async variant) serving the same page.
+PAGES = [
+    ('home', '/', '/async/'),
+    ('courses', '/courses_app/courses_page/',
+     '/courses_app/async/courses_page/'),
+    ('user info', '/accounts/user_info/', '/accounts/async/user_info/'),
+]
+
+
+class Command(BaseCommand):
+    """Drive the sync views through WSGI and the async ones through ASGI.
+
+    WSGI workers are modelled as a fixed thread pool, one request per
+    thread at a time. ASGI runs every request in one event loop, with
+    ``--concurrency`` requests in flight. ``--client-delay`` keeps each
+    request's worker busy for a while after the response, as a slow client
+    reading it would; this is where the event loop pulls ahead.
+    """
+
+    help = ('Benchmark the sync course pages under WSGI against their '
+            'async variants under ASGI, in-process, on the current data.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests per page and server.')
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='WSGI worker threads.')
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Requests in flight on the ASGI event loop.')
+        parser.add_argument(
+            '--client-delay', type=float, default=0.0,
+            help='Seconds a slow client holds its worker per request.')
+
+    def handle(self, *args, **options):
+        """Run the benchmark for every page.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=hosts):
+            for label, sync_path, async_path in PAGES:
+                self._report(f'{label} (WSGI)', *self._run_wsgi(
+                    sync_path, options['requests'], options['threads'],
+                    options['client_delay']))
+                self._report(f'{label} (ASGI)', *asyncio.run(self._run_asgi(
+                    async_path, options['requests'],
+                    options['concurrency'], options['client_delay'])))
+
+    @staticmethod
+    def _run_wsgi(path, requests, threads, delay):
+        """Send requests to a sync view from a pool of worker threads.
+
+        Args:
+            path (str): The URL to request.
+            requests (int): Number of requests.
+            threads (int): Worker threads.
+            delay (float): Seconds each worker stays busy after responding.
+
+        Returns:
+            tuple: Latency samples in seconds and total elapsed seconds.
+        """
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            start = time.perf_counter()
+            response = local.client.get(path)
+            response.close()
+            time.sleep(delay)
+            return time.perf_counter() - start, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(fetch, range(requests)))
+        return results, time.perf_counter() - started
+
+    @staticmethod
+    async def _run_asgi(path, requests, concurrency, delay):
+        """Send requests to an async view from one event loop.
+
+        Args:
+            path (str): The URL to request.
+            requests (int): Number of requests.
+            concurrency (int): Requests in flight at once.
+            delay (float): Seconds each request stays open after responding.
+
+        Returns:
+            tuple: Latency samples in seconds and total elapsed seconds.
+        """
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.get(path)
+                await asyncio.sleep(delay)
+                return time.perf_counter() - start, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(fetch() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    def _report(self, label, results, elapsed):
+        """Print latency percentiles, throughput and unexpected statuses.
+
+        Args:
+            label (str): Name of the measured case.
+            results (list): (latency, status code) pairs.
+            elapsed (float): Total wall clock seconds.
+        """
+        samples = [latency for latency, _ in results]
+        errors = sum(1 for _, status in results if status >= 400)
+        self.stdout.write(
+            f'{format_summary(label, summarize(samples))} '
+            f'{len(samples) / elapsed:8.1f} req/s')
+        if errors:
+            self.stderr.write(f'{label}: {errors} error responses')
@@ -0,0 +1,269 @@
+"""Stream courses from CSV or JSONL files into the database."""
+import csv
+import io
+import json
+import os
+import time
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from courses_app.cache import bump_course_list_version
+from courses_app.forms import CourseForm
+from courses_app.models import Course
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Import courses in constant memory, resumable from a checkpoint."""
+
+    help = ('Import courses from a CSV (with a header row) or JSONL file. '
+            'Rows are validated with the CourseForm field rules and '
+            'inserted in batches.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument('path', help='CSV or JSONL file to import.')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Input format; guessed from the file extension by default.')
+        parser.add_argument(
+            '--created-by', required=True,
+            help='Email of the user recorded as the creator of the courses.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per INSERT/COPY batch and per transaction.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <path>.checkpoint).')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore an existing checkpoint and start from the top.')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even when PostgreSQL COPY is available.')
+        parser.add_argument(
+            '--report-every', type=float, default=5.0,
+            help='Seconds between progress reports.')
+
+    def handle(self, *args, **options):
+        """Run the import.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+
+        Raises:
+            CommandError: If the input or the creator is invalid.
+        """
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'File not found: {path}')
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError(
+                'Cannot guess the format; pass --format csv or jsonl.')
+        try:
+            self.creator = User.objects.get(email=options['created_by'])
+        except User.DoesNotExist as exc:
+            raise CommandError(
+                f'No user with email {options["created_by"]}.') from exc
+
+        self.fields = {
+            name: CourseForm.base_fields[name]
+            for name in CourseForm._meta.fields
+        }
+        checkpoint = Path(
+            options['checkpoint'] or f'{path}.checkpoint')
+        start_row = 0 if options['restart'] else self._read_checkpoint(
+            checkpoint, path)
+        insert = (self._insert_bulk_create if options['no_copy']
+                  or not self._copy_available() else self._insert_copy)
+
+        imported = rejected = 0
+        row_number = start_row
+        started = last_report = time.monotonic()
+        with path.open(newline='', encoding='utf-8') as source:
+            rows = islice(self._read_rows(source, file_format), start_row,
+                          None)
+            while True:
+                raw_batch = list(islice(rows, options['batch_size']))
+                if not raw_batch:
+                    break
+                batch = []
+                for offset, raw in enumerate(raw_batch, start=1):
+                    course = self._build(raw, row_number + offset)
+                    if course is None:
+                        rejected += 1
+                    else:
+                        batch.append(course)
+                row_number += len(raw_batch)
+                with transaction.atomic():
+                    insert(batch)
+                    # Only once the batch is committed, also when the
+                    # command runs inside an outer transaction. Bumping
+                    # per batch shows committed courses even if a later
+                    # batch fails.
+                    if batch:
+                        transaction.on_commit(bump_course_list_version)
+                    transaction.on_commit(partial(
+                        self._write_checkpoint, checkpoint, path,
+                        row_number))
+                imported += len(batch)
+
+                now = time.monotonic()
+                if now - last_report >= options['report_every']:
+                    last_report = now
+                    self._report(imported, rejected, now - started)
+
+        self._report(imported, rejected, time.monotonic() - started)
+        transaction.on_commit(partial(checkpoint.unlink, missing_ok=True))
+
+    @staticmethod
+    def _read_rows(source, file_format):
+        """Yield raw rows from the input, one at a time.
+
+        Args:
+            source (file): The open input file.
+            file_format (str): Either 'csv' or 'jsonl'.
+
+        Yields:
+            dict | str: A CSV row dict, or an undecoded JSONL line.
+        """
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield line
+
+    def _build(self, raw, row_number):
+        """Validate a raw row and turn it into an unsaved Course.
+
+        Args:
+            raw (dict | str): A CSV row dict or a JSONL line.
+            row_number (int): 1-based data row number, for messages.
+
+        Returns:
+            Course: The course, or None if the row is invalid.
+        """
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except json.JSONDecodeError as exc:
+                self.stderr.write(f'Row {row_number}: invalid JSON: {exc}')
+                return None
+            if not isinstance(raw, dict):
+                self.stderr.write(f'Row {row_number}: expected an object.')
+                return None
+        cleaned = {}
+        for name, field in self.fields.items():
+            try:
+                cleaned[name] = field.clean(raw.get(name))
+            except ValidationError as exc:
+                self.stderr.write(
+                    f'Row {row_number}: {name}: {" ".join(exc.messages)}')
+                return None
+        return Course(created_by=self.creator, **cleaned)
+
+    @staticmethod
+    def _insert_bulk_create(batch):
+        """Insert a batch with one multi-row INSERT.
+
+        Args:
+            batch (list): Unsaved courses.
+        """
+        Course.objects.bulk_create(batch)
+
+    @staticmethod
+    def _copy_available():
+        """Check whether the connection can stream rows with COPY.
+
+        Returns:
+            bool: True on PostgreSQL with psycopg2.
+        """
+        return (connection.vendor == 'postgresql'
+                and connection.Database.__name__ == 'psycopg2')
+
+    @staticmethod
+    def _insert_copy(batch):
+        """Insert a batch through PostgreSQL ``COPY ... FROM STDIN``.
+
+        Args:
+            batch (list): Unsaved courses.
+        """
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for course in batch:
+            writer.writerow([course.title, course.description, now, now,
+                             course.created_by_id, 0])
+        buffer.seek(0)
+        opts = Course._meta
+        columns = ', '.join(
+            connection.ops.quote_name(opts.get_field(name).column)
+            for name in ('title', 'description', 'created_at', 'updated_at',
+                         'created_by', 'enrollment_count'))
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(opts.db_table)} '
+                f'({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    @staticmethod
+    def _read_checkpoint(checkpoint, path):
+        """Return the number of rows already imported from the file.
+
+        Args:
+            checkpoint (Path): The checkpoint file.
+            path (Path): The input file.
+
+        Returns:
+            int: Data rows to skip.
+        """
+        try:
+            data = json.loads(checkpoint.read_text())
+        except (OSError, ValueError):
+            return 0
+        if data.get('source') != str(path.resolve()):
+            return 0
+        return int(data.get('rows', 0))
+
+    @staticmethod
+    def _write_checkpoint(checkpoint, path, rows):
+        """Atomically record how many rows have been committed.
+
+        Args:
+            checkpoint (Path): The checkpoint file.
+            path (Path): The input file.
+            rows (int): Data rows committed so far.
+        """
+        temporary = checkpoint.with_name(f'{checkpoint.name}.tmp')
+        temporary.write_text(json.dumps(
+            {'source': str(path.resolve()), 'rows': rows}))
+        os.replace(temporary, checkpoint)
+
+    def _report(self, imported, rejected, elapsed):
+        """Print progress with the current throughput.
+
+        Args:
+            imported (int): Rows inserted so far.
+            rejected (int): Invalid rows skipped so far.
+            elapsed (float): Seconds since the import started.
+        """
+        rate = imported / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f'{imported} imported, {rejected} rejected, '
+            f'{rate:.0f} rows/s')
@@ -0,0 +1,76 @@
+"""Repair drift in the denormalized Course.enrollment_count column."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from courses_app.cache import bump_enrollment_version
+from courses_app.models import Course, Enrollment
+
+
+class Command(BaseCommand):
+    """Recount enrollments and fix courses whose counter drifted."""
+
+    help = ('Compare Course.enrollment_count with the Enrollment rows and '
+            'repair mismatches, walking courses in primary-key batches.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Courses checked per batch and per transaction.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report mismatches without fixing them.')
+
+    def handle(self, *args, **options):
+        """Walk all courses in batches and repair their counters.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = repaired = 0
+        while True:
+            with transaction.atomic():
+                courses = list(
+                    Course.objects
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .select_for_update()
+                    .only('id', 'enrollment_count')[:batch_size]
+                )
+                if not courses:
+                    break
+                last_pk = courses[-1].pk
+                actual = dict(
+                    Enrollment.objects
+                    .filter(course_id__gte=courses[0].pk,
+                            course_id__lte=last_pk)
+                    .values_list('course_id')
+                    .annotate(total=Count('id'))
+                )
+                drifted = []
+                for course in courses:
+                    total = actual.get(course.pk, 0)
+                    if course.enrollment_count != total:
+                        self.stdout.write(
+                            f'Course {course.pk}: '
+                            f'{course.enrollment_count} -> {total}')
+                        course.enrollment_count = total
+                        drifted.append(course)
+                if drifted and not options['dry_run']:
+                    Course.objects.bulk_update(drifted, ['enrollment_count'])
+                checked += len(courses)
+                repaired += len(drifted)
+
+        if repaired and not options['dry_run']:
+            bump_enrollment_version()
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(
+            f'{checked} courses checked, {repaired} counters {action}.')
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses_app', '0002_course_created_by'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['created_at', 'id'], name='course_created_at_id_idx'),
+        ),
+    ]
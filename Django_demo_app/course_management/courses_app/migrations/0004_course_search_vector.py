@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:39
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+from courses_app.search import install_search_index, uninstall_search_index
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses_app', '0003_course_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='CourseSearchIndex',
+            fields=[
+                ('course', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='courses_app.course')),
+                ('document', models.TextField(db_column='courses_app_course_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'courses_app_course_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from courses_app.search import install_search_index
+
+
+def backfill_enrollment_count(apps, schema_editor):
+    Course = apps.get_model('courses_app', 'Course')
+    Enrollment = apps.get_model('courses_app', 'Enrollment')
+    counts = (
+        Enrollment.objects
+        .filter(course=OuterRef('pk'))
+        .values('course')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Course.objects.update(
+        enrollment_count=Coalesce(Subquery(counts), 0))
+
+
+def reinstall_search_index(apps, schema_editor):
+    # SQLite rebuilds the table to add the column, dropping its triggers.
+    install_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses_app', '0004_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+        migrations.RunPython(
+            backfill_enrollment_count, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,24 @@
 """Mixins for the courses app."""
+import base64
+import json
+import logging
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date
 
+from .enrollment import enroll
 from .models import Course
+from .search import filter_icontains, search_courses
+
+logger = logging.getLogger(__name__)
 
 
 # 1. LoginRequiredMixin (Inherits from Django's built-in LoginRequiredMixin)
@@ -22,12 +36,41 @@ class LoginRequiredMixin:
         Returns:
             HttpResponse: The response from the view.
         """
+        if self.view_is_async:
+            return self.__adispatch(request, *args, **kwargs)
         if not request.user.is_authenticated:
-            messages.error(
-                request, 'You must be logged in to access this page.')
-            return redirect('login')
+            return self.handle_no_login(request)
         return super().dispatch(request, *args, **kwargs)
 
+    async def __adispatch(self, request, *args, **kwargs):
+        """Check authentication without blocking the event loop.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_no_login(request)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def handle_no_login(self, request):
+        """Redirect anonymous users to the login page.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The redirect response.
+        """
+        messages.error(
+            request, 'You must be logged in to access this page.')
+        return redirect('login')
+
 
 # 2. AdminRequiredMixin
 class AdminRequiredMixin:
@@ -47,10 +90,31 @@ class AdminRequiredMixin:
         Returns:
             HttpResponse: The response from the view.
         """
+        if self.view_is_async:
+            return self.__adispatch(request, *args, **kwargs)
         if not request.user.is_staff:
             raise Http404('You do not have permission to view this page.')
         return super().dispatch(request, *args, **kwargs)
 
+    async def __adispatch(self, request, *args, **kwargs):
+        """Check staff status without blocking the event loop.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Raises:
+            Http404: If the user is not an admin.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        user = await request.auser()
+        if not user.is_staff:
+            raise Http404('You do not have permission to view this page.')
+        return await super().dispatch(request, *args, **kwargs)
+
 
 # 3. LoggingMixin
 class LoggingMixin:
@@ -67,11 +131,34 @@ class LoggingMixin:
         Returns:
             HttpResponse: The response from the view.
         """
-        print(
-            f'User: {request.user.username} is accessing the '
-            f'{self.__class__.__name__} view.')
+        if self.view_is_async:
+            return self.__adispatch(request, *args, **kwargs)
+        self.log_access(request.user)
         return super().dispatch(request, *args, **kwargs)
 
+    async def __adispatch(self, request, *args, **kwargs):
+        """Log the user accessing the view without blocking the event loop.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        self.log_access(await request.auser())
+        return await super().dispatch(request, *args, **kwargs)
+
+    def log_access(self, user):
+        """Log that the user is accessing the view.
+
+        Args:
+            user (User): The requesting user.
+        """
+        logger.info('User: %s is accessing the %s view.',
+                    user.username, self.__class__.__name__)
+
 
 # 4. OwnerRequiredMixin
 class OwnerRequiredMixin:
@@ -145,10 +232,66 @@ class FormSuccessMessageMixin:
 
 
 # 7. PaginationMixin
+class CursorPage:
+    """A keyset page of objects with opaque cursors to its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        """Store the page objects and the cursors around them.
+
+        Args:
+            object_list (list): The objects on this page.
+            next_cursor (str): Cursor of the following page, if any.
+            previous_cursor (str): Cursor of the preceding page, if any.
+        """
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        """Iterate over the objects on the page.
+
+        Returns:
+            iterator: Iterator over the page objects.
+        """
+        return iter(self.object_list)
+
+    def __len__(self):
+        """Return the number of objects on the page.
+
+        Returns:
+            int: Number of objects on the page.
+        """
+        return len(self.object_list)
+
+    def has_next(self):
+        """Check whether a following page exists.
+
+        Returns:
+            bool: True if there is a following page.
+        """
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """Check whether a preceding page exists.
+
+        Returns:
+            bool: True if there is a preceding page.
+        """
+        return self.previous_cursor is not None
+
+
 class PaginationMixin:
-    """Handle pagination in views."""
+    """Handle pagination in views.
+
+    With ``pagination_mode = 'cursor'`` the queryset is paginated by keyset
+    over ``cursor_ordering`` instead of OFFSET, so every page costs one
+    index range scan no matter how deep the client has scrolled.
+    """
 
     paginate_by = 10
+    pagination_mode = 'page'
+    cursor_ordering = ('created_at', 'id')
+    cursor_query_param = 'cursor'
 
     def get_paginated_queryset(self, queryset):
         """Paginate the queryset based on the paginate_by attribute.
@@ -159,16 +302,240 @@ class PaginationMixin:
         Returns:
             Page: The paginated queryset.
         """
+        if self.get_pagination_mode() == 'cursor':
+            return self.get_cursor_page(queryset)
         paginator = Paginator(queryset, self.paginate_by)
-        page_number = self.request.GET.get('page')
-        return paginator.get_page(page_number)
+        return paginator.get_page(self.get_page_number())
+
+    def get_page_number(self):
+        """Return the requested page number in page mode.
+
+        Returns:
+            int: The ``page`` parameter, or 1 if it is missing, not a
+            number or below 1. Numbers past the last page are left to the
+            paginator.
+        """
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except (TypeError, ValueError):
+            return 1
+
+    def get_page_variant(self):
+        """Describe the requested page by its validated parameters.
+
+        Spellings of the same page, and parameters that do not select a
+        page, give the same variant, so it can key cached pages.
+
+        Raises:
+            Http404: If the cursor is malformed.
+
+        Returns:
+            str: The page number, or the decoded cursor position.
+        """
+        if self.get_pagination_mode() != 'cursor':
+            return str(self.get_page_number())
+        position, reverse = self.decode_cursor(
+            self.request.GET.get(self.cursor_query_param))
+        return json.dumps([position, reverse], cls=DjangoJSONEncoder)
+
+    def get_pagination_mode(self):
+        """Return the pagination mode for the current request.
+
+        Returns:
+            str: Either 'page' or 'cursor'.
+        """
+        return self.pagination_mode
+
+    async def aget_paginated_queryset(self, queryset):
+        """Async variant of get_paginated_queryset using the async ORM.
+
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+
+        Returns:
+            Page: The paginated queryset, with its objects loaded.
+        """
+        if self.get_pagination_mode() == 'cursor':
+            return await self.aget_cursor_page(queryset)
+        paginator = Paginator(queryset, self.paginate_by)
+        paginator.count = await queryset.acount()
+        page = paginator.get_page(self.get_page_number())
+        page.object_list = [obj async for obj in page.object_list]
+        return page
+
+    def get_cursor_page(self, queryset):
+        """Fetch one keyset page of the queryset.
+
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+
+        Returns:
+            CursorPage: The requested page with its neighbour cursors.
+        """
+        window, position, reverse = self._cursor_window(queryset)
+        return self._cursor_page(list(window), position, reverse)
+
+    async def aget_cursor_page(self, queryset):
+        """Async variant of get_cursor_page.
+
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+
+        Returns:
+            CursorPage: The requested page with its neighbour cursors.
+        """
+        window, position, reverse = self._cursor_window(queryset)
+        objects = [obj async for obj in window]
+        return self._cursor_page(objects, position, reverse)
+
+    def _cursor_window(self, queryset):
+        """Build the query for the page after the requested cursor.
+
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+
+        Returns:
+            tuple: The sliced queryset (one extra row to detect a following
+            page), the decoded position and the reverse flag.
+        """
+        position, reverse = self.decode_cursor(
+            self.request.GET.get(self.cursor_query_param))
+        ordering = self.cursor_ordering
+        if reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(
+                ordering, position))
+        return queryset[:self.paginate_by + 1], position, reverse
+
+    def _cursor_page(self, objects, position, reverse):
+        """Wrap fetched rows into a page with neighbour cursors.
+
+        Args:
+            objects (list): Rows fetched by the window query.
+            position (list): The decoded position, or None.
+            reverse (bool): Whether the page was fetched backwards.
+
+        Returns:
+            CursorPage: The page.
+        """
+        has_more = len(objects) > self.paginate_by
+        objects = objects[:self.paginate_by]
+        if reverse:
+            objects.reverse()
+
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(objects[-1], reverse=False)
+            if (has_more and reverse) or (not reverse and position):
+                previous_cursor = self.encode_cursor(objects[0], reverse=True)
+        return CursorPage(objects, next_cursor, previous_cursor)
+
+    def encode_cursor(self, obj, reverse=False):
+        """Build an opaque cursor pointing after (or before) an object.
+
+        Args:
+            obj (Model): The boundary object of a page.
+            reverse (bool): Whether the cursor walks backwards.
+
+        Returns:
+            str: URL-safe cursor string.
+        """
+        values = []
+        for field in self.cursor_ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps({'p': values, 'r': reverse}).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Decode a cursor produced by encode_cursor.
+
+        Args:
+            cursor (str): The cursor from the query string.
+
+        Raises:
+            Http404: If the cursor is malformed.
+
+        Returns:
+            tuple: The keyset position (or None) and the reverse flag.
+        """
+        if not cursor:
+            return None, False
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded))
+            values = data['p']
+            if len(values) != len(self.cursor_ordering):
+                raise ValueError('Cursor does not match the ordering.')
+            position = [
+                self._parse_value(field, value)
+                for field, value in zip(self.cursor_ordering, values)]
+            return position, bool(data.get('r'))
+        except (ValueError, TypeError, KeyError) as exc:
+            raise Http404('Invalid cursor.') from exc
+
+    def _parse_value(self, field, value):
+        """Convert a cursor value back to the model field type.
+
+        Args:
+            field (str): The ordering field name.
+            value: The raw JSON value.
+
+        Returns:
+            The value converted by the model field.
+        """
+        model_field = self.model._meta.get_field(field.lstrip('-'))
+        return model_field.to_python(value)
+
+    @staticmethod
+    def _flip(field):
+        """Reverse the direction of an ordering field.
+
+        Args:
+            field (str): The ordering field name.
+
+        Returns:
+            str: The same field ordered the other way.
+        """
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _keyset_filter(ordering, position):
+        """Build the row-value comparison for rows after the position.
+
+        Args:
+            ordering (tuple): The ordering fields, possibly prefixed by '-'.
+            position (list): The keyset values of the boundary row.
+
+        Returns:
+            Q: Filter selecting rows strictly after the boundary row.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_field, prev_value in zip(ordering[:index], position):
+                step &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= step
+        return condition
 
 
 # 8. SearchMixin
 class SearchMixin:
-    """Allow filtering or searching of a queryset based on GET parameters."""
+    """Allow filtering or searching of a queryset based on GET parameters.
+
+    By default a row matches when any of ``search_fields`` contains the
+    query. Views over courses can set ``full_text_search = True`` to use
+    the indexed, ranked search in :mod:`courses_app.search` instead.
+    """
 
     search_fields = []
+    full_text_search = False
 
     def get_search_query(self):
         """Get the search query from GET parameters.
@@ -177,7 +544,24 @@ class SearchMixin:
             str: The search query string.
         """
         query = self.request.GET.get('search', '')
-        return query
+        return query.strip()
+
+    def search_queryset(self, queryset):
+        """Apply the search query to a queryset.
+
+        Args:
+            queryset (QuerySet): The queryset to search within.
+
+        Returns:
+            QuerySet: The filtered (and, for full-text search, ranked)
+            queryset.
+        """
+        query = self.get_search_query()
+        if not query:
+            return queryset
+        if self.full_text_search:
+            return search_courses(queryset, query)
+        return filter_icontains(queryset, query, self.search_fields)
 
     def get_queryset(self):
         """Get the filtered queryset based on the search query.
@@ -185,13 +569,7 @@ class SearchMixin:
         Returns:
             QuerySet: The filtered queryset.
         """
-        queryset = super().get_queryset()
-        query = self.get_search_query()
-        if query:
-            filters = {
-                f'{field}__icontains': query for field in self.search_fields}
-            queryset = queryset.filter(**filters)
-        return queryset
+        return self.search_queryset(super().get_queryset())
 
 
 # 9. EnrollmentCheckMixin
@@ -201,7 +579,7 @@ class EnrollmentCheckMixin:
     model = None
 
     def dispatch(self, request, *args, **kwargs):
-        """Check if the user is enrolled in the course.
+        """Enroll the user in the course if not enrolled yet.
 
         Args:
             request (HttpRequest): The HTTP request object.
@@ -211,12 +589,37 @@ class EnrollmentCheckMixin:
         Returns:
             HttpResponse: The response from the view.
         """
-        user = request.user
-        course = get_object_or_404(self.model, pk=kwargs['pk'])
-        if not course.enrollment_set.filter(user=user).exists():
-            course.enrollment_set.create(user=user)
+        if self.view_is_async:
+            return self.__adispatch(request, *args, **kwargs)
+        self.course = get_object_or_404(
+            self.model.objects.select_related('created_by'), pk=kwargs['pk'])
+        enroll(request.user, self.course)
         return super().dispatch(request, *args, **kwargs)
 
+    async def __adispatch(self, request, *args, **kwargs):
+        """Enroll the user without blocking the event loop.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Raises:
+            Http404: If the course does not exist.
+
+        Returns:
+            HttpResponse: The response from the view.
+        """
+        try:
+            self.course = await self.model.objects.select_related(
+                'created_by').aget(pk=kwargs['pk'])
+        except self.model.DoesNotExist as exc:
+            raise Http404('Course not found.') from exc
+        # The enrollment service needs a transaction, which the async ORM
+        # does not offer yet.
+        await sync_to_async(enroll)(await request.auser(), self.course)
+        return await super().dispatch(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         """Add course to the context.
 
@@ -227,8 +630,7 @@ class EnrollmentCheckMixin:
             dict: Context data for the template.
         """
         context = super().get_context_data(**kwargs)
-        course = get_object_or_404(Course, pk=kwargs['pk'])
-        context['course'] = course
+        context['course'] = self.course
         return context
 
 
@@ -255,3 +657,86 @@ class CourseExistsMixin:
         except Course.DoesNotExist as exc:
             raise Http404('Course not found.') from exc
         return super().dispatch(request, *args, **kwargs)
+
+
+# 11. ConditionalGetMixin
+class ConditionalGetMixin:
+    """Answer GET requests with 304 when the client copy is still fresh.
+
+    Subclasses provide the validators through ``get_etag`` and
+    ``get_last_modified``. Both run before the view renders anything, so
+    they should be cheap.
+    """
+
+    def get_etag(self):
+        """Return the ETag of the current response.
+
+        Returns:
+            str: The unquoted ETag, or None.
+        """
+        return None
+
+    def get_last_modified(self):
+        """Return when the current response last changed.
+
+        Returns:
+            datetime: The modification time, or None.
+        """
+        return None
+
+    def get(self, request, *args, **kwargs):
+        """Return 304 for a matching conditional request, else render.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A 304 response or the rendered page.
+        """
+        etag, last_modified = self.get_validators(
+            self.get_etag(), self.get_last_modified())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    @staticmethod
+    def get_validators(etag, last_modified):
+        """Normalize validators for get_conditional_response.
+
+        Args:
+            etag (str): The unquoted ETag, or None.
+            last_modified (datetime): The modification time, or None.
+
+        Returns:
+            tuple: The quoted ETag and the modification timestamp.
+        """
+        if etag is not None:
+            etag = quote_etag(etag)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return etag, last_modified
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        """Attach validators and revalidation headers to a response.
+
+        Args:
+            response (HttpResponse): The response to update.
+            etag (str): The quoted ETag, or None.
+            last_modified (int): The modification timestamp, or None.
+
+        Returns:
+            HttpResponse: The same response.
+        """
+        if response.status_code in (200, 304):
+            if etag is not None:
+                response.headers.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.headers.setdefault(
+                    'Last-Modified', http_date(last_modified))
+        patch_cache_control(response, no_cache=True)
+        return response
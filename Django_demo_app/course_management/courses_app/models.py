@@ -1,7 +1,10 @@
 """Django models for the courses app."""
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from .search import SQLITE_FTS_TABLE, FullTextMatch
+
 User = get_user_model()
 
 
@@ -18,6 +21,19 @@ class Course(models.Model):
         related_name='courses_created',
         default=1,
     )
+    # Maintained by courses_app.enrollment; repaired by the
+    # reconcile_enrollment_counts command.
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Maintained by a database trigger, see migration 0004.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        """Meta class for Course model."""
+
+        indexes = [
+            models.Index(fields=['created_at', 'id'],
+                         name='course_created_at_id_idx'),
+        ]
 
     def __str__(self):
         """Course model string representation.
@@ -28,6 +44,33 @@ class Course(models.Model):
         return str(self.title) if self.title else 'Untitled Course'
 
 
+class CourseSearchIndex(models.Model):
+    """Read-only mapping of the SQLite FTS5 course index.
+
+    The table only exists on SQLite; see :mod:`courses_app.search`.
+    """
+
+    course = models.OneToOneField(
+        Course,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_index',
+    )
+    document = models.TextField(db_column=SQLITE_FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        """Meta class for CourseSearchIndex model."""
+
+        managed = False
+        db_table = SQLITE_FTS_TABLE
+
+
+CourseSearchIndex._meta.get_field('document').register_lookup(FullTextMatch)
+
+
 class Enrollment(models.Model):
     """Model representing an enrollment of a user in a course."""
 
@@ -0,0 +1,282 @@
+"""Full-text search over course titles and descriptions.
+
+PostgreSQL keeps ``Course.search_vector`` up to date with a trigger and
+serves queries from a GIN index. SQLite (local and test setups) uses an
+FTS5 external-content table kept in sync by triggers. Any other backend
+falls back to OR-ed ``icontains`` filters.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.utils import OperationalError
+from django.db.models import F, Lookup, Q
+
+SEARCH_CONFIG = 'english'
+SQLITE_FTS_TABLE = 'courses_app_course_fts'
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+POSTGRESQL_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION courses_app_course_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+            || setweight(
+                to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE OR REPLACE TRIGGER courses_app_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON courses_app_course
+    FOR EACH ROW EXECUTE FUNCTION courses_app_course_search_vector_update();
+    """,
+    """
+    UPDATE courses_app_course SET title = title
+    WHERE search_vector IS NULL;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS course_search_vector_idx
+    ON courses_app_course USING GIN (search_vector);
+    """,
+]
+
+POSTGRESQL_UNINSTALL = [
+    'DROP INDEX IF EXISTS course_search_vector_idx;',
+    """
+    DROP TRIGGER IF EXISTS courses_app_course_search_vector_trigger
+    ON courses_app_course;
+    """,
+    'DROP FUNCTION IF EXISTS courses_app_course_search_vector_update();',
+]
+
+# Rebuilding a SQLite table (as its schema editor does for most
+# AlterField/AddField operations) drops these triggers, so migrations that
+# touch courses_app_course must call install_search_index() again.
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        title, description,
+        content='courses_app_course', content_rowid='id',
+        tokenize='porter unicode61'
+    );
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS courses_app_course_fts_insert
+    AFTER INSERT ON courses_app_course BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS courses_app_course_fts_delete
+    AFTER DELETE ON courses_app_course BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(
+            {SQLITE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS courses_app_course_fts_update
+    AFTER UPDATE OF title, description ON courses_app_course BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(
+            {SQLITE_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END;
+    """,
+    f"""
+    INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rank)
+    VALUES ('rank', 'bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})');
+    """,
+    f"""
+    INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild');
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS courses_app_course_fts_update;',
+    'DROP TRIGGER IF EXISTS courses_app_course_fts_delete;',
+    'DROP TRIGGER IF EXISTS courses_app_course_fts_insert;',
+    f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE};',
+]
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+_fts_available = {}
+
+
+def search_terms(query):
+    """Split a user query into plain word terms.
+
+    Args:
+        query (str): The raw search string.
+
+    Returns:
+        list: The word terms, punctuation and operators stripped.
+    """
+    return _TERM_RE.findall(query or '')
+
+
+def filter_icontains(queryset, query, fields):
+    """Filter a queryset by a substring match on any of the fields.
+
+    Args:
+        queryset (QuerySet): The queryset to filter.
+        query (str): The search string.
+        fields (list): Names of the fields to match against.
+
+    Returns:
+        QuerySet: Rows where at least one field contains the query.
+    """
+    if not query or not fields:
+        return queryset
+    conditions = [Q(**{f'{field}__icontains': query}) for field in fields]
+    return queryset.filter(reduce(or_, conditions))
+
+
+def search_courses(queryset, query):
+    """Rank courses matching every term of the query, allowing prefixes.
+
+    Args:
+        queryset (QuerySet): A Course queryset to search within.
+        query (str): The search string.
+
+    Returns:
+        QuerySet: Matching courses annotated with ``rank``, best first.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    if vendor == 'sqlite' and sqlite_fts_available(queryset.db):
+        return _search_sqlite(queryset, terms)
+    return filter_icontains(
+        queryset, ' '.join(terms), ['title', 'description'])
+
+
+def sqlite_fts_available(using='default'):
+    """Check whether the FTS5 course index exists on a SQLite database.
+
+    Args:
+        using (str): The database alias.
+
+    Returns:
+        bool: True if the FTS5 table was created by the migrations.
+    """
+    if using not in _fts_available:
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            _fts_available[using] = (
+                SQLITE_FTS_TABLE
+                in connection.introspection.table_names(cursor))
+    return _fts_available[using]
+
+
+def install_search_index(schema_editor):
+    """Create the search index and its sync triggers for the backend.
+
+    Safe to run repeatedly; used by migrations.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRESQL_INSTALL
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_INSTALL[0])
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains.
+            return
+        statements = SQLITE_INSTALL[1:]
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+    _fts_available.clear()
+
+
+def uninstall_search_index(schema_editor):
+    """Drop the search index and its sync triggers.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): The migration editor.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+    _fts_available.clear()
+
+
+def _search_postgresql(queryset, terms):
+    """Search the GIN-indexed tsvector column.
+
+    Args:
+        queryset (QuerySet): A Course queryset to search within.
+        terms (list): Word terms of the query.
+
+    Returns:
+        QuerySet: Matching courses ranked by ts_rank.
+    """
+    raw = ' & '.join(f'{term}:*' for term in terms)
+    search_query = SearchQuery(
+        raw, search_type='raw', config=SEARCH_CONFIG)
+    return (
+        queryset
+        .filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', '-id')
+    )
+
+
+def _search_sqlite(queryset, terms):
+    """Search the FTS5 table, ranking with weighted bm25.
+
+    Args:
+        queryset (QuerySet): A Course queryset to search within.
+        terms (list): Word terms of the query.
+
+    Returns:
+        QuerySet: Matching courses ranked by bm25.
+    """
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return (
+        queryset
+        .filter(search_index__document__match=match)
+        .annotate(rank=F('search_index__rank') * -1)
+        .order_by('-rank', '-id')
+    )
+
+
+class FullTextMatch(Lookup):
+    """``MATCH`` lookup against an FTS5 table column."""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        """Render ``<column> MATCH <query>``.
+
+        Args:
+            compiler (SQLCompiler): The query compiler.
+            connection (DatabaseWrapper): The database connection.
+
+        Returns:
+            tuple: SQL string and its parameters.
+        """
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
@@ -0,0 +1,22 @@
+"""Signal handlers for the courses app."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_course_list_version
+from .models import Course
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_list(sender, **kwargs):
+    """Bump the course list cache version once the change is committed.
+
+    Bumping before commit would let a concurrent request cache the old
+    rows under the new version.
+
+    Args:
+        sender (type): The Course model.
+        kwargs: Signal arguments.
+    """
+    transaction.on_commit(bump_course_list_version)
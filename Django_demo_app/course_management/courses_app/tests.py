@@ -1,3 +1,600 @@
-from django.test import TestCase
+"""Tests for the courses app."""
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from course_management.instrumentation import (QueryBudgetExceeded,
+                                               assert_max_queries)
+
+from . import cache as course_cache
+from .cache import (CATALOG_CHANGED_KEY, get_course_list_version,
+                    get_enrollment_version, get_or_render)
+from .enrollment import (enroll, enroll_users, fill_enrollment_counts,
+                         recount_enrollments, unenroll)
+from .models import Course, Enrollment
+from .search import search_courses, search_terms, sqlite_fts_available
+from .management.commands.import_courses import Command as ImportCommand
+from .views import CourseView
+
+
+class CourseTestCase(TestCase):
+    """Base class with a logged-in user and a few courses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user and the courses shared by the tests."""
+        cls.user = CustomUser.objects.create_user(
+            email='student@example.com', phone_number='+380000000001',
+            username='student', password='password')
+        cls.courses = [
+            Course.objects.create(
+                title=f'Course {index}', description='Python basics',
+                created_by=cls.user)
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        """Start from an empty cache and log the user in."""
+        cache.clear()
+        self.client.force_login(self.user)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(CourseTestCase):
+    """Course views stay within their declared query budgets."""
+
+    def test_course_view(self):
+        """The catalog renders within budget, cold and cached."""
+        for _ in range(2):
+            response = self.client.get(reverse('course_view'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_course_view_search(self):
+        """A search with its count query renders within budget."""
+        # Checking for the FTS table runs once per process, not per request.
+        sqlite_fts_available()
+        response = self.client.get(
+            reverse('course_view'), {'search': 'python'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_course_view(self):
+        """The async catalog renders within budget."""
+        response = self.client.get(reverse('async_course_view'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_enrolled_course_view(self):
+        """The first visit, which enrolls the user, stays within budget."""
+        url = reverse('enrolled_course', args=[self.courses[0].pk])
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_over_budget_raises(self):
+        """A view running more queries than its budget fails the request."""
+        with mock.patch.object(CourseView, 'query_budget', 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('course_view'))
+
+    def test_request_logged_at_debug(self):
+        """Requests within budget and fast enough are logged at DEBUG."""
+        with self.assertLogs('course_management.instrumentation',
+                             'DEBUG') as logs:
+            self.client.get(reverse('course_view'))
+        [record] = logs.records
+        self.assertEqual(record.levelname, 'DEBUG')
+        self.assertIn('view=course_view status=200', record.getMessage())
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_over_budget_warns(self):
+        """Outside strict mode an over-budget request is a warning."""
+        with mock.patch.object(CourseView, 'query_budget', 1):
+            with self.assertLogs('course_management.instrumentation',
+                                 'DEBUG') as logs:
+                response = self.client.get(reverse('course_view'))
+        self.assertEqual(response.status_code, 200)
+        [record] = logs.records
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertIn('over-budget=1', record.getMessage())
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=0)
+    def test_slow_request_warns(self):
+        """Requests reaching the latency threshold are warnings."""
+        with self.assertLogs('course_management.instrumentation',
+                             'DEBUG') as logs:
+            self.client.get(reverse('course_view'))
+        [record] = logs.records
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertTrue(record.getMessage().endswith(' slow'))
+
+    def test_assert_max_queries(self):
+        """The context manager counts the queries of its block."""
+        course = self.courses[0]
+        with assert_max_queries(4) as stats:
+            enroll(self.user, course)
+        self.assertGreater(stats.queries, 0)
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_max_queries(0):
+                Course.objects.count()
+
+
+class CursorPaginationTests(CourseTestCase):
+    """Keyset pagination walks the catalog in a stable order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Give pairs of courses the same creation time."""
+        super().setUpTestData()
+        start = timezone.now()
+        for index, course in enumerate(cls.courses):
+            Course.objects.filter(pk=course.pk).update(
+                created_at=start + timedelta(minutes=index // 2))
+        cls.ordered = list(
+            Course.objects.order_by('created_at', 'id')
+            .values_list('pk', flat=True))
+
+    def get_view(self, cursor=None):
+        """Build a catalog view paging two courses at a time.
+
+        Args:
+            cursor (str): The cursor to request.
+
+        Returns:
+            CourseView: The view, set up for the request.
+        """
+        params = {'cursor': cursor} if cursor else {}
+        view = CourseView(paginate_by=2)
+        view.setup(RequestFactory().get('/', params))
+        return view
+
+    def get_page(self, cursor=None):
+        """Fetch one page of the catalog.
+
+        Args:
+            cursor (str): The cursor to request.
+
+        Returns:
+            CursorPage: The page.
+        """
+        return self.get_view(cursor).get_cursor_page(Course.objects.all())
+
+    def test_cursor_round_trip(self):
+        """A cursor decodes to the boundary object's position."""
+        view = self.get_view()
+        course = Course.objects.get(pk=self.courses[0].pk)
+        for backwards in (False, True):
+            position, decoded = view.decode_cursor(
+                view.encode_cursor(course, reverse=backwards))
+            self.assertEqual(position, [course.created_at, course.pk])
+            self.assertEqual(decoded, backwards)
+
+    def test_malformed_cursor(self):
+        """Cursors that do not decode to a position are not found."""
+        view = self.get_view()
+        for cursor in ('not base64!', 'e30', 'eyJwIjogWzFdfQ'):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(Http404):
+                    view.decode_cursor(cursor)
+
+    def test_walk_forward_and_back(self):
+        """Pages cover every course once, in order, in both directions."""
+        pages, cursor = [], None
+        while True:
+            page = self.get_page(cursor)
+            pages.append([course.pk for course in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(sum(pages, []), self.ordered)
+        self.assertFalse(self.get_page().has_previous())
+
+        backwards = [pages[-1]]
+        while page.has_previous():
+            page = self.get_page(page.previous_cursor)
+            backwards.insert(0, [course.pk for course in page])
+        self.assertEqual(backwards, pages)
+
+    def test_page_variant(self):
+        """Spellings of the same cursor give the same page variant."""
+        cursor = self.get_page().next_cursor
+        self.assertEqual(
+            self.get_view(cursor).get_page_variant(),
+            self.get_view(cursor + '==').get_page_variant())
+        self.assertNotEqual(
+            self.get_view(cursor).get_page_variant(),
+            self.get_view().get_page_variant())
+
+
+class SearchTests(TestCase):
+    """Full-text search ranks courses matching every query term."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create courses matching the queries in title or description."""
+        cls.user = CustomUser.objects.create_user(
+            email='teacher@example.com', phone_number='+380000000003',
+            username='teacher', password='password')
+        cls.title_match = Course.objects.create(
+            title='Django for beginners', description='Web development',
+            created_by=cls.user)
+        cls.description_match = Course.objects.create(
+            title='Web development', description='Built with Django',
+            created_by=cls.user)
+        cls.other = Course.objects.create(
+            title='Data science', description='Pandas and NumPy',
+            created_by=cls.user)
+
+    def setUp(self):
+        """Skip on backends that fall back to substring matching."""
+        if connection.vendor != 'postgresql' and not sqlite_fts_available():
+            self.skipTest('The database has no full-text search index.')
+
+    def search(self, query):
+        """Search every course.
+
+        Args:
+            query (str): The search string.
+
+        Returns:
+            list: Primary keys of the matches, best first.
+        """
+        return [course.pk for course in search_courses(
+            Course.objects.all(), query)]
+
+    def test_search_terms(self):
+        """Operators and punctuation are dropped from the query."""
+        self.assertEqual(
+            search_terms('"django" OR -web*'), ['django', 'OR', 'web'])
+        self.assertEqual(search_terms(None), [])
+
+    def test_title_ranks_first(self):
+        """A title match outranks a description match."""
+        self.assertEqual(
+            self.search('django'),
+            [self.title_match.pk, self.description_match.pk])
+
+    def test_every_term_and_prefixes(self):
+        """All terms must match, each as a word prefix."""
+        self.assertEqual(
+            self.search('djan begin'), [self.title_match.pk])
+        self.assertEqual(self.search('django pandas'), [])
+
+    def test_empty_query(self):
+        """A query without words matches nothing."""
+        self.assertEqual(self.search('*" -'), [])
+
+    def test_index_follows_changes(self):
+        """Edited and deleted courses are reindexed."""
+        Course.objects.filter(pk=self.other.pk).update(
+            title='Django data science')
+        self.assertIn(self.other.pk, self.search('django'))
+        deleted = self.title_match.pk
+        self.title_match.delete()
+        self.assertNotIn(deleted, self.search('django'))
+
+
+class EnrollmentTests(CourseTestCase):
+    """Enrollments are idempotent and keep the counters in step."""
+
+    def assertEnrolled(self, course, count):
+        """Check the rows and the counter of a course.
+
+        Args:
+            course (Course): The course to check.
+            count (int): The expected number of enrollments.
+        """
+        course.refresh_from_db(fields=['enrollment_count'])
+        self.assertEqual(course.enrollment_count, count)
+        self.assertEqual(
+            Enrollment.objects.filter(course=course).count(), count)
+
+    def test_enroll_twice(self):
+        """Only the first enrollment inserts a row and bumps the version."""
+        course = self.courses[0]
+        version = get_enrollment_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertTrue(enroll(self.user, course))
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_enrollment_version(), version)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertFalse(enroll(self.user, course))
+        self.assertEqual(callbacks, [])
+        self.assertEnrolled(course, 1)
+
+    def test_updated_at_untouched(self):
+        """Counter changes do not count as edits of the course."""
+        course = self.courses[0]
+        edited = Course.objects.get(pk=course.pk).updated_at
+        enroll(self.user, course)
+        unenroll(self.user, course)
+        enroll_users(course, [self.user])
+        self.assertEqual(Course.objects.get(pk=course.pk).updated_at, edited)
+
+    def test_unenroll_twice(self):
+        """Only the first unenrollment deletes a row."""
+        course = self.courses[0]
+        enroll(self.user, course)
+        self.assertTrue(unenroll(self.user, course))
+        self.assertFalse(unenroll(self.user, course))
+        self.assertEnrolled(course, 0)
+
+    def test_enroll_users_skips_duplicates(self):
+        """Bulk enrollment recounts the course instead of adding up rows."""
+        course = self.courses[0]
+        other = CustomUser.objects.create_user(
+            email='other@example.com', phone_number='+380000000004',
+            username='other', password='password')
+        enroll(self.user, course)
+        enroll_users(course, [self.user, other.pk, other], batch_size=2)
+        self.assertEnrolled(course, 2)
+
+    def test_recount_enrollments(self):
+        """Drifted counters are set from the rows."""
+        course = self.courses[0]
+        enroll(self.user, course)
+        Course.objects.filter(pk=course.pk).update(enrollment_count=7)
+        self.assertEqual(recount_enrollments([course.pk]), 1)
+        self.assertEqual(recount_enrollments([course.pk]), 0)
+        self.assertEnrolled(course, 1)
+
+    def test_fill_enrollment_counts(self):
+        """Cached fragments show the live counters."""
+        course = self.courses[0]
+        enroll(self.user, course)
+        fragment = (f'<span data-enrollments="{course.pk}">0</span>'
+                    '<span data-enrollments="0">5</span>')
+        self.assertEqual(
+            fill_enrollment_counts(fragment),
+            f'<span data-enrollments="{course.pk}">1</span>'
+            '<span data-enrollments="0">0</span>')
+
+
+class ImportCoursesTests(CourseTestCase):
+    """The import command resumes after the last committed batch."""
+
+    def setUp(self):
+        """Write a CSV with four valid rows and one invalid row."""
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name, 'courses.csv')
+        self.path.write_text(
+            'title,description\n'
+            'Imported 1,First\n'
+            'Imported 2,Second\n'
+            ',No title\n'
+            'Imported 3,Third\n'
+            'Imported 4,Fourth\n')
+        self.checkpoint = Path(f'{self.path}.checkpoint')
+
+    def run_import(self, *args):
+        """Run the command, executing its on-commit callbacks.
+
+        Args:
+            args: Additional command line arguments.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'import_courses', str(self.path),
+                '--created-by', self.user.email, '--batch-size', '2',
+                '--no-copy', *args, stdout=StringIO(), stderr=StringIO())
+
+    def imported(self):
+        """Return the titles of the imported courses.
+
+        Returns:
+            list: Titles in insertion order.
+        """
+        return list(Course.objects.filter(
+            title__startswith='Imported').order_by('pk').values_list(
+            'title', flat=True))
+
+    def test_import(self):
+        """Valid rows are imported and the checkpoint is removed."""
+        self.run_import()
+        self.assertEqual(self.imported(), [
+            'Imported 1', 'Imported 2', 'Imported 3', 'Imported 4'])
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_resume_from_checkpoint(self):
+        """Rows recorded in the checkpoint are skipped."""
+        self.checkpoint.write_text(json.dumps(
+            {'source': str(self.path.resolve()), 'rows': 3}))
+        self.run_import()
+        self.assertEqual(self.imported(), ['Imported 3', 'Imported 4'])
+
+    def test_failed_batch_keeps_checkpoint(self):
+        """A failing batch leaves the checkpoint after the last commit."""
+        batches = []
+
+        def insert(batch):
+            batches.append(batch)
+            if len(batches) == 2:
+                raise RuntimeError('Connection lost.')
+            Course.objects.bulk_create(batch)
+
+        version = get_course_list_version()
+        with mock.patch.object(
+                ImportCommand, '_insert_bulk_create', side_effect=insert):
+            with self.assertRaises(RuntimeError):
+                self.run_import()
+        self.assertNotEqual(get_course_list_version(), version)
+        self.assertEqual(self.imported(), ['Imported 1', 'Imported 2'])
+        self.assertEqual(
+            json.loads(self.checkpoint.read_text())['rows'], 2)
+
+        self.run_import()
+        self.assertEqual(self.imported(), [
+            'Imported 1', 'Imported 2', 'Imported 3', 'Imported 4'])
+
+
+class FragmentCacheTests(CourseTestCase):
+    """Course list fragments render once and follow catalog changes."""
+
+    def test_hit(self):
+        """A cached fragment is served without rendering."""
+        render = mock.Mock(return_value='fragment')
+        self.assertEqual(get_or_render('key', render), 'fragment')
+        self.assertEqual(get_or_render('key', render), 'fragment')
+        render.assert_called_once()
+
+    def test_waits_for_lock_owner(self):
+        """While another caller renders, a second one waits for its result."""
+        cache.add('key:lock', 1)
+        owner = threading.Timer(0.1, cache.set, ['key', 'rendered'])
+        owner.start()
+        self.addCleanup(owner.join)
+        render = mock.Mock(return_value='duplicate')
+        self.assertEqual(get_or_render('key', render), 'rendered')
+        render.assert_not_called()
+
+    def test_renders_after_wait(self):
+        """A caller stops waiting for a stuck owner and renders itself."""
+        cache.add('key:lock', 1)
+        render = mock.Mock(return_value='fragment')
+        with mock.patch.object(course_cache, 'LOCK_WAIT', 0.1):
+            self.assertEqual(get_or_render('key', render), 'fragment')
+        render.assert_called_once()
+        self.assertEqual(cache.get('key'), 'fragment')
+
+    def test_renders_after_failed_owner(self):
+        """A released lock without a fragment is rendered at once."""
+        cache.add('key:lock', 1)
+        owner = threading.Timer(0.05, cache.delete, ['key:lock'])
+        owner.start()
+        self.addCleanup(owner.join)
+        render = mock.Mock(return_value='fragment')
+        self.assertEqual(get_or_render('key', render), 'fragment')
+        render.assert_called_once()
+
+    def get_catalog(self):
+        """Render the catalog page.
+
+        Returns:
+            str: The page content.
+        """
+        return self.client.get(reverse('course_view')).content.decode()
+
+    def test_course_changes(self):
+        """Creating, editing and deleting courses changes the page."""
+        self.assertIn('Course 0', self.get_catalog())
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(
+                title='Brand new', description='New', created_by=self.user)
+        self.assertIn('Brand new', self.get_catalog())
+        with self.captureOnCommitCallbacks(execute=True):
+            course.title = 'Renamed'
+            course.save()
+        page = self.get_catalog()
+        self.assertIn('Renamed', page)
+        self.assertNotIn('Brand new', page)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertNotIn('Renamed', self.get_catalog())
+
+    def test_add_course_view(self):
+        """Courses added through the form show up on the next request."""
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.get_catalog()
+        response = self.client.post(
+            reverse('add_course'),
+            {'title': 'Added course', 'description': 'Added'})
+        self.assertRedirects(response, reverse('course_view'))
+        self.assertIn('Added course', self.get_catalog())
+
+
+class ConditionalGetTests(CourseTestCase):
+    """Course pages answer conditional requests with 304."""
+
+    def get(self, url, params=None, **headers):
+        """Request a page.
+
+        Args:
+            url (str): The page URL.
+            params (dict): Query parameters.
+            headers: Request headers.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        return self.client.get(url, params or {}, **headers)
+
+    def assertNotModified(self, response):
+        """Check for an empty 304 that still asks to revalidate.
+
+        Args:
+            response (HttpResponse): The response.
+        """
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_catalog_etag(self):
+        """The catalog is not modified until a course or enrollment is."""
+        url = reverse('course_view')
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertNotModified(self.get(url, HTTP_IF_NONE_MATCH=etag))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll(self.user, self.courses[0])
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.courses[1].title = 'Renamed'
+            self.courses[1].save()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed')
+
+    def test_catalog_last_modified(self):
+        """Last-Modified follows the recorded catalog change."""
+        cache.set(CATALOG_CHANGED_KEY, timezone.now() - timedelta(hours=1))
+        url = reverse('course_view')
+        since = self.get(url)['Last-Modified']
+        self.assertNotModified(self.get(url, HTTP_IF_MODIFIED_SINCE=since))
+        cache.set(CATALOG_CHANGED_KEY, timezone.now() - timedelta(minutes=1))
+        response = self.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+
+    def test_variants(self):
+        """Pages, cursors and searches have their own ETags."""
+        url = reverse('course_view')
+        cursor = CourseView(paginate_by=2).encode_cursor(self.courses[1])
+        etags = [self.get(url, params)['ETag'] for params in (
+            {}, {'cursor': cursor}, {'search': 'python'},
+            {'search': 'python', 'page': 2})]
+        self.assertEqual(len(set(etags)), len(etags))
+        self.assertEqual(
+            self.get(url, {'cursor': cursor + '=='})['ETag'], etags[1])
+        self.assertEqual(self.get(url, {'utm': 'x'})['ETag'], etags[0])
+
+    def test_enrolled_course(self):
+        """The course page changes with its enrollment counter."""
+        url = reverse('enrolled_course', args=[self.courses[0].pk])
+        self.get(url)
+        etag = self.get(url)['ETag']
+        self.assertNotModified(self.get(url, HTTP_IF_NONE_MATCH=etag))
+        other = CustomUser.objects.create_user(
+            email='other@example.com', phone_number='+380000000005',
+            username='other', password='password')
+        enroll(other, self.courses[0])
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -11,4 +11,9 @@ urlpatterns = [
          views.EnrolledCourseView.as_view(), name='enrolled_course'),
     path('delete_course/<int:pk>/', views.DeleteCourseView.as_view(),
          name='delete_course'),
+    path('async/courses_page/', views.AsyncCourseView.as_view(),
+         name='async_course_view'),
+    path('async/enrolled_course/<int:pk>/',
+         views.AsyncEnrolledCourseView.as_view(),
+         name='async_enrolled_course'),
 ]
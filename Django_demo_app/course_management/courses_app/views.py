@@ -1,17 +1,108 @@
 """Views for course access with user authentication in the courses app."""
+from asgiref.sync import sync_to_async
+from django.db.models.functions import Left
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
 from django.views.generic import DeleteView, TemplateView
 
+from .cache import (acourse_list_key, aget_or_render,
+                    bump_course_list_version, course_list_key, get_or_render)
+from .conditional import (acatalog_state, catalog_etag, catalog_state,
+                          course_etag)
+from .enrollment import afill_enrollment_counts, fill_enrollment_counts
 from .forms import CourseForm
-from .mixins import AdminRequiredMixin, EnrollmentCheckMixin, LoggingMixin
+from .mixins import (AdminRequiredMixin, ConditionalGetMixin,
+                     EnrollmentCheckMixin, LoggingMixin, LoginRequiredMixin,
+                     PaginationMixin, SearchMixin)
 from .models import Course
 
+DESCRIPTION_PREVIEW_LENGTH = 300
 
-class CourseView(LoggingMixin, TemplateView):
+
+class CourseView(LoggingMixin, ConditionalGetMixin, SearchMixin,
+                 PaginationMixin, TemplateView):
     """View for displaying the courses page."""
 
     template_name = 'courses_app/courses_page.html'
+    model = Course
+    paginate_by = 20
+    pagination_mode = 'cursor'
+    cursor_ordering = ('created_at', 'id')
+    full_text_search = True
+    # Session, user, catalog state, enrollment counters, then count and
+    # page while searching.
+    query_budget = 6
+
+    def get_queryset(self):
+        """Courses with their creator joined and descriptions truncated.
+
+        Returns:
+            QuerySet: Course list queryset for the page.
+        """
+        queryset = (
+            Course.objects
+            .select_related('created_by')
+            .defer('description', 'search_vector')
+            .annotate(description_preview=Left(
+                'description', DESCRIPTION_PREVIEW_LENGTH + 1))
+        )
+        return self.search_queryset(queryset)
+
+    def get_pagination_mode(self):
+        """Page ranked search results by number, the catalog by cursor.
+
+        Returns:
+            str: Either 'page' or 'cursor'.
+        """
+        if self.get_search_query():
+            return 'page'
+        return super().get_pagination_mode()
+
+    def get_list_variant(self):
+        """Describe the requested course list by its validated parameters.
+
+        Keys the cached fragment and the ETag, so arbitrary query strings
+        cannot fill the cache with copies of the same page.
+
+        Raises:
+            Http404: If the cursor is malformed.
+
+        Returns:
+            str: The search query and the requested page.
+        """
+        return f'{self.get_search_query()}\x00{self.get_page_variant()}'
+
+    def get_etag(self):
+        """ETag from the catalog state and the requested page.
+
+        Returns:
+            str: The unquoted ETag.
+        """
+        return catalog_etag(catalog_state(), self.get_list_variant())
+
+    def get_last_modified(self):
+        """Last-Modified from the last recorded catalog change.
+
+        Returns:
+            datetime: When a course or enrollment last changed, or None.
+        """
+        return catalog_state()['last_modified']
+
+    def render_course_list(self):
+        """Query and render the course list fragment.
+
+        Returns:
+            str: The rendered course list.
+        """
+        page = self.get_paginated_queryset(self.get_queryset())
+        return render_to_string('courses_app/course_list.html', {
+            'page': page,
+            'courses': page.object_list,
+            'preview_length': DESCRIPTION_PREVIEW_LENGTH,
+            'search': self.get_search_query(),
+        })
 
     def get_context_data(self, **kwargs):
         """Context data to the template.
@@ -24,7 +115,10 @@ class CourseView(LoggingMixin, TemplateView):
         """
         context = super().get_context_data(**kwargs)
         context['message'] = 'This is the Courses page'
-        context['courses'] = Course.objects.all()
+        context['search'] = self.get_search_query()
+        context['course_list'] = fill_enrollment_counts(get_or_render(
+            course_list_key(self.get_list_variant()),
+            self.render_course_list))
         return context
 
 
@@ -32,6 +126,7 @@ class AdminOnlyView(AdminRequiredMixin, TemplateView):
     """View for admin users only."""
 
     template_name = 'courses_app/admin_page.html'
+    query_budget = 2
 
 
 class AddCourseView(AdminRequiredMixin, TemplateView):
@@ -69,15 +164,32 @@ class AddCourseView(AdminRequiredMixin, TemplateView):
             course = form.save(commit=False)
             course.created_by = request.user
             course.save()
+            bump_course_list_version()
             return redirect('course_view')
         return self.render_to_response({'form': form})
 
 
-class EnrolledCourseView(EnrollmentCheckMixin, TemplateView):
+class EnrolledCourseView(EnrollmentCheckMixin, ConditionalGetMixin,
+                         TemplateView):
     """View for showing a course that the user is enrolled in."""
 
     template_name = 'courses_app/enrolled_course.html'
     model = Course
+    # Session, user, course, then the enrollment insert and counter update
+    # inside a savepoint on the first visit.
+    query_budget = 6
+
+    def get_etag(self):
+        """ETag of the course loaded by EnrollmentCheckMixin.
+
+        There is no Last-Modified: ``updated_at`` does not move when the
+        enrollment counter shown on the page changes, while the ETag
+        includes the counter.
+
+        Returns:
+            str: The unquoted ETag.
+        """
+        return course_etag(self.course)
 
 
 class DeleteCourseView(DeleteView):
@@ -92,3 +204,97 @@ class HomeView(TemplateView):
     """View for the home page."""
 
     template_name = 'courses_app/home.html'
+
+
+class AsyncCourseView(CourseView):
+    """Async variant of CourseView for ASGI deployments.
+
+    Queries run through the async ORM, so a worker keeps serving other
+    clients while it waits on the database or a slow client.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        """Return 304 for a matching conditional request, else render.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A 304 response or the rendered page.
+        """
+        variant = self.get_list_variant()
+        state = await acatalog_state()
+        etag, last_modified = self.get_validators(
+            catalog_etag(state, variant), state['last_modified'])
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            course_list = await afill_enrollment_counts(await aget_or_render(
+                await acourse_list_key(variant), self.render_course_list))
+            response = render(request, self.template_name, {
+                'message': 'This is the Courses page',
+                'search': self.get_search_query(),
+                'course_list': course_list,
+            })
+        return self.set_validators(response, etag, last_modified)
+
+    async def render_course_list(self):
+        """Query and render the course list fragment.
+
+        Returns:
+            str: The rendered course list.
+        """
+        # Building a search queryset may introspect the database once.
+        queryset = await sync_to_async(self.get_queryset)()
+        page = await self.aget_paginated_queryset(queryset)
+        return render_to_string('courses_app/course_list.html', {
+            'page': page,
+            'courses': page.object_list,
+            'preview_length': DESCRIPTION_PREVIEW_LENGTH,
+            'search': self.get_search_query(),
+        })
+
+
+class AsyncEnrolledCourseView(LoginRequiredMixin, EnrolledCourseView):
+    """Async variant of EnrolledCourseView for ASGI deployments."""
+
+    async def get(self, request, *args, **kwargs):
+        """Return 304 for a matching conditional request, else render.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: A 304 response or the rendered page.
+        """
+        etag, last_modified = self.get_validators(
+            course_etag(self.course), None)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render(request, self.template_name, {
+                'course': self.course,
+                'user': await request.auser(),
+            })
+        return self.set_validators(response, etag, last_modified)
+
+
+class AsyncHomeView(HomeView):
+    """Async variant of HomeView for ASGI deployments."""
+
+    async def get(self, request, *args, **kwargs):
+        """Render the home page.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            HttpResponse: The rendered page.
+        """
+        return render(request, self.template_name)
@@ -1,6 +1,13 @@
+"""App configuration for the courses_restfull application."""
 from django.apps import AppConfig
 
 
 class CoursesRestfullConfig(AppConfig):
+    """Configuration class for the courses_restfull Django application."""
+
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses_restfull'
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
@@ -1,19 +1,77 @@
 """Custom JWT Authentication for Django REST Framework."""
-from datetime import datetime, timezone
-
 import jwt
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.utils import timezone as dj_timezone
+from django.utils.functional import SimpleLazyObject
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
+from courses_restfull.token_cache import decode_token
+from courses_restfull.user_cache import user_cache
+from courses_restfull.utils import ACCESS_TOKEN_TYPE
+
 User = get_user_model()
 
+CLAIM_FIELDS = ('email', 'username', 'is_staff', 'is_active', 'ver')
+
+
+class ClaimsUser(SimpleLazyObject):
+    """User built from signed token claims, loaded only when needed.
+
+    ``pk``, ``id``, ``email``, ``username``, ``is_staff``, ``is_active``
+    and ``version`` come from the token. Touching any other attribute
+    loads the full user (through the user cache) and proxies to it.
+    """
+
+    def __init__(self, claims):
+        """Build the user from verified token claims.
+
+        Args:
+            claims (dict): The decoded token payload.
+        """
+        user_id = claims['user_id']
+        super().__init__(lambda: user_cache.get_user(user_id))
+        values = {
+            'pk': user_id,
+            'id': user_id,
+            'email': claims['email'],
+            'username': claims['username'],
+            'is_staff': claims['is_staff'],
+            'is_active': claims['is_active'],
+            'version': claims['ver'],
+            'is_authenticated': True,
+            'is_anonymous': False,
+        }
+        # Set on the proxy itself so reading them never loads the user.
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __bool__(self):
+        """Tell that the user exists, without loading it.
+
+        Permission classes test ``bool(request.user)``, which would load
+        the user through ``LazyObject.__bool__``.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+
+    def __str__(self):
+        """Return the email, like CustomUser.
+
+        Returns:
+            str: The user's email.
+        """
+        return self.email
+
 
 class CustomJWTAuthentication(BaseAuthentication):
     """Custom JWT Authentication class for Django REST Framework."""
 
+    # Build a ClaimsUser from claims-mode tokens instead of loading the
+    # user. Only safe for views that do not write the user to the database.
+    lazy_user = False
+
     def authenticate(self, request):
         """Authenticate the user using JWT token.
 
@@ -38,8 +96,11 @@ class CustomJWTAuthentication(BaseAuthentication):
         token = auth_header.split(' ')[1]
 
         try:
-            payload = jwt.decode(
-                token, settings.JWT_SECRET_KEY, algorithms=['HS256'])
+            # PyJWT already rejects expired tokens, and cached payloads
+            # are dropped when their token expires.
+            payload = decode_token(token)
+            if payload.get('type') != ACCESS_TOKEN_TYPE:
+                raise AuthenticationFailed('Not an access token')
             user_id = payload.get('user_id')
             exp = payload.get('exp')
 
@@ -47,12 +108,12 @@ class CustomJWTAuthentication(BaseAuthentication):
                 raise AuthenticationFailed(
                     'Token payload missing required fields')
 
-            if datetime.fromtimestamp(exp,
-                                      tz=timezone.utc,
-                                      ) < dj_timezone.now():
-                raise AuthenticationFailed('Token is expired')
+            if 'ver' in payload:
+                self.check_claims(payload)
+                if self.lazy_user:
+                    return (ClaimsUser(payload), token)
 
-            user = User.objects.get(id=user_id)
+            user = user_cache.get_user(user_id)
 
             return (user, token)
 
@@ -62,3 +123,32 @@ class CustomJWTAuthentication(BaseAuthentication):
             raise AuthenticationFailed('Token has expired') from e
         except jwt.InvalidTokenError as e:
             raise AuthenticationFailed('Invalid token') from e
+
+    @staticmethod
+    def check_claims(payload):
+        """Reject claims tokens of inactive or since changed users.
+
+        Args:
+            payload (dict): The decoded token payload.
+
+        Raises:
+            AuthenticationFailed: If claims are missing, the user is
+                inactive or gone, or the user changed after the token was
+                issued.
+        """
+        if any(field not in payload for field in CLAIM_FIELDS):
+            raise AuthenticationFailed(
+                'Token payload missing required fields')
+        if not payload['is_active']:
+            raise AuthenticationFailed('User is inactive')
+        version = user_cache.get_version(payload['user_id'])
+        if version is None:
+            raise AuthenticationFailed('User not found')
+        if version != payload['ver']:
+            raise AuthenticationFailed('Token is outdated')
+
+
+class ClaimsJWTAuthentication(CustomJWTAuthentication):
+    """JWT authentication for read-only views, DB-free for claims tokens."""
+
+    lazy_user = True
@@ -0,0 +1,18 @@
+"""Bounded executor for password verification.
+
+Checking a PBKDF2 password costs ~100ms of CPU. Running it inline lets a
+burst of logins occupy every request worker while cheap API calls queue
+behind them. ``password_executor`` runs the checks on a few dedicated
+threads (``hashlib`` releases the GIL while hashing) and admits only a
+fixed number of waiting tasks; past that, ``submit`` fails immediately so
+the view can answer 503 instead of piling up work.
+"""
+from django.conf import settings
+
+from course_management.executors import BoundedExecutor
+
+password_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'LOGIN_HASH_WORKERS', 2),
+    max_queue=getattr(settings, 'LOGIN_HASH_QUEUE', 8),
+    name='password-hash',
+)
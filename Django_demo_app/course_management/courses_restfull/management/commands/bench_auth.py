@@ -0,0 +1,189 @@
+"""In-process benchmark of the API authentication endpoints."""
+from collections import defaultdict
+from concurrent.futures import Future
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from course_management.benchmarking import format_summary, summarize, timed
+from course_management.instrumentation import track_queries
+from courses_restfull.hashing import password_executor
+from courses_restfull.user_cache import user_cache
+
+User = get_user_model()
+
+EMAIL_DOMAIN = 'bench-auth.invalid'
+PASSWORD = 'bench-auth-password'
+
+
+class Command(BaseCommand):
+    """Benchmark /api/login/, /api/refresh/ and /api/protected/.
+
+    Runs against the configured database (SQLite locally, or a local
+    PostgreSQL) inside a transaction that is rolled back, so nothing is
+    written. Executor threads have their own connections and could not
+    see the uncommitted users, so passwords are verified inline on the
+    command's thread; the hashing cost is the same. Throttling is
+    disabled for the run.
+    """
+
+    help = ('Benchmark the login, refresh and protected API endpoints '
+            'in-process: p50/p95/p99 latency, req/s and queries per '
+            'request.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Benchmark users to create.')
+        parser.add_argument(
+            '--logins', type=int, default=20,
+            help='Login requests (each hashes a password).')
+        parser.add_argument(
+            '--refreshes', type=int, default=200,
+            help='Refresh requests, rotating the refresh tokens.')
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Requests to the protected endpoint.')
+        parser.add_argument(
+            '--fast-hasher', action='store_true',
+            help='Hash the benchmark passwords with MD5, to measure the '
+                 'login path without PBKDF2.')
+
+    def handle(self, *args, **options):
+        """Create the users, run every endpoint and clean up.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'LOGIN_THROTTLE_RATES': {'ip': (10 ** 9, 1),
+                                     'account': (10 ** 9, 1)},
+        }
+        if options['fast_hasher']:
+            overrides['PASSWORD_HASHERS'] = [
+                'django.contrib.auth.hashers.MD5PasswordHasher']
+        self.stdout.write(f'Backend: {connection.vendor}')
+        with override_settings(**overrides), transaction.atomic(), \
+                mock.patch.object(password_executor, 'submit', _run_inline):
+            users = self._create_users(options['users'])
+            try:
+                self._run([user.email for user in users], options)
+            finally:
+                # Rolled back ids may be handed out again.
+                user_cache.invalidate(*(user.pk for user in users))
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _create_users(count):
+        """Create the benchmark users.
+
+        Args:
+            count (int): Number of users.
+
+        Returns:
+            list: The users.
+        """
+        return [
+            User.objects.create_user(
+                email=f'user{i}@{EMAIL_DOMAIN}', phone_number=f'+999{i:09d}',
+                username=f'bench-auth-{i}', password=PASSWORD)
+            for i in range(count)
+        ]
+
+    def _run(self, emails, options):
+        """Exercise the endpoints and print one line per endpoint.
+
+        Args:
+            emails (list): Emails of the benchmark users.
+            options (dict): Parsed command line options.
+        """
+        client = Client()
+        results = defaultdict(lambda: {'samples': [], 'queries': 0})
+
+        tokens = []
+        for i in range(options['logins']):
+            response = self._request(
+                results['login'], client.post, reverse('login'),
+                {'email': emails[i % len(emails)], 'password': PASSWORD})
+            tokens.append(response.json())
+        if not tokens:
+            return
+
+        refresh_tokens = [pair['refresh'] for pair in tokens]
+        for i in range(options['refreshes']):
+            slot = i % len(refresh_tokens)
+            response = self._request(
+                results['refresh'], client.post, reverse('refresh'),
+                {'refresh': refresh_tokens[slot]})
+            refresh_tokens[slot] = response.json()['refresh']
+
+        path = reverse('protected')
+        for i in range(options['requests']):
+            access = tokens[i % len(tokens)]['access']
+            self._request(
+                results['protected'], client.get, path,
+                HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        for name, result in results.items():
+            samples = result['samples']
+            elapsed = sum(samples)
+            self.stdout.write(
+                f'{format_summary(name, summarize(samples))} '
+                f'{len(samples) / elapsed:8.1f} req/s '
+                f'{result["queries"] / len(samples):5.2f} queries/req')
+
+    def _request(self, result, method, path, data=None, **extra):
+        """Send one request, recording its latency and query count.
+
+        Args:
+            result (dict): Collects ``samples`` and ``queries``.
+            method (callable): Client.get or Client.post.
+            path (str): The URL.
+            data (dict): Request data.
+            extra: Extra WSGI environ entries.
+
+        Returns:
+            HttpResponse: The response.
+
+        Raises:
+            CommandError: If the endpoint did not answer 200.
+        """
+        with track_queries() as stats, timed(result['samples']):
+            response = method(path, data, **extra)
+        result['queries'] += stats.queries
+        if response.status_code != 200:
+            raise CommandError(
+                f'{path} answered {response.status_code}: '
+                f'{response.content[:200]!r}')
+        return response
+
+
+def _run_inline(fn, *args, **kwargs):
+    """Run a task on the calling thread, like BoundedExecutor.submit.
+
+    Args:
+        fn (callable): The function to run.
+        args: Positional arguments for ``fn``.
+        kwargs: Keyword arguments for ``fn``.
+
+    Returns:
+        Future: The finished result.
+    """
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
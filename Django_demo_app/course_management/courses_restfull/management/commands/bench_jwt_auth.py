@@ -0,0 +1,108 @@
+"""Microbenchmark of JWT authentication with and without the token cache."""
+import time
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from course_management.benchmarking import format_summary, summarize
+from courses_restfull.authentication import CustomJWTAuthentication
+from courses_restfull.token_cache import token_cache
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Measure CustomJWTAuthentication.authenticate per request."""
+
+    help = ('Time CustomJWTAuthentication with the decoded-token cache '
+            'disabled and enabled, and project the CPU it costs at the '
+            'given request rates. The benchmark user is rolled back.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--requests', type=int, default=20_000,
+            help='Authentications per case.')
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Distinct tokens in use, one per simulated client.')
+        parser.add_argument(
+            '--rates', nargs='+', type=int, default=[1_000, 10_000],
+            help='Request rates (per second) to project the cost at.')
+
+    def handle(self, *args, **options):
+        """Run both cases against a temporary user.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        maxsize = token_cache.maxsize
+        lifetime = getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 300)
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='bench-jwt@example.com',
+                phone_number='+000000001',
+                username='bench-jwt',
+            )
+            # Tokens issued in the same second are identical; vary iat
+            # to get one distinct token per client.
+            now = int(time.time())
+            tokens = [
+                jwt.encode({'user_id': user.pk, 'iat': now - i,
+                            'exp': now + lifetime},
+                           settings.JWT_SECRET_KEY, algorithm='HS256')
+                for i in range(options['clients'])
+            ]
+            factory = APIRequestFactory()
+            requests = [
+                Request(factory.get('/', HTTP_AUTHORIZATION=f'Bearer {t}'))
+                for t in tokens
+            ]
+            auth = CustomJWTAuthentication()
+            try:
+                for label, size in (('no token cache', 0),
+                                    ('token cache', maxsize)):
+                    token_cache.maxsize = size
+                    token_cache.clear()
+                    self._run(label, auth, requests, options)
+            finally:
+                token_cache.maxsize = maxsize
+                token_cache.clear()
+                transaction.set_rollback(True)
+
+    def _run(self, label, auth, requests, options):
+        """Authenticate the requests round-robin and print the cost.
+
+        Args:
+            label (str): Name of the case.
+            auth (CustomJWTAuthentication): The authenticator.
+            requests (list): Requests, one per simulated client.
+            options (dict): Parsed command line options.
+        """
+        for request in requests:
+            # Warm the user cache so only token handling differs.
+            auth.authenticate(request)
+        samples = []
+        clock = time.perf_counter
+        count = len(requests)
+        for i in range(options['requests']):
+            request = requests[i % count]
+            start = clock()
+            auth.authenticate(request)
+            samples.append(clock() - start)
+        summary = summarize(samples)
+        self.stdout.write(format_summary(label, summary))
+        for rate in options['rates']:
+            share = summary['mean_ms'] * rate / 1000
+            self.stdout.write(
+                f'    at {rate} req/s: {share * 100:.1f}% of one core')
@@ -0,0 +1,97 @@
+"""Benchmark the protected endpoint with and without the JWT user cache."""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from course_management.benchmarking import format_summary, summarize, timed
+from courses_restfull.user_cache import user_cache
+from courses_restfull.utils import generate_access_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Measure /api/protected/ throughput for each user cache setup."""
+
+    help = ('Benchmark the protected API endpoint with the JWT user cache '
+            'disabled, shared tier only, and local plus shared tiers. '
+            'The benchmark user is rolled back.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Requests per case.')
+
+    def handle(self, *args, **options):
+        """Run every case against a temporary user.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+        """
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        maxsize = user_cache.local.maxsize
+        with override_settings(ALLOWED_HOSTS=hosts), transaction.atomic():
+            user = User.objects.create_user(
+                email='bench-user-cache@example.com',
+                phone_number='+000000000',
+                username='bench-user-cache',
+            )
+            client = Client(
+                HTTP_AUTHORIZATION=f'Bearer {generate_access_token(user)}')
+            path = reverse('protected')
+            cases = [
+                ('no cache', False, 0),
+                ('shared cache only', True, 0),
+                ('local + shared cache', True, maxsize),
+            ]
+            try:
+                for label, enabled, local_size in cases:
+                    user_cache.enabled = enabled
+                    user_cache.local.maxsize = local_size
+                    user_cache.clear()
+                    cache.delete(user_cache.key(user.pk))
+                    user_cache.reset_stats()
+                    self._run(label, client, path, options['requests'])
+            finally:
+                user_cache.enabled = True
+                user_cache.local.maxsize = maxsize
+                user_cache.clear()
+                user_cache.reset_stats()
+                transaction.set_rollback(True)
+
+    def _run(self, label, client, path, requests):
+        """Request the endpoint repeatedly and print the results.
+
+        Args:
+            label (str): Name of the case.
+            client (Client): Test client sending the JWT.
+            path (str): The protected endpoint.
+            requests (int): Number of requests.
+        """
+        samples = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            with timed(samples):
+                response = client.get(path)
+            if response.status_code != 200:
+                self.stderr.write(f'{label}: HTTP {response.status_code}')
+                return
+        elapsed = time.perf_counter() - started
+        stats = user_cache.stats()
+        self.stdout.write(
+            f'{format_summary(label, summarize(samples))} '
+            f'{requests / elapsed:8.1f} req/s '
+            f'local={stats["local_hits"]} shared={stats["shared_hits"]} '
+            f'miss={stats["misses"]}')
@@ -0,0 +1,210 @@
+"""HTTP load generator replaying realistic JWT client sessions."""
+import base64
+import csv
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from course_management.benchmarking import format_summary, summarize
+
+
+def token_expiry(token):
+    """Read the ``exp`` claim of a JWT without verifying it.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        float: Unix time at which the token expires.
+    """
+    payload = token.split('.')[1]
+    payload += '=' * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))['exp']
+
+
+class Command(BaseCommand):
+    """Drive a running server like real API clients would.
+
+    Each virtual client logs in once, then calls the protected endpoint
+    with a think time between requests. It refreshes its access token
+    shortly before it expires, rotating the refresh token, and logs in
+    again if the refresh is rejected. ``--access-lifetime`` shortens the
+    token lifetimes seen by the clients so refresh traffic can be replayed
+    in a short run.
+    """
+
+    help = ('Generate load on /api/login/, /api/refresh/ and '
+            '/api/protected/ of a running server and report latency '
+            'percentiles and req/s per endpoint.')
+
+    def add_arguments(self, parser):
+        """Register command line options.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            'credentials',
+            help='CSV file with email,password rows for the clients.')
+        parser.add_argument(
+            '--base-url', default='http://localhost:8000',
+            help='Server to load.')
+        parser.add_argument(
+            '--concurrency', type=int, default=10,
+            help='Virtual clients running at once.')
+        parser.add_argument(
+            '--duration', type=float, default=30.0,
+            help='Seconds to run.')
+        parser.add_argument(
+            '--think-time', type=float, default=0.1,
+            help='Seconds each client waits between requests.')
+        parser.add_argument(
+            '--access-lifetime', type=float,
+            help='Treat access tokens as expiring after this many seconds '
+                 '(default: their exp claim).')
+        parser.add_argument(
+            '--refresh-margin', type=float, default=5.0,
+            help='Refresh this many seconds before the access token '
+                 'expires.')
+        parser.add_argument(
+            '--timeout', type=float, default=10.0,
+            help='HTTP timeout in seconds.')
+
+    def handle(self, *args, **options):
+        """Run the clients and print the report.
+
+        Args:
+            args: Additional positional arguments.
+            options: Parsed command line options.
+
+        Raises:
+            CommandError: If the credentials file is unusable.
+        """
+        try:
+            with open(options['credentials'], newline='',
+                      encoding='utf-8') as source:
+                credentials = [row for row in csv.reader(source) if row]
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+        if not credentials or any(len(row) < 2 for row in credentials):
+            raise CommandError('Expected email,password rows.')
+
+        self.options = options
+        self.base_url = options['base_url'].rstrip('/')
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        deadline = time.monotonic() + options['duration']
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(
+                target=self._client,
+                args=(credentials[i % len(credentials)], deadline),
+                daemon=True)
+            for i in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for endpoint in ('login', 'refresh', 'protected'):
+            samples = self.samples[endpoint]
+            if not samples:
+                continue
+            statuses = ' '.join(
+                f'{code}:{count}'
+                for code, count in sorted(
+                    self.statuses[endpoint].items(),
+                    key=lambda item: str(item[0])))
+            self.stdout.write(
+                f'{format_summary(endpoint, summarize(samples))} '
+                f'{len(samples) / elapsed:8.1f} req/s  [{statuses}]')
+
+    def _client(self, credential, deadline):
+        """Run one virtual client until the deadline.
+
+        Args:
+            credential (list): The client's email and password.
+            deadline (float): time.monotonic() value to stop at.
+        """
+        email, password = credential[:2]
+        tokens = None
+        refresh_at = 0.0
+        while time.monotonic() < deadline:
+            if tokens is None:
+                tokens = self._call(
+                    'login', {'email': email, 'password': password})
+                if tokens is None:
+                    time.sleep(self.options['think_time'] or 0.1)
+                    continue
+                refresh_at = self._refresh_at(tokens['access'])
+            elif time.time() >= refresh_at:
+                rotated = self._call(
+                    'refresh', {'refresh': tokens['refresh']})
+                if rotated is None:
+                    tokens = None
+                    continue
+                tokens = rotated
+                refresh_at = self._refresh_at(tokens['access'])
+            self._call('protected', token=tokens['access'])
+            time.sleep(self.options['think_time'])
+
+    def _refresh_at(self, access):
+        """Unix time at which a client should refresh its access token.
+
+        Args:
+            access (str): The access token.
+
+        Returns:
+            float: When to refresh.
+        """
+        expires = token_expiry(access)
+        if self.options['access_lifetime'] is not None:
+            expires = min(expires, time.time()
+                          + self.options['access_lifetime'])
+        return expires - self.options['refresh_margin']
+
+    def _call(self, endpoint, data=None, token=None):
+        """Send one API request and record its latency and status.
+
+        Args:
+            endpoint (str): 'login', 'refresh' or 'protected'.
+            data (dict): JSON body; a GET is sent without one.
+            token (str): Access token for the Authorization header.
+
+        Returns:
+            dict: The decoded JSON body of a 200 response, else None.
+        """
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if token is not None:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(
+            f'{self.base_url}/api/{endpoint}/', data=body, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(
+                    request, timeout=self.options['timeout']) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            status, payload = exc.code, None
+        except OSError:
+            status, payload = 'error', None
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+        if status != 200:
+            return None
+        return json.loads(payload)
@@ -0,0 +1,16 @@
+"""Pagination classes for the courses RESTful API."""
+from rest_framework.pagination import CursorPagination
+
+
+class CourseCursorPagination(CursorPagination):
+    """Cursor pagination over the course catalog.
+
+    Pages are fetched by keyset on ``created_at`` so page N costs the same
+    as page 1. It also works on ``values()`` querysets, as long as
+    ``created_at`` is among the selected columns.
+    """
+
+    ordering = ('created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,169 @@
+"""Stores of spent and revoked refresh token ids (``jti`` claims).
+
+An entry only has to outlive the token it blocks, so every entry expires
+with its token and the stores stay as small as the set of live tokens.
+Checks are a single dictionary or cache lookup.
+
+``LocalRevocationStore`` keeps entries in process memory and suits tests
+and single-process setups. ``CacheRevocationStore`` keeps them in the
+shared cache backend, so every worker sees them. ``JWT_REVOCATION_STORE``
+selects the store.
+"""
+import heapq
+import threading
+import time
+from functools import cache as memoize
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+DEFAULT_STORE = 'courses_restfull.revocation.CacheRevocationStore'
+
+
+class LocalRevocationStore:
+    """Process-local set of jtis, pruned by expiry."""
+
+    def __init__(self):
+        """Create an empty store."""
+        self._expiry = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def consume(self, jti, expires_at):
+        """Mark a jti as spent unless it already is.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float): Unix time at which the token expires.
+
+        Returns:
+            bool: True if this call spent the jti, False if it was already
+            spent or revoked.
+        """
+        with self._lock:
+            self._prune()
+            if jti in self._expiry:
+                return False
+            self._add(jti, expires_at)
+            return True
+
+    def revoke(self, jti, expires_at):
+        """Block a jti until its token expires.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float): Unix time at which the token expires.
+        """
+        with self._lock:
+            self._prune()
+            if jti not in self._expiry:
+                self._add(jti, expires_at)
+
+    def is_revoked(self, jti):
+        """Check whether a jti is spent or revoked.
+
+        Args:
+            jti (str): The token id.
+
+        Returns:
+            bool: True if the jti may no longer be used.
+        """
+        with self._lock:
+            expires_at = self._expiry.get(jti)
+            return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        """Number of entries not yet pruned.
+
+        Returns:
+            int: The entry count.
+        """
+        return len(self._expiry)
+
+    def _add(self, jti, expires_at):
+        """Record an entry; the caller holds the lock.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float): Unix time at which the entry expires.
+        """
+        self._expiry[jti] = expires_at
+        heapq.heappush(self._heap, (expires_at, jti))
+
+    def _prune(self):
+        """Drop expired entries; the caller holds the lock."""
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            self._expiry.pop(jti, None)
+
+
+class CacheRevocationStore:
+    """Set of jtis kept in the shared cache backend."""
+
+    key_prefix = 'jwt:revoked:'
+
+    def consume(self, jti, expires_at):
+        """Mark a jti as spent unless it already is.
+
+        ``cache.add`` is atomic on the shared backends, so concurrent
+        workers cannot both spend the same token.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float): Unix time at which the token expires.
+
+        Returns:
+            bool: True if this call spent the jti, False if it was already
+            spent or revoked.
+        """
+        timeout = self._timeout(expires_at)
+        if timeout <= 0:
+            return False
+        return cache.add(self.key_prefix + jti, 1, timeout)
+
+    def revoke(self, jti, expires_at):
+        """Block a jti until its token expires.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float): Unix time at which the token expires.
+        """
+        timeout = self._timeout(expires_at)
+        if timeout > 0:
+            cache.set(self.key_prefix + jti, 1, timeout)
+
+    def is_revoked(self, jti):
+        """Check whether a jti is spent or revoked.
+
+        Args:
+            jti (str): The token id.
+
+        Returns:
+            bool: True if the jti may no longer be used.
+        """
+        return cache.get(self.key_prefix + jti) is not None
+
+    @staticmethod
+    def _timeout(expires_at):
+        """Seconds until the token expires, rounded up.
+
+        Args:
+            expires_at (float): Unix time at which the token expires.
+
+        Returns:
+            int: The cache timeout.
+        """
+        return int(expires_at - time.time()) + 1
+
+
+@memoize
+def get_revocation_store():
+    """Return the store configured by ``JWT_REVOCATION_STORE``.
+
+    Returns:
+        object: The shared store instance.
+    """
+    path = getattr(settings, 'JWT_REVOCATION_STORE', DEFAULT_STORE)
+    return import_string(path)()
@@ -0,0 +1,203 @@
+"""Serializers for the courses RESTful API."""
+from datetime import datetime
+
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from accounts.models import UserPayment
+from accounts.reporting import BUCKETS, periods
+from courses_app.models import Course
+
+COURSE_FIELDS = (
+    'id', 'title', 'description', 'created_at', 'updated_at', 'created_by',
+    'enrollment_count')
+COURSE_LIST_DEFAULT_FIELDS = (
+    'id', 'title', 'created_at', 'updated_at', 'created_by',
+    'enrollment_count')
+REVENUE_REPORT_MAX_PERIODS = 1000
+
+
+def parse_fields(request, allowed, default):
+    """Read a sparse fieldset from the ``fields`` query parameter.
+
+    Args:
+        request (Request): The API request.
+        allowed (tuple): Field names clients may ask for.
+        default (tuple): Field names used when none are requested.
+
+    Raises:
+        ValidationError: If an unknown field is requested.
+
+    Returns:
+        tuple: The requested field names, in ``allowed`` order.
+    """
+    raw = request.query_params.get('fields')
+    if not raw:
+        return default
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValidationError(
+            {'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'})
+    return tuple(name for name in allowed if name in requested)
+
+
+class CourseSerializer(serializers.ModelSerializer):
+    """Serializer for a single course, with optional sparse fieldsets."""
+
+    created_by = serializers.EmailField(
+        source='created_by.email', read_only=True)
+
+    class Meta:
+        """Meta class for CourseSerializer."""
+
+        model = Course
+        fields = COURSE_FIELDS
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """Drop every field not listed in ``fields``.
+
+        Args:
+            args: Positional arguments for the serializer.
+            fields (tuple): Field names to keep, or None to keep all.
+            kwargs: Keyword arguments for the serializer.
+        """
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RevenueReportQuerySerializer(serializers.Serializer):
+    """Query parameters of the revenue report."""
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+    bucket = serializers.ChoiceField(choices=list(BUCKETS), default='day')
+    payment_method = serializers.ChoiceField(
+        choices=UserPayment._meta.get_field('payment_method').choices,
+        required=False)
+
+    def validate(self, attrs):
+        """Check that the range is not empty and not too long.
+
+        Args:
+            attrs (dict): The parsed parameters.
+
+        Raises:
+            ValidationError: If the range is empty or spans too many
+                periods.
+
+        Returns:
+            dict: The parameters.
+        """
+        if attrs['end'] <= attrs['start']:
+            raise ValidationError({'end': 'Must be after start.'})
+        count = len(periods(attrs['start'], attrs['end'], attrs['bucket']))
+        if count > REVENUE_REPORT_MAX_PERIODS:
+            raise ValidationError(
+                f'The range spans {count} periods, at most '
+                f'{REVENUE_REPORT_MAX_PERIODS} are allowed.')
+        return attrs
+
+
+class RevenueRowSerializer(serializers.Serializer):
+    """One period of the revenue report."""
+
+    period = serializers.DateField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
+    by_method = serializers.SerializerMethodField()
+
+    def get_by_method(self, row):
+        """Format the per-method totals of a period.
+
+        Args:
+            row (dict): A report row.
+
+        Returns:
+            dict: ``{method: {'total': str, 'count': int}}``.
+        """
+        return {
+            method: {'total': f'{entry["total"]:.2f}',
+                     'count': entry['count']}
+            for method, entry in row['by_method'].items()
+        }
+
+
+class CourseRowSerializer:
+    """Serialize ``values()`` rows of courses without building models.
+
+    List responses skip model instantiation and the DRF field machinery;
+    each row is already a dict and only needs formatting.
+    """
+
+    expressions = {
+        'created_by': F('created_by__email'),
+    }
+
+    def __init__(self, fields):
+        """Remember which fields to output.
+
+        Args:
+            fields (tuple): Field names to output.
+        """
+        self.fields = fields
+
+    def select(self, queryset, required=()):
+        """Turn a course queryset into a ``values()`` queryset.
+
+        Args:
+            queryset (QuerySet): The course queryset.
+            required (tuple): Extra model columns needed by the caller,
+                e.g. the pagination ordering.
+
+        Returns:
+            QuerySet: Queryset yielding dicts with the needed columns.
+        """
+        columns = [name for name in self.fields
+                   if name not in self.expressions]
+        columns += [name for name in required if name not in columns]
+        # Expressions may not reuse model field names, so they are aliased
+        # with a leading underscore and renamed in to_representation().
+        aliased = {f'_{name}': self.expressions[name]
+                   for name in self.fields if name in self.expressions}
+        return queryset.values(*columns, **aliased)
+
+    def to_representation(self, rows):
+        """Convert ``values()`` rows to response dicts.
+
+        Args:
+            rows (list): Rows as returned by the queryset.
+
+        Returns:
+            list: Response dicts with only the requested fields.
+        """
+        keys = [(name, f'_{name}' if name in self.expressions else name)
+                for name in self.fields]
+        result = []
+        for row in rows:
+            item = {}
+            for name, key in keys:
+                value = row[key]
+                if isinstance(value, datetime):
+                    value = _format_datetime(value)
+                item[name] = value
+            result.append(item)
+        return result
+
+
+def _format_datetime(value):
+    """Format a datetime the way DRF's DateTimeField does.
+
+    Args:
+        value (datetime): An aware datetime.
+
+    Returns:
+        str: ISO 8601 string, with 'Z' for UTC.
+    """
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
@@ -0,0 +1,43 @@
+"""Signal handlers for the courses RESTful API."""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.signals import users_updated
+
+from .user_cache import user_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Evict a saved or deleted user from the JWT user cache.
+
+    The eviction waits for the commit, otherwise a concurrent request
+    could cache the old row again before the change is visible.
+
+    Args:
+        sender (type): The user model.
+        instance (User): The saved or deleted user.
+        kwargs: Signal arguments.
+    """
+    transaction.on_commit(partial(user_cache.invalidate, instance.pk))
+
+
+@receiver(users_updated)
+def invalidate_updated_users(sender, user_ids, **kwargs):
+    """Evict users changed by a bulk update from the JWT user cache.
+
+    The signal is sent once the update is committed.
+
+    Args:
+        sender (type): The user model.
+        user_ids (list): Primary keys of the updated users.
+        kwargs: Signal arguments.
+    """
+    user_cache.invalidate(*user_ids)
@@ -1,3 +1,448 @@
-from django.test import TestCase
+"""Tests for the courses RESTful API."""
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from accounts.signals import users_updated
+from courses_app.models import Course
+
+from .revocation import LocalRevocationStore
+from .throttling import TokenBucketThrottle
+from .token_cache import decode_token, token_cache, token_digest
+from .user_cache import INVALIDATED, LocalLRUCache, user_cache
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from .utils import generate_access_token, generate_refresh_token
+
+
+class APITestCase(TestCase):
+    """Base class with one user and empty caches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user the tokens are issued to."""
+        cls.user = CustomUser.objects.create_user(
+            email='api@example.com', phone_number='+380000000010',
+            username='api', password='password')
+
+    def setUp(self):
+        """Start every test with empty caches."""
+        cache.clear()
+        user_cache.clear()
+
+
+class UserCacheTests(APITestCase):
+    """The JWT user cache serves auth fields and honours evictions."""
+
+    def test_auth_fields_only(self):
+        """Cached users carry no password hash; lookups hit the cache."""
+        with self.assertNumQueries(1):
+            user = user_cache.get_user(self.user.pk)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertNotIn('password', vars(cache.get(user_cache.key(
+            self.user.pk))))
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                user_cache.get_user(self.user.pk).email, self.user.email)
+
+    def test_copies(self):
+        """Callers get private copies of the cached user."""
+        user = user_cache.get_user(self.user.pk)
+        user.email = 'changed@example.com'
+        self.assertEqual(
+            user_cache.get_user(self.user.pk).email, self.user.email)
+
+    def test_save_evicts(self):
+        """Saving a user evicts it once the change is committed."""
+        user_cache.get_user(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.get(pk=self.user.pk).save()
+        self.assertEqual(cache.get(user_cache.key(self.user.pk)),
+                         INVALIDATED)
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+
+    def test_bulk_update_evicts(self):
+        """The users_updated signal evicts the updated users."""
+        user_cache.get_user(self.user.pk)
+        users_updated.send(sender=CustomUser, user_ids=[self.user.pk])
+        with self.assertNumQueries(1):
+            user_cache.get_user(self.user.pk)
+
+    def test_stale_read_is_not_stored(self):
+        """A row read before an eviction cannot replace the marker."""
+        stale = user_cache.get_user(self.user.pk)
+        key = user_cache.key(self.user.pk)
+        user_cache.invalidate(self.user.pk)
+        user_cache._store(key, stale, fresh=False)
+        self.assertEqual(cache.get(key), INVALIDATED)
+        user_cache.get_user(self.user.pk)
+        self.assertEqual(cache.get(key).pk, self.user.pk)
+
+    def test_version(self):
+        """Versions come from the shared cache and follow evictions."""
+        version = self.user.version
+        self.assertEqual(user_cache.get_version(self.user.pk), version)
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            version=version + 1)
+        self.assertEqual(user_cache.get_version(self.user.pk), version)
+        user_cache.invalidate(self.user.pk)
+        self.assertEqual(user_cache.get_version(self.user.pk), version + 1)
+        self.assertIsNone(user_cache.get_version(0))
+
+
+class RefreshTokenTests(APITestCase):
+    """Refresh tokens are spent once and can be revoked."""
+
+    def refresh(self, token):
+        """Exchange a refresh token.
+
+        Args:
+            token (str): The refresh token.
+
+        Returns:
+            Response: The API response.
+        """
+        return self.client.post(
+            reverse('refresh'), {'refresh': token},
+            content_type='application/json')
+
+    def test_rotation(self):
+        """A refresh token works once and returns a working successor."""
+        token = generate_refresh_token(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(
+            self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_logout_revokes(self):
+        """A logged out refresh token can no longer be exchanged."""
+        token = generate_refresh_token(self.user)
+        response = self.client.post(
+            reverse('logout'), {'refresh': token},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_access_token_rejected(self):
+        """Access tokens cannot be used as refresh tokens."""
+        token = generate_access_token(self.user)
+        self.assertEqual(self.refresh(token).status_code, 400)
+        self.assertEqual(self.refresh('garbage').status_code, 400)
+
+    def test_inactive_user(self):
+        """Refreshing fails once the user is deactivated."""
+        token = generate_refresh_token(self.user)
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        user_cache.invalidate(self.user.pk)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_local_store_expiry(self):
+        """Entries of the local store expire with their tokens."""
+        store = LocalRevocationStore()
+        now = time.time()
+        self.assertTrue(store.consume('spent', now + 60))
+        self.assertFalse(store.consume('spent', now + 60))
+        store.revoke('expired', now - 1)
+        self.assertTrue(store.is_revoked('spent'))
+        self.assertFalse(store.is_revoked('expired'))
+        store.consume('other', now + 60)
+        self.assertEqual(len(store), 2)
+
+
+@override_settings(LOGIN_THROTTLE_RATES={'ip': (3, 60), 'account': (2, 60)})
+class LoginThrottleTests(TransactionTestCase):
+    """Login attempts are limited per account and per client IP.
+
+    Passwords are checked on the executor's threads, which only see
+    committed users.
+    """
+
+    def setUp(self):
+        """Create the user and start with empty buckets."""
+        cache.clear()
+        user_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='api@example.com', phone_number='+380000000010',
+            username='api', password='password')
+
+    def login(self, email, password='wrong'):
+        """Attempt a login.
+
+        Args:
+            email (str): The account email.
+            password (str): The password to try.
+
+        Returns:
+            Response: The API response.
+        """
+        return self.client.post(
+            reverse('login'), {'email': email, 'password': password},
+            content_type='application/json')
+
+    def test_account_bucket(self):
+        """An account is throttled once its bucket is empty."""
+        for _ in range(2):
+            self.assertEqual(self.login(self.user.email).status_code, 401)
+        response = self.login(self.user.email.upper())
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_ip_bucket(self):
+        """A client is throttled across accounts once its bucket is empty."""
+        for index in range(3):
+            response = self.login(f'user{index}@example.com')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.login('user3@example.com').status_code, 429)
+
+    def test_refill(self):
+        """Buckets refill at capacity per period."""
+        now = time.time()
+        with mock.patch('courses_restfull.throttling.clock') as clock:
+            clock.return_value = now
+            for _ in range(2):
+                self.login(self.user.email)
+            self.assertEqual(self.login(self.user.email).status_code, 429)
+            clock.return_value = now + 30
+            response = self.login(self.user.email, 'password')
+            self.assertEqual(response.status_code, 200)
+
+    def test_ident_required(self):
+        """Throttles without an identity cannot be created."""
+        class ScopeOnlyThrottle(TokenBucketThrottle):
+            """A throttle that forgot ``get_ident``."""
+
+            scope = 'ip'
+
+        with self.assertRaises(TypeError):
+            ScopeOnlyThrottle()
+
+
+class TokenCacheTests(APITestCase):
+    """Verified access tokens are decoded once while they are valid."""
+
+    def setUp(self):
+        """Start with an empty token cache."""
+        super().setUp()
+        token_cache.clear()
+
+    def test_decoded_once(self):
+        """Repeated tokens are served from the cache."""
+        token = generate_access_token(self.user)
+        with mock.patch('courses_restfull.token_cache.jwt.decode',
+                        wraps=jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(decode_token(token)['user_id'],
+                                 self.user.pk)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_invalid_tokens_not_cached(self):
+        """Forged and refresh tokens are rejected and never stored."""
+        token = generate_access_token(self.user)
+        forged = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+        refresh = generate_refresh_token(self.user)
+        for bad in (forged, refresh):
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_token(bad)
+            self.assertIsNone(token_cache.get(token_digest(bad)))
+
+    def test_entries_expire_with_token(self):
+        """Entries are dropped once their token expires."""
+        token = generate_access_token(self.user)
+        decode_token(token)
+        exp = jwt.decode(token, options={'verify_signature': False})['exp']
+        later = time.monotonic() + exp - time.time() + 1
+        with mock.patch('courses_restfull.user_cache.time.monotonic',
+                        return_value=later):
+            self.assertIsNone(token_cache.get(token_digest(token)))
+
+    def test_lru_eviction(self):
+        """The least recently used entry goes first."""
+        lru = LocalLRUCache(maxsize=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+    def test_authenticated_request(self):
+        """The protected endpoint accepts a cached token."""
+        token = generate_access_token(self.user)
+        for _ in range(2):
+            response = self.client.get(
+                reverse('protected'),
+                HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'],
+                         'Hello, api! Access granted.')
+
+
+@override_settings(JWT_TOKEN_MODE='claims')
+class ClaimsTokenTests(APITestCase):
+    """Claims tokens authorize read-only views without loading the user."""
+
+    def setUp(self):
+        """Start with an empty token cache."""
+        super().setUp()
+        token_cache.clear()
+
+    def get_protected(self, token):
+        """Request the protected endpoint with a token.
+
+        Args:
+            token (str): The access token.
+
+        Returns:
+            Response: The API response.
+        """
+        return self.client.get(
+            reverse('protected'), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_claims(self):
+        """Access tokens sign the user fields views authorize with."""
+        payload = decode_token(generate_access_token(self.user))
+        self.assertEqual(
+            {field: payload[field] for field in (
+                'user_id', 'email', 'username', 'is_staff', 'is_active',
+                'ver')},
+            {'user_id': self.user.pk, 'email': self.user.email,
+             'username': self.user.username, 'is_staff': False,
+             'is_active': True, 'ver': self.user.version})
+
+    def test_db_free(self):
+        """Once the version is cached, requests run no queries."""
+        token = generate_access_token(self.user)
+        self.get_protected(token)
+        with self.assertNumQueries(0):
+            response = self.get_protected(token)
+        self.assertEqual(response.json()['message'],
+                         'Hello, api! Access granted.')
+
+    def test_lazy_user(self):
+        """Claims users load the user only for fields the token lacks."""
+        request = mock.Mock(headers={
+            'Authorization': f'Bearer {generate_access_token(self.user)}'})
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, ClaimsUser)
+        with self.assertNumQueries(0):
+            self.assertTrue(user)
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual(user.username, self.user.username)
+        with self.assertNumQueries(1):
+            self.assertFalse(user.is_superuser)
+
+    def test_outdated_after_save(self):
+        """Saving the user rejects the tokens issued before."""
+        token = generate_access_token(self.user)
+        self.assertEqual(self.get_protected(token).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            user = CustomUser.objects.get(pk=self.user.pk)
+            user.first_name = 'Changed'
+            user.save()
+        self.assertEqual(self.get_protected(token).status_code, 403)
+        self.assertEqual(
+            self.get_protected(generate_access_token(user)).status_code, 200)
+
+    def test_missing_claims(self):
+        """Tokens lacking a claim are rejected."""
+        payload = decode_token(generate_access_token(self.user))
+        del payload['username']
+        token = jwt.encode(
+            payload, settings.JWT_SECRET_KEY, algorithm='HS256')
+        self.assertEqual(self.get_protected(token).status_code, 403)
+
+
+class CourseAPITests(APITestCase):
+    """The course endpoints page, trim and enroll."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create five courses, pairs of them created at the same time."""
+        super().setUpTestData()
+        start = timezone.now()
+        cls.courses = []
+        for index in range(5):
+            course = Course.objects.create(
+                title=f'Course {index}', description='Description',
+                created_by=cls.user)
+            Course.objects.filter(pk=course.pk).update(
+                created_at=start + timedelta(minutes=index // 2))
+            cls.courses.append(course)
+
+    def setUp(self):
+        """Authenticate every request."""
+        super().setUp()
+        self.auth = {'HTTP_AUTHORIZATION':
+                     f'Bearer {generate_access_token(self.user)}'}
+
+    def test_cursor_pages(self):
+        """Following next links lists every course once, in order."""
+        ordered = list(Course.objects.order_by('created_at', 'id')
+                       .values_list('pk', flat=True))
+        url, seen = reverse('api_course_list') + '?page_size=2', []
+        while url:
+            response = self.client.get(url, **self.auth)
+            self.assertEqual(response.status_code, 200)
+            seen += [course['id'] for course in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(seen, ordered)
+
+    def test_sparse_fields(self):
+        """Only the requested fields are returned."""
+        response = self.client.get(
+            reverse('api_course_list'), {'fields': 'id,title'}, **self.auth)
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'title'})
+        response = self.client.get(
+            reverse('api_course_detail', args=[self.courses[0].pk]),
+            {'fields': 'title'}, **self.auth)
+        self.assertEqual(response.json(), {'title': 'Course 0'})
+        response = self.client.get(
+            reverse('api_course_list'), {'fields': 'id,password'},
+            **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_not_modified(self):
+        """A detail request with the current ETag gets a 304."""
+        url = reverse('api_course_detail', args=[self.courses[0].pk])
+        etag = self.client.get(url, **self.auth)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_follows_enrollments(self):
+        """The detail ETag changes with the enrollment counter."""
+        url = reverse('api_course_detail', args=[self.courses[0].pk])
+        response = self.client.get(url, **self.auth)
+        self.assertNotIn('Last-Modified', response)
+        self.client.post(
+            reverse('api_course_enroll', args=[self.courses[0].pk]),
+            **self.auth)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'], **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enrollment_count'], 1)
+
+    def test_enroll(self):
+        """Enrolling twice creates one enrollment."""
+        url = reverse('api_course_enroll', args=[self.courses[0].pk])
+        self.assertEqual(self.client.post(url, **self.auth).status_code, 201)
+        response = self.client.post(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(),
+                         {'course': self.courses[0].pk, 'enrolled': True})
+        self.courses[0].refresh_from_db()
+        self.assertEqual(self.courses[0].enrollment_count, 1)
+        self.assertEqual(
+            self.client.post(reverse('api_course_enroll', args=[0]),
+                             **self.auth).status_code, 404)
@@ -0,0 +1,124 @@
+"""Token-bucket throttles for the login endpoint.
+
+DRF checks throttles before the view runs, so brute-force traffic is
+rejected with 429 before any password is hashed. Each client IP and each
+account gets a bucket of ``capacity`` tokens refilled at ``capacity`` per
+``period`` seconds; an attempt takes one token.
+
+Buckets live in the shared cache backend so all workers see them. The
+read-modify-write is not atomic; under heavy concurrency a few extra
+attempts may slip through, which is acceptable for throttling.
+"""
+import hashlib
+from abc import ABCMeta, abstractmethod
+from time import time as clock
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_RATES = {
+    'ip': (20, 60),
+    'account': (5, 60),
+}
+
+
+class TokenBucketThrottle(BaseThrottle, metaclass=ABCMeta):
+    """Throttle requests with a token bucket per identity.
+
+    Subclasses set ``scope`` and implement ``get_ident``.
+    """
+
+    scope = None
+    cache_prefix = 'throttle:bucket:'
+
+    def __init__(self):
+        """Read the bucket size and refill period of the scope."""
+        rates = getattr(settings, 'LOGIN_THROTTLE_RATES', DEFAULT_RATES)
+        self.capacity, self.period = rates[self.scope]
+        self.retry_after = None
+
+    @abstractmethod
+    def get_ident(self, request):
+        """Return what the bucket is keyed by.
+
+        Args:
+            request (Request): The API request.
+
+        Returns:
+            str: The identity, or None to skip throttling.
+        """
+
+    def allow_request(self, request, view):
+        """Take a token from the identity's bucket if one is left.
+
+        Args:
+            request (Request): The API request.
+            view (APIView): The view being accessed.
+
+        Returns:
+            bool: True if the request may proceed.
+        """
+        ident = self.get_ident(request)
+        if ident is None:
+            return True
+        key = f'{self.cache_prefix}{self.scope}:{ident}'
+        rate = self.capacity / self.period
+        now = clock()
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self.retry_after = (1 - tokens) / rate
+            return False
+        cache.set(key, (tokens - 1, now), self.period)
+        return True
+
+    def wait(self):
+        """Seconds until the next token is available.
+
+        Returns:
+            float: The Retry-After delay, or None if not throttled.
+        """
+        return self.retry_after
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Limit login attempts per client IP address."""
+
+    scope = 'ip'
+
+    def get_ident(self, request):
+        """Key the bucket by the client IP.
+
+        X-Forwarded-For is only trusted for as many proxies as the
+        ``NUM_PROXIES`` REST framework setting declares; with 0 the
+        address of the connecting peer is used.
+
+        Args:
+            request (Request): The API request.
+
+        Returns:
+            str: The client address.
+        """
+        return BaseThrottle.get_ident(self, request)
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """Limit login attempts per account, whichever IP they come from."""
+
+    scope = 'account'
+
+    def get_ident(self, request):
+        """Key the bucket by the normalized email being logged into.
+
+        Args:
+            request (Request): The API request.
+
+        Returns:
+            str: Digest of the email, or None if the request has none.
+        """
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed so arbitrary input always makes a valid cache key.
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
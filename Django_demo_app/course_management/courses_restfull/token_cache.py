@@ -0,0 +1,61 @@
+"""Cache of verified JWT payloads.
+
+Clients send the same access token with every request until it expires.
+Verifying it again each time (split, base64-decode, HMAC, JSON-parse)
+is wasted work, so verified payloads are kept in a small per-process LRU
+keyed by a digest of the token, each entry expiring with its token. Only
+access tokens that passed verification are ever stored, so neither a
+forged token nor a refresh token can be served from the cache.
+"""
+import hashlib
+import time
+
+import jwt
+from django.conf import settings
+
+from courses_restfull.user_cache import LocalLRUCache
+from courses_restfull.utils import ACCESS_TOKEN_TYPE
+
+token_cache = LocalLRUCache(
+    maxsize=getattr(settings, 'JWT_TOKEN_CACHE_SIZE', 4096),
+    timeout=getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 300),
+)
+
+
+def token_digest(token):
+    """Return the cache key of a token.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        bytes: A 16-byte BLAKE2b digest of the token.
+    """
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def decode_token(token):
+    """Verify an access token and return its payload, using the cache.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The verified payload. Callers must not modify it.
+
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid, expired or not an
+            access token.
+    """
+    key = token_digest(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(
+        token, settings.JWT_SECRET_KEY, algorithms=['HS256'])
+    if payload.get('type') != ACCESS_TOKEN_TYPE:
+        raise jwt.InvalidTokenError('Not an access token.')
+    exp = payload.get('exp')
+    if exp is not None:
+        token_cache.set(key, payload, timeout=exp - time.time())
+    return payload
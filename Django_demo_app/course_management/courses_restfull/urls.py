@@ -1,10 +1,22 @@
 """URLs for courses_restfull."""
 from django.urls import path
 
-from courses_restfull.views import LoginView, ProtectedView, RefreshTokenView
+from courses_restfull.views import (CourseDetailView, CourseEnrollView,
+                                    CourseListView, LoginMetricsView,
+                                    LoginView, LogoutView, ProtectedView,
+                                    RefreshTokenView, RevenueReportView)
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
+    path('login/metrics/', LoginMetricsView.as_view(), name='login_metrics'),
     path('refresh/', RefreshTokenView.as_view(), name='refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('reports/revenue/', RevenueReportView.as_view(),
+         name='revenue_report'),
     path('protected/', ProtectedView.as_view(), name='protected'),
+    path('courses/', CourseListView.as_view(), name='api_course_list'),
+    path('courses/<int:pk>/', CourseDetailView.as_view(),
+         name='api_course_detail'),
+    path('courses/<int:pk>/enroll/', CourseEnrollView.as_view(),
+         name='api_course_enroll'),
 ]
@@ -0,0 +1,262 @@
+"""Two-tier cache of the users behind JWT-authenticated requests.
+
+Lookups try a small in-process LRU first, then the shared cache backend,
+and only then the database. Both tiers expire entries after a TTL. Saving
+or deleting a user evicts it from the local tier of the current process
+and from the shared tier; other processes drop their local copy when its
+(short) local TTL runs out, so ``JWT_USER_CACHE_LOCAL_TIMEOUT`` bounds how
+long a deactivated user may still authenticate there.
+
+Only the fields authentication and permission checks read are cached, so
+password hashes never leave the database; other fields load on access.
+Eviction leaves a short-lived marker in the shared tier instead of
+deleting the entry: a lookup that read the row before the change was
+committed then cannot store it afterwards, because entries are only
+added over missing keys, and only a lookup that saw the marker, and so
+read the row after the change, may replace it.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+User = get_user_model()
+
+KEY_PREFIX = 'jwt:user:'
+VERSION_KEY_PREFIX = 'jwt:user-version:'
+INVALIDATED = 'invalidated'
+AUTH_FIELDS = ('id', 'email', 'username', 'is_active', 'is_staff',
+               'is_superuser', 'version')
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded LRU mapping whose entries expire."""
+
+    def __init__(self, maxsize, timeout):
+        """Create an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries; 0 disables the cache.
+            timeout (float): Seconds an entry stays valid.
+        """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a live entry and mark it as recently used.
+
+        Args:
+            key (object): The entry key.
+
+        Returns:
+            object: The cached value, or None if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        """Store an entry, evicting the least recently used on overflow.
+
+        Args:
+            key (object): The entry key.
+            value (object): The value to cache.
+            timeout (float): Seconds this entry stays valid; the cache
+                timeout if None.
+        """
+        if self.maxsize <= 0:
+            return
+        if timeout is None:
+            timeout = self.timeout
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop an entry if present.
+
+        Args:
+            key (object): The entry key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        """Number of stored entries, expired ones included.
+
+        Returns:
+            int: The entry count.
+        """
+        return len(self._entries)
+
+
+class UserCache:
+    """Look users up by primary key through the local and shared tiers."""
+
+    def __init__(self, maxsize, local_timeout, timeout):
+        """Configure both tiers.
+
+        Args:
+            maxsize (int): Entries kept in the local LRU.
+            local_timeout (float): TTL of local entries in seconds.
+            timeout (int): TTL of shared cache entries in seconds.
+        """
+        self.enabled = True
+        self.timeout = timeout
+        self.local = LocalLRUCache(maxsize, local_timeout)
+        self._counter_lock = threading.Lock()
+        self.reset_stats()
+
+    def get_user(self, user_id):
+        """Return the user with the given primary key.
+
+        Args:
+            user_id (int): The user's primary key.
+
+        Returns:
+            User: A private copy of the cached user.
+
+        Raises:
+            User.DoesNotExist: If there is no such user.
+        """
+        if not self.enabled:
+            return User.objects.get(pk=user_id)
+        user = self.local.get(user_id)
+        if user is not None:
+            self._count('local_hits')
+            return copy.copy(user)
+        key = self.key(user_id)
+        user = cache.get(key)
+        if user is not None and user != INVALIDATED:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            fresh = user == INVALIDATED
+            user = User.objects.only(*AUTH_FIELDS).get(pk=user_id)
+            self._store(key, user, fresh)
+        self.local.set(user_id, user)
+        # Views may modify request.user; never hand out the cached object.
+        return copy.copy(user)
+
+    def get_version(self, user_id):
+        """Return the current version of a user, from the shared cache.
+
+        Versions are never kept in the local tier: a stale local version
+        would accept tokens the user has already invalidated.
+
+        Args:
+            user_id (int): The user's primary key.
+
+        Returns:
+            int: The version, or None if there is no such user.
+        """
+        key = f'{VERSION_KEY_PREFIX}{user_id}'
+        version = cache.get(key)
+        if version is None or version == INVALIDATED:
+            fresh = version == INVALIDATED
+            version = User.objects.filter(pk=user_id).values_list(
+                'version', flat=True).first()
+            if version is not None:
+                self._store(key, version, fresh)
+        return version
+
+    def invalidate(self, *user_ids):
+        """Evict users from both tiers and drop their cached versions.
+
+        Call it once the change is committed.
+
+        Args:
+            user_ids (int): Primary keys of the users to evict.
+        """
+        for user_id in user_ids:
+            self.local.delete(user_id)
+        cache.set_many({
+            key: INVALIDATED
+            for user_id in user_ids
+            for key in (self.key(user_id), f'{VERSION_KEY_PREFIX}{user_id}')
+        }, self.timeout)
+
+    def clear(self):
+        """Empty the local tier; shared entries expire on their own."""
+        self.local.clear()
+
+    def stats(self):
+        """Return the hit and miss counters.
+
+        Returns:
+            dict: ``local_hits``, ``shared_hits``, ``misses`` and the
+            overall ``hit_ratio``.
+        """
+        with self._counter_lock:
+            counters = dict(self._counters)
+        lookups = sum(counters.values())
+        hits = counters['local_hits'] + counters['shared_hits']
+        counters['hit_ratio'] = hits / lookups if lookups else 0.0
+        return counters
+
+    def reset_stats(self):
+        """Zero the hit and miss counters."""
+        with self._counter_lock:
+            self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    @staticmethod
+    def key(user_id):
+        """Shared cache key of a user.
+
+        Args:
+            user_id (int): The user's primary key.
+
+        Returns:
+            str: The cache key.
+        """
+        return f'{KEY_PREFIX}{user_id}'
+
+    def _store(self, key, value, fresh):
+        """Store a value read from the database in the shared tier.
+
+        Args:
+            key (str): The cache key.
+            value (object): The value read.
+            fresh (bool): Whether the read followed an eviction marker;
+                otherwise the value is only added if the key is missing.
+        """
+        if fresh:
+            cache.set(key, value, self.timeout)
+        else:
+            cache.add(key, value, self.timeout)
+
+    def _count(self, counter):
+        """Increment a counter.
+
+        Args:
+            counter (str): The counter name.
+        """
+        with self._counter_lock:
+            self._counters[counter] += 1
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, 'JWT_USER_CACHE_SIZE', 1024),
+    local_timeout=getattr(settings, 'JWT_USER_CACHE_LOCAL_TIMEOUT', 5),
+    timeout=getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 300),
+)
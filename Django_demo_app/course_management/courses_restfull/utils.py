@@ -1,14 +1,28 @@
-"""Utility functions for generating JWT tokens."""
+"""Utility functions for generating and reading JWT tokens.
+
+Every token names its purpose in a ``type`` claim. Access tokens are the
+only ones accepted for authentication, and refresh tokens the only ones
+accepted by the refresh and logout endpoints, so a long-lived refresh
+token can never stand in for an access token.
+"""
+import uuid
 from datetime import timedelta
 
 import jwt
 from django.conf import settings
 from django.utils import timezone
 
+ACCESS_TOKEN_TYPE = 'access'
+REFRESH_TOKEN_TYPE = 'refresh'
+
 
 def generate_access_token(user):
     """Generate a JWT access token for the user.
 
+    With ``JWT_TOKEN_MODE = 'claims'`` the token also carries the user's
+    email, username, ``is_staff``, ``is_active`` and version, so read-only
+    endpoints can authorize the request without loading the user.
+
     Args:
         user: The user object for whom the token is generated.
 
@@ -17,16 +31,28 @@ def generate_access_token(user):
     """
     lifetime = getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 300)
     payload = {
+        'type': ACCESS_TOKEN_TYPE,
         'user_id': user.id,
         'exp': timezone.now() + timedelta(seconds=lifetime),
         'iat': timezone.now(),
     }
+    if getattr(settings, 'JWT_TOKEN_MODE', 'id') == 'claims':
+        payload.update({
+            'email': user.email,
+            'username': user.username,
+            'is_staff': user.is_staff,
+            'is_active': user.is_active,
+            'ver': user.version,
+        })
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm='HS256')
 
 
 def generate_refresh_token(user):
     """Generate a JWT refresh token for the user.
 
+    Each refresh token has a unique ``jti`` so it can be spent once and
+    revoked.
+
     Args:
         user: The user object for whom the token is generated.
 
@@ -34,8 +60,32 @@ def generate_refresh_token(user):
         str: The generated JWT refresh token.
     """
     payload = {
+        'type': REFRESH_TOKEN_TYPE,
         'user_id': user.id,
         'exp': timezone.now() + timedelta(days=7),
         'iat': timezone.now(),
+        'jti': uuid.uuid4().hex,
     }
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm='HS256')
+
+
+def decode_refresh_token(token):
+    """Verify a refresh token and return its payload.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The verified payload, with ``user_id``, ``jti`` and ``exp``.
+
+    Raises:
+        jwt.ExpiredSignatureError: If the token has expired.
+        jwt.InvalidTokenError: If the token is invalid, is not a refresh
+            token or lacks a required claim.
+    """
+    payload = jwt.decode(
+        token, settings.JWT_SECRET_KEY, algorithms=['HS256'],
+        options={'require': ['exp', 'jti', 'user_id']})
+    if payload.get('type') != REFRESH_TOKEN_TYPE:
+        raise jwt.InvalidTokenError('Not a refresh token.')
+    return payload
@@ -1,24 +1,52 @@
 """Views for the courses RESTful API."""
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 import jwt
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
+from django.shortcuts import get_object_or_404
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from courses_restfull.authentication import CustomJWTAuthentication
-from courses_restfull.utils import (generate_access_token,
+from accounts.reporting import revenue_report
+from course_management.executors import ExecutorSaturated
+from courses_app.conditional import catalog_etag, catalog_state, course_etag
+from courses_app.enrollment import enroll
+from courses_app.mixins import ConditionalGetMixin
+from courses_app.models import Course
+from courses_restfull.authentication import (ClaimsJWTAuthentication,
+                                             CustomJWTAuthentication)
+from courses_restfull.hashing import password_executor
+from courses_restfull.pagination import CourseCursorPagination
+from courses_restfull.revocation import get_revocation_store
+from courses_restfull.serializers import (COURSE_FIELDS,
+                                          COURSE_LIST_DEFAULT_FIELDS,
+                                          CourseRowSerializer,
+                                          CourseSerializer,
+                                          RevenueReportQuerySerializer,
+                                          RevenueRowSerializer, parse_fields)
+from courses_restfull.throttling import LoginAccountThrottle, LoginIPThrottle
+from courses_restfull.user_cache import user_cache
+from courses_restfull.utils import (decode_refresh_token,
+                                    generate_access_token,
                                     generate_refresh_token)
 
 User = get_user_model()
 
 
 class LoginView(APIView):
-    """Login view for obtaining JWT tokens."""
+    """Login view for obtaining JWT tokens.
+
+    Attempts are throttled per IP and per account before any hashing, and
+    passwords are verified on the bounded password executor.
+    """
 
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
 
     def post(self, request):
         """Handle user login and return JWT tokens.
@@ -32,7 +60,16 @@ class LoginView(APIView):
         email = request.data.get('email')
         password = request.data.get('password')
 
-        user = authenticate(username=email, password=password)
+        try:
+            future = password_executor.submit(
+                authenticate, username=email, password=password)
+            user = future.result(
+                timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT', 5))
+        except (ExecutorSaturated, FutureTimeoutError):
+            return Response({'error': 'Too many logins, try again later.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': '1'},
+                            )
 
         if not user:
             return Response({'error': 'Wrong username or password.'},
@@ -46,48 +83,144 @@ class LoginView(APIView):
 
 
 class RefreshTokenView(APIView):
-    """View for refreshing JWT access tokens."""
+    """View for refreshing JWT access tokens.
+
+    Refresh tokens are rotated: each one can be used once and the response
+    carries its replacement.
+    """
 
     authentication_classes = []
     permission_classes = []
 
     def post(self, request):
-        """Handle token refresh and return new access token.
+        """Handle token refresh and return new access and refresh tokens.
 
         Args:
             request: The HTTP request object.
 
         Returns:
-            Response: A JSON response with the new access token.
+            Response: A JSON response with the new access and refresh
+            tokens.
         """
         refresh_token = request.data.get('refresh')
         try:
-            payload = jwt.decode(
-                refresh_token, settings.JWT_SECRET_KEY, algorithms=['HS256'])
+            payload = decode_refresh_token(refresh_token)
             user_id = payload['user_id']
+            jti = payload['jti']
         except jwt.ExpiredSignatureError:
             return Response({'error': 'Refresh token has expired.'},
                             status=status.HTTP_401_UNAUTHORIZED,
                             )
-        except jwt.InvalidTokenError:
+        except (jwt.InvalidTokenError, KeyError):
             return Response({'error': 'Invalid refresh token!'},
                             status=status.HTTP_400_BAD_REQUEST,
                             )
 
-        user = User.objects.get(id=user_id)
-        access_token = generate_access_token(user)
-        return Response({'access': access_token})
+        if not get_revocation_store().consume(jti, payload['exp']):
+            return Response({'error': 'Refresh token has been revoked.'},
+                            status=status.HTTP_401_UNAUTHORIZED,
+                            )
+        try:
+            user = user_cache.get_user(user_id)
+        except User.DoesNotExist:
+            user = None
+        if user is None or not user.is_active:
+            return Response({'error': 'User not found or inactive.'},
+                            status=status.HTTP_401_UNAUTHORIZED,
+                            )
+        return Response({
+            'access': generate_access_token(user),
+            'refresh': generate_refresh_token(user),
+        })
+
+
+class LogoutView(APIView):
+    """View for revoking a refresh token."""
+
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        """Revoke the given refresh token.
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: An empty 204 response, or 400 for an invalid token.
+        """
+        try:
+            payload = decode_refresh_token(request.data.get('refresh'))
+            get_revocation_store().revoke(payload['jti'], payload['exp'])
+        except jwt.ExpiredSignatureError:
+            # An expired token is useless already.
+            pass
+        except (jwt.InvalidTokenError, KeyError):
+            return Response({'error': 'Invalid refresh token!'},
+                            status=status.HTTP_400_BAD_REQUEST,
+                            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class LoginMetricsView(APIView):
+    """Metrics of the password executor, for administrators."""
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the executor counters and timings.
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: The executor metrics.
+        """
+        return Response(password_executor.metrics())
+
+
+class RevenueReportView(APIView):
+    """Revenue per day, week or month and payment method, for admins.
+
+    ``?start=2025-01-01&end=2025-04-01&bucket=month`` reports the periods
+    covering ``start`` up to the day before ``end``; ``payment_method``
+    limits the report to one method.
+    """
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the revenue report.
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: The report parameters and one row per period.
+        """
+        params = RevenueReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = revenue_report(**params.validated_data)
+        return Response({
+            **params.data,
+            'results': RevenueRowSerializer(rows, many=True).data,
+        })
 
 
 class ProtectedView(APIView):
     """Protected view requiring JWT authentication."""
 
-    authentication_classes = [CustomJWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """Handle GET request for protected view.
 
+        Only token claims are read, so claims tokens are served without
+        loading the user.
+
         Args:
             request: The HTTP request object.
 
@@ -97,3 +230,120 @@ class ProtectedView(APIView):
         return Response({
             'message': f'Hello, {request.user.username}! Access granted.',
         })
+
+
+class CourseListView(ConditionalGetMixin, ListAPIView):
+    """Cursor-paginated list of courses.
+
+    Supports sparse fieldsets through ``?fields=id,title``. Rows are read
+    with ``values()`` and serialized without model instances.
+    """
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = CourseCursorPagination
+    queryset = Course.objects.all()
+
+    def get_etag(self):
+        """ETag from the catalog state and the query string.
+
+        Returns:
+            str: The unquoted ETag.
+        """
+        return catalog_etag(catalog_state(), self.request.GET.urlencode())
+
+    def get_last_modified(self):
+        """Last-Modified from the last recorded catalog change.
+
+        Returns:
+            datetime: When a course or enrollment last changed, or None.
+        """
+        return catalog_state()['last_modified']
+
+    def list(self, request, *args, **kwargs):
+        """Return one page of courses.
+
+        Args:
+            request: The HTTP request object.
+            args: Additional positional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            Response: The paginated course list.
+        """
+        serializer = CourseRowSerializer(parse_fields(
+            request, COURSE_FIELDS, COURSE_LIST_DEFAULT_FIELDS))
+        ordering = [field.lstrip('-') for field in self.paginator.ordering]
+        queryset = serializer.select(self.get_queryset(), required=ordering)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            serializer.to_representation(page))
+
+
+class CourseDetailView(ConditionalGetMixin, RetrieveAPIView):
+    """Single course, with sparse fieldsets through ``?fields=``."""
+
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    queryset = Course.objects.select_related('created_by').defer(
+        'search_vector')
+    serializer_class = CourseSerializer
+
+    def get_object(self):
+        """Fetch the course once per request.
+
+        Returns:
+            Course: The requested course.
+        """
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def get_etag(self):
+        """ETag of the requested course.
+
+        There is no Last-Modified: ``updated_at`` does not move when the
+        enrollment counter changes, while the ETag includes the counter.
+
+        Returns:
+            str: The unquoted ETag.
+        """
+        return course_etag(self.get_object(), self.request.GET.urlencode())
+
+    def get_serializer(self, *args, **kwargs):
+        """Build the serializer limited to the requested fields.
+
+        Args:
+            args: Positional arguments for the serializer.
+            kwargs: Keyword arguments for the serializer.
+
+        Returns:
+            CourseSerializer: The serializer instance.
+        """
+        kwargs['fields'] = parse_fields(
+            self.request, COURSE_FIELDS, COURSE_FIELDS)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CourseEnrollView(APIView):
+    """Enroll the authenticated user in a course."""
+
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """Enroll the user; repeating the request is harmless.
+
+        Args:
+            request: The HTTP request object.
+            pk (int): The course primary key.
+
+        Returns:
+            Response: 201 for a new enrollment, 200 if already enrolled.
+        """
+        course = get_object_or_404(Course.objects.only('id'), pk=pk)
+        created = enroll(request.user, course)
+        return Response(
+            {'course': course.pk, 'enrolled': True},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )